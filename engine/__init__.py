@@ -0,0 +1,13 @@
+"""
+Motor de inferência do sistema especialista.
+
+O pacote é mantido leve: importar `engine` não carrega streamlit nem constrói
+a base de conhecimento. Os submódulos (expert_system, facts, rules, ...)
+devem ser importados diretamente.
+"""
+
+# Corrigir erro com collections.Mapping no Python 3.10+ (usado pelo frozendict do Experta)
+import collections
+if not hasattr(collections, "Mapping"):
+    import collections.abc
+    collections.Mapping = collections.abc.Mapping
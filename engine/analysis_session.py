@@ -0,0 +1,282 @@
+import threading
+import uuid
+from collections import deque
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from utils.timing import StageTimer
+from knowledge_base.reloadable import get_knowledge_base
+
+from .conversation_context import ConversationContext
+from .facts import TextRelato, create_facts_from_groq_response
+from .rules import ViolenceRules
+
+
+class _Pass(NamedTuple):
+    """Etapa registrada para reaplicação após um refinamento."""
+    id: int
+    text: str
+    keywords: Dict[str, List[str]]
+    pending: bool = False   # provisória, aguardando o LLM
+
+
+class AnalysisSession:
+    """
+    Sessão de análise incremental (relato inicial + respostas de follow-up).
+
+    O motor da sessão mantém a memória de trabalho entre as etapas: no
+    follow-up, apenas o texto novo é enviado ao Groq e só as palavras-chave
+    ainda não vistas são declaradas. O Rete gera ativações apenas para
+    esses fatos novos, então o motor dispara somente as regras afetadas,
+    sem repetir a primeira extração nem a execução completa.
+
+    As regras só têm condições positivas, então as classificações obtidas
+    são as mesmas de uma nova análise com todas as palavras-chave. A versão
+    da base de conhecimento fica fixada na versão do início da sessão.
+
+    As perguntas de follow-up são escolhidas localmente
+    (BaseViolenceEngine.suggest_follow_up): o LLM só extrai palavras-chave.
+
+    A memória da sessão é limitada: o contexto guarda as últimas
+    `context_size` mensagens (mais o resumo das anteriores) e só os
+    `context_size` relatos mais recentes ficam como TextRelato no motor
+    (as regras não dependem deles). As palavras-chave são limitadas pelo
+    vocabulário da base.
+
+    Com um AnalysisStore no ExpertSystem, a sessão é gravada como um único
+    registro (chave `key`), atualizado a cada etapa.
+
+    Com `latency_budget`, uma etapa cujo Groq não responde a tempo usa a
+    extração local (resultado com "provisional": True). Quando o LLM
+    responde, as palavras-chave dessa etapa são substituídas pelas dele e as
+    etapas da sessão são reaplicadas em um motor reiniciado, sem novas
+    chamadas ao LLM; o resultado chega pelo Future "refinement". Etapas e
+    refinamentos são serializados pelo lock da sessão.
+    """
+
+    def __init__(self, expert_system, context_size: int = 8):
+        self.expert_system = expert_system
+        self.context = ConversationContext(max_messages=context_size)
+        self._texts: deque = deque()
+        self.text_processor = expert_system.text_processor
+        self.engine = ViolenceRules(render_explanations=expert_system.engine.render_explanations)
+        self.version = get_knowledge_base().current()
+        self.keywords: Dict[str, List[str]] = {}
+        self.missing_fields: List[str] = []
+        self.questions: List[str] = []
+        self.passes = 0
+        self.key = uuid.uuid4().hex
+        # Etapas para reaplicar após um refinamento (ver _compact_history)
+        self._history: List[_Pass] = []
+        self._pass_ids = 0
+        self._lock = threading.RLock()
+
+    def analyze(self, text: str, include_timings: bool = False,
+                latency_budget: Optional[float] = None,
+                on_refined: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        """
+        Primeira etapa: reinicia o motor e analisa o relato completo.
+        `latency_budget` e `on_refined` são os de ExpertSystem.analyze_text.
+        """
+        with self._lock:
+            timer = StageTimer()
+            self._clear(timer)
+            self.key = uuid.uuid4().hex
+            self._history = []
+            return self._run_pass(text, timer, include_timings, False, latency_budget, on_refined)
+
+    def follow_up(self, text: str, include_timings: bool = False,
+                  latency_budget: Optional[float] = None,
+                  on_refined: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        """
+        Etapa de follow-up: extrai palavras-chave apenas do texto novo e
+        declara somente os fatos que ainda não estão no motor.
+        """
+        with self._lock:
+            if not self.passes:
+                return self.analyze(text, include_timings, latency_budget, on_refined)
+            return self._run_pass(text, StageTimer(), include_timings, True, latency_budget, on_refined)
+
+    def add_keywords(self, keywords: Dict[str, List[str]], text: str = "",
+                     timer: Optional[StageTimer] = None) -> Dict[str, Any]:
+        """
+        Declara as palavras-chave ainda não vistas e executa o motor.
+        Retorna os resultados consolidados mais "new_keywords" (o delta).
+        """
+        with self._lock:
+            self._pass_ids += 1
+            self._history.append(_Pass(self._pass_ids, text, keywords))
+            self._compact_history()
+            return self._apply(keywords, text, timer or StageTimer())
+
+    def _compact_history(self) -> None:
+        """
+        Limita o histórico a `max_messages` etapas: as mais antigas já
+        definitivas são fundidas em uma só, sem texto (as regras só têm
+        condições positivas, então reaplicar a união das palavras-chave leva
+        ao mesmo estado). Etapas provisórias não são fundidas.
+        """
+        while len(self._history) > self.context.max_messages:
+            first, second = self._history[0], self._history[1]
+            if first.pending or second.pending:
+                return
+            merged = {category: list(values) for category, values in first.keywords.items()}
+            for category, values in second.keywords.items():
+                known = merged.setdefault(category, [])
+                known.extend(value for value in values if value not in known)
+            self._history[:2] = [_Pass(second.id, "", merged)]
+
+    def _clear(self, timer: StageTimer) -> None:
+        with timer.span("reset"):
+            self.engine.reset()
+        self.keywords = {}
+        self.passes = 0
+        self.context.clear()
+        self._texts.clear()
+
+    def _apply(self, keywords: Dict[str, List[str]], text: str, timer: StageTimer) -> Dict[str, Any]:
+        with self.version.pinned():
+            with timer.span("declare"):
+                delta = self._delta(keywords)
+                if text:
+                    self._remember_text(text, delta)
+                self.engine.declare_many(create_facts_from_groq_response({"identified_keywords": delta}))
+            self.engine.run(timer=timer)
+            with timer.span("collect"):
+                results = self.expert_system._collect_results(self.engine)
+        self.passes += 1
+        results["new_keywords"] = delta
+        results["identified_keywords"] = {category: list(values) for category, values in self.keywords.items()}
+        return results
+
+    def _run_pass(self, text: str, timer: StageTimer, include_timings: bool, is_follow_up: bool,
+                  latency_budget: Optional[float] = None,
+                  on_refined: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        extract = self._extractor(text, is_follow_up)
+        llm: Optional[Future] = None
+        if latency_budget is None:
+            response = self._safe(extract, timer)
+        else:
+            llm_timer = StageTimer()
+            llm = self.expert_system._get_executor().submit(self._safe, extract, llm_timer)
+            try:
+                response, llm = llm.result(timeout=latency_budget), None
+                timer.spans.update(llm_timer.spans)
+            except FutureTimeout:
+                print(f"⏳ Groq sem resposta em {latency_budget}s: etapa provisória com extração local")
+                with timer.span("local_extraction"):
+                    response = self.expert_system._get_local_extractor(self.version).extract(text)
+
+        results = self.add_keywords(response.get("identified_keywords") or {}, text, timer)
+        results = self._finish_pass(results, timer, include_timings, record=llm is None)
+        if llm is not None:
+            self._history[-1] = self._history[-1]._replace(pending=True)
+            results["provisional"] = True
+            results["refinement"] = self._refine_later(llm, self._history[-1].id, llm_timer,
+                                                       include_timings, on_refined)
+        return results
+
+    def _extractor(self, text: str, is_follow_up: bool) -> Callable[[StageTimer], Dict[str, Any]]:
+        missing_fields = self.missing_fields if is_follow_up else None
+
+        def extract(timer: StageTimer) -> Dict[str, Any]:
+            with self.version.pinned():
+                return self.text_processor.extract_keywords(
+                    text, timer=timer, is_follow_up=is_follow_up,
+                    missing_fields=missing_fields, ask_questions=False)
+        return extract
+
+    @staticmethod
+    def _safe(extract: Callable[[StageTimer], Dict[str, Any]], timer: StageTimer) -> Dict[str, Any]:
+        try:
+            return extract(timer)
+        except Exception as e:
+            print(f"❌ Erro ao processar texto: {str(e)}")
+            return {}
+
+    def _finish_pass(self, results: Dict[str, Any], timer: StageTimer, include_timings: bool,
+                     record: bool = True) -> Dict[str, Any]:
+        with self.version.pinned():
+            with timer.span("questions"):
+                suggestions = self.engine.suggest_follow_up(self.keywords)
+        self.missing_fields = [category for category, _ in suggestions]
+        self.questions = [question for _, question in suggestions]
+        results["missing_fields"] = self.missing_fields
+        results["questions"] = self.questions
+
+        timings = timer.finish()
+        self.expert_system.latency.record(timings)
+        store = self.expert_system.store
+        # Só o resultado refinado de uma etapa provisória é gravado no store
+        if record and store is not None:
+            texts = [message["content"] for message in self.context.messages()]
+            store.record(results, self.keywords, timings, self.version.fingerprint,
+                         text="\n".join(texts), key=self.key)
+        if include_timings:
+            results["timings"] = timings
+        return results
+
+    def _refine_later(self, llm: Future, pass_id: int, timer: StageTimer, include_timings: bool,
+                      on_refined: Optional[Callable[[Dict[str, Any]], None]]) -> Future:
+        """
+        Quando o LLM responder, troca as palavras-chave da etapa `pass_id`
+        pelas dele e reaplica as etapas da sessão. Se a sessão foi
+        reiniciada (novo `analyze`) antes disso, o refinamento é cancelado.
+        """
+        refined: Future = Future()
+        key = self.key
+
+        def refine(done: Future) -> None:
+            try:
+                keywords = done.result().get("identified_keywords") or {}
+                with self._lock:
+                    if self.key != key:
+                        refined.cancel()
+                        refined.set_running_or_notify_cancel()  # acorda quem espera com wait()
+                        return
+                    position = next(i for i, entry in enumerate(self._history) if entry.id == pass_id)
+                    self._history[position] = self._history[position]._replace(keywords=keywords, pending=False)
+                    self._compact_history()
+                    results = None
+                    self._clear(timer)
+                    for entry in self._history:
+                        results = self._apply(entry.keywords, entry.text, timer)
+                    results = self._finish_pass(results, timer, include_timings)
+            except Exception as exc:
+                refined.set_exception(exc)
+            else:
+                refined.set_result(results)
+
+        def deliver(done: Future) -> None:
+            if not done.cancelled() and done.exception() is None:
+                on_refined(done.result())
+
+        if on_refined is not None:
+            refined.add_done_callback(deliver)
+        llm.add_done_callback(lambda done: self.expert_system._get_executor().submit(refine, done))
+        return refined
+
+    def _remember_text(self, text: str, keywords: Dict[str, List[str]]) -> None:
+        """Registra o texto no contexto e no motor, retirando o relato mais antigo além do limite."""
+        self.context.append(text, keywords=keywords)
+        while self._texts and len(self._texts) >= self.context.max_messages:
+            self.engine.retract(self._texts.popleft())
+        fact = self.engine.declare(TextRelato(text=text, processed=True))
+        if fact is not None:  # texto repetido não gera fato novo
+            self._texts.append(fact)
+
+    def _delta(self, keywords: Dict[str, List[str]]) -> Dict[str, List[str]]:
+        """Palavras-chave ainda não declaradas, por categoria (sem repetições)."""
+        delta: Dict[str, List[str]] = {}
+        for category, values in keywords.items():
+            known = self.keywords.setdefault(category, [])
+            for value in values:
+                if value not in known:
+                    known.append(value)
+                    delta.setdefault(category, []).append(value)
+        return delta
+
+    @property
+    def known_keywords(self) -> List[Tuple[str, str]]:
+        """Pares (categoria, palavra-chave) já declarados nesta sessão."""
+        return [(category, value) for category, values in self.keywords.items() for value in values]
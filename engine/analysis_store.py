@@ -0,0 +1,451 @@
+"""
+Armazenamento persistente das análises em SQLite (modo WAL).
+
+Opcional: o ExpertSystem só grava quando recebe um AnalysisStore. Cada análise
+é registrada com as palavras-chave extraídas, as classificações (tipo,
+subtipo, pontuação), as durações das etapas e o fingerprint da versão da base
+de conhecimento. O texto do relato só é gravado com `store_text=True`.
+
+As gravações não acontecem na thread da análise: `record` apenas enfileira o
+registro, e uma thread de escrita grava tudo o que estiver pendente em uma
+única transação (group commit). Em WAL, leituras (`connect`, `find`,
+`count`) não bloqueiam a escrita.
+
+Tabelas:
+    analyses           uma linha por análise (ou por sessão, atualizada a cada etapa)
+    analysis_types     (análise, tipo, subtipo), para consultas por tipo
+    analysis_keywords  (análise, categoria, palavra-chave), para consultas por
+                       contexto, relação etc.
+As tabelas auxiliares repetem `created_at`, de modo que os índices atendem
+filtros por tipo/palavra-chave combinados com intervalo de tempo.
+
+Bitmaps por análise, índice invertido em memória (`analytics`) e rollups
+por tipo × contexto × mês (`rollup`): ver engine/analytics.py.
+"""
+import json
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Dict, Iterable, List, Mapping, NamedTuple, Optional, Tuple
+
+from .analytics import (
+    ANALYTICS_SCHEMA, BITMAP_COLUMNS, CLASSIFICATION, KEYWORD, AnalyticsIndex, TermBits,
+    classification_terms, decode_terms, keyword_terms, month_of, rollup_keys
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS analyses (
+    id INTEGER PRIMARY KEY,
+    key TEXT NOT NULL UNIQUE,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    kb_fingerprint TEXT NOT NULL,
+    primary_type TEXT,
+    primary_subtype TEXT,
+    keywords TEXT NOT NULL,
+    classifications TEXT NOT NULL,
+    timings TEXT NOT NULL,
+    text TEXT
+);
+CREATE TABLE IF NOT EXISTS analysis_types (
+    analysis_id INTEGER NOT NULL REFERENCES analyses(id) ON DELETE CASCADE,
+    violence_type TEXT NOT NULL,
+    subtype TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS analysis_keywords (
+    analysis_id INTEGER NOT NULL REFERENCES analyses(id) ON DELETE CASCADE,
+    category TEXT NOT NULL,
+    keyword TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_analyses_created ON analyses(created_at);
+CREATE INDEX IF NOT EXISTS idx_types_type ON analysis_types(violence_type, subtype, created_at);
+CREATE INDEX IF NOT EXISTS idx_types_analysis ON analysis_types(analysis_id);
+CREATE INDEX IF NOT EXISTS idx_keywords_keyword ON analysis_keywords(category, keyword, created_at);
+CREATE INDEX IF NOT EXISTS idx_keywords_analysis ON analysis_keywords(analysis_id);
+"""
+
+# Campos de cada classificação gravados (a explicação fica de fora)
+CLASSIFICATION_FIELDS = ("violence_type", "subtype", "score", "confidence", "rank")
+
+_STOP = object()
+
+
+class AnalysisRecord(NamedTuple):
+    """Uma análise pronta para gravação."""
+    key: str
+    created_at: float
+    kb_fingerprint: str
+    keywords: Dict[str, List[str]]
+    classifications: List[Dict[str, Any]]
+    timings: Dict[str, float]
+    text: Optional[str] = None
+
+
+def _connect(path: str) -> sqlite3.Connection:
+    connection = sqlite3.connect(path, timeout=30.0)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")  # seguro em WAL; fsync só no checkpoint
+    connection.execute("PRAGMA foreign_keys=ON")
+    return connection
+
+
+class AnalysisStore:
+    """
+    Grava análises em SQLite a partir de uma thread de escrita.
+
+    Args:
+        path: Arquivo do banco (criado se não existir)
+        store_text: Se True, grava também o texto do relato
+        batch_size: Máximo de registros por transação
+        max_pending: Limite da fila; além dele os registros são descartados
+            (e contados em `dropped`) para não bloquear a análise
+
+    Registros que não puderem ser gravados (ex.: classificação que não é
+    serializável em JSON) são descartados e contados em `failed`; os demais
+    registros do mesmo lote são gravados normalmente.
+    """
+
+    def __init__(self, path: str, store_text: bool = False, batch_size: int = 512,
+                 max_pending: int = 10_000):
+        self.path = path
+        self.store_text = store_text
+        self.batch_size = batch_size
+        self.dropped = 0
+        self.failed = 0
+        self.written = 0
+        self.commits = 0
+        self._overflowing = False
+        self._analytics: Optional[AnalyticsIndex] = None
+        self._analytics_lock = threading.Lock()
+        connection = _connect(path)
+        connection.executescript(SCHEMA + ANALYTICS_SCHEMA)
+        self._migrate(connection)
+        connection.close()
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_pending)
+        self._writer = threading.Thread(target=self._write_loop, name="analysis-store", daemon=True)
+        self._writer.start()
+
+    def record(self, results: Mapping[str, Any], keywords: Mapping[str, Iterable[str]],
+               timings: Mapping[str, float], kb_fingerprint: str,
+               text: Optional[str] = None, key: Optional[str] = None) -> str:
+        """
+        Enfileira uma análise e retorna sua chave. Gravar de novo com a mesma
+        chave (ex.: cada etapa de uma sessão) substitui o registro anterior.
+        """
+        key = key or uuid.uuid4().hex
+        record = AnalysisRecord(
+            key=key,
+            created_at=time.time(),
+            kb_fingerprint=kb_fingerprint,
+            keywords={category: list(values) for category, values in keywords.items() if values},
+            classifications=[{name: entry[name] for name in CLASSIFICATION_FIELDS if name in entry}
+                             for entry in results.get("classifications", [])],
+            timings=dict(timings),
+            text=text if self.store_text else None,
+        )
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            if not self._overflowing:
+                print("⚠️ Fila de gravação cheia: descartando análises (total em `dropped`)")
+            self._overflowing = True
+            self.dropped += 1
+        else:
+            self._overflowing = False
+        return key
+
+    def flush(self) -> None:
+        """Aguarda até que todos os registros enfileirados estejam gravados."""
+        self._queue.join()
+
+    def close(self) -> None:
+        """Grava o que estiver pendente e encerra a thread de escrita."""
+        if self._writer.is_alive():
+            self._queue.put(_STOP)
+            self._writer.join()
+
+    def _write_loop(self) -> None:
+        connection = _connect(self.path)
+        self._terms = TermBits(connection)
+        try:
+            while True:
+                batch = [self._queue.get()]
+                while len(batch) < self.batch_size:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                records = [record for record in batch if record is not _STOP]
+                try:
+                    if records:
+                        self._commit_batch(connection, records)
+                finally:
+                    for _ in batch:
+                        self._queue.task_done()
+                if len(records) < len(batch):
+                    return
+        finally:
+            connection.close()
+
+    def _commit_batch(self, connection: sqlite3.Connection, records: List[AnalysisRecord]) -> None:
+        """
+        Grava o lote em uma transação; se ela falhar, grava um registro por vez
+        e descarta só os que falharem. Nenhum erro escapa: sem a thread de
+        escrita, `flush()` bloquearia para sempre e `close()` perderia a fila.
+        """
+        try:
+            with connection:
+                changes = [self._write(connection, record) for record in records]
+        except Exception as e:
+            self._terms.rollback(connection)
+            if len(records) > 1:
+                for record in records:
+                    self._commit_batch(connection, [record])
+            else:
+                self.failed += 1
+                print(f"❌ Erro ao gravar a análise {records[0].key}: {e}")
+            return
+        self.written += len(records)
+        self.commits += 1
+        try:
+            self._apply_to_index(changes)
+        except Exception as e:
+            # O índice em memória deixou de refletir o banco: recarregado na próxima consulta
+            with self._analytics_lock:
+                self._analytics = None
+            print(f"⚠️ Erro ao atualizar o índice de análises: {e}")
+
+    def _write(self, connection: sqlite3.Connection, record: AnalysisRecord):
+        """Grava um registro; retorna (id, termos antigos, termos novos) para o índice."""
+        previous = connection.execute(
+            "SELECT id, created_at, keywords, classifications FROM analyses WHERE key = ?",
+            (record.key,)).fetchone()
+        primary = record.classifications[0] if record.classifications else {}
+        keywords = keyword_terms(record.keywords)
+        classes = classification_terms(record.classifications)
+        row = connection.execute(
+            """
+            INSERT INTO analyses (key, created_at, updated_at, kb_fingerprint, primary_type,
+                                  primary_subtype, keywords, classifications, timings, text,
+                                  keyword_bits, class_bits)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(key) DO UPDATE SET
+                updated_at = excluded.updated_at, kb_fingerprint = excluded.kb_fingerprint,
+                primary_type = excluded.primary_type, primary_subtype = excluded.primary_subtype,
+                keywords = excluded.keywords, classifications = excluded.classifications,
+                timings = excluded.timings, text = excluded.text,
+                keyword_bits = excluded.keyword_bits, class_bits = excluded.class_bits
+            RETURNING id, created_at
+            """,
+            (record.key, record.created_at, record.created_at, record.kb_fingerprint,
+             primary.get("violence_type"), primary.get("subtype"),
+             json.dumps(record.keywords, ensure_ascii=False),
+             json.dumps(record.classifications, ensure_ascii=False),
+             json.dumps(record.timings), record.text,
+             self._terms.encode(connection, KEYWORD, keywords),
+             self._terms.encode(connection, CLASSIFICATION, classes)),
+        ).fetchone()
+        analysis_id, created_at = row
+        month = month_of(created_at)
+
+        old_terms: List = []
+        if previous is not None:
+            old_keywords, old_classifications = json.loads(previous[2]), json.loads(previous[3])
+            old_terms = AnalyticsIndex.row_terms(month, keyword_terms(old_keywords),
+                                                 classification_terms(old_classifications))
+            self._update_rollups(connection, month, rollup_keys(old_classifications, old_keywords), -1)
+        self._update_rollups(connection, month, rollup_keys(record.classifications, record.keywords), 1)
+
+        connection.execute("DELETE FROM analysis_types WHERE analysis_id = ?", (analysis_id,))
+        connection.execute("DELETE FROM analysis_keywords WHERE analysis_id = ?", (analysis_id,))
+        connection.executemany(
+            "INSERT INTO analysis_types VALUES (?, ?, ?, ?)",
+            [(analysis_id, entry["violence_type"], entry.get("subtype") or "", created_at)
+             for entry in record.classifications])
+        connection.executemany(
+            "INSERT INTO analysis_keywords VALUES (?, ?, ?, ?)",
+            [(analysis_id, category, keyword, created_at)
+             for category, values in record.keywords.items() for keyword in values])
+        return analysis_id, old_terms, AnalyticsIndex.row_terms(month, keywords, classes)
+
+    @staticmethod
+    def _update_rollups(connection: sqlite3.Connection, month: str,
+                        keys: List[Tuple[str, str]], delta: int) -> None:
+        connection.executemany(
+            """
+            INSERT INTO analysis_rollups VALUES (?, ?, ?, ?)
+            ON CONFLICT(month, violence_type, context) DO UPDATE SET count = count + excluded.count
+            """,
+            [(month, violence_type, context, delta) for violence_type, context in keys])
+
+    def _migrate(self, connection: sqlite3.Connection) -> None:
+        """Acrescenta as colunas de bitmap e preenche bitmaps/rollups de análises antigas."""
+        columns = {row[1] for row in connection.execute("PRAGMA table_info(analyses)")}
+        with connection:
+            for column in BITMAP_COLUMNS:
+                if column not in columns:
+                    connection.execute(f"ALTER TABLE analyses ADD COLUMN {column} BLOB")
+            pending = connection.execute(
+                "SELECT id, created_at, keywords, classifications FROM analyses"
+                " WHERE keyword_bits IS NULL").fetchall()
+            if not pending:
+                return
+            terms = TermBits(connection)
+            for analysis_id, created_at, keywords, classifications in pending:
+                keywords, classifications = json.loads(keywords), json.loads(classifications)
+                connection.execute(
+                    "UPDATE analyses SET keyword_bits = ?, class_bits = ? WHERE id = ?",
+                    (terms.encode(connection, KEYWORD, keyword_terms(keywords)),
+                     terms.encode(connection, CLASSIFICATION, classification_terms(classifications)),
+                     analysis_id))
+                self._update_rollups(connection, month_of(created_at), rollup_keys(classifications, keywords), 1)
+        print(f"🔄 {len(pending)} análise(s) antiga(s) migrada(s) para os bitmaps")
+
+    @property
+    def analytics(self) -> AnalyticsIndex:
+        """
+        Índice invertido para consultas conjuntivas (AnalyticsIndex), carregado
+        das colunas de bitmap na primeira consulta e mantido pela thread de
+        escrita a partir daí.
+        """
+        with self._analytics_lock:
+            if self._analytics is None:
+                self._analytics = self._load_analytics()
+            return self._analytics
+
+    def _load_analytics(self) -> AnalyticsIndex:
+        index = AnalyticsIndex()
+        connection = _connect(self.path)
+        try:
+            names: Dict[str, Dict[int, str]] = {KEYWORD: {}, CLASSIFICATION: {}}
+            for kind, term, bit in connection.execute("SELECT kind, term, bit FROM bitmap_terms"):
+                names.setdefault(kind, {})[bit] = term
+            # Poucas combinações distintas se repetem entre as análises
+            decoded: Dict[Tuple, List] = {}
+            months: Dict[int, str] = {}  # dia (UTC) -> mês
+            rows = connection.execute("SELECT id, created_at, keyword_bits, class_bits FROM analyses")
+            for analysis_id, created_at, keyword_bits, class_bits in rows:
+                day = int(created_at // 86400)
+                month = months.get(day)
+                if month is None:
+                    month = months[day] = month_of(created_at)
+                key = (month, keyword_bits, class_bits)
+                terms = decoded.get(key)
+                if terms is None:
+                    terms = decoded[key] = AnalyticsIndex.row_terms(
+                        key[0], decode_terms(names[KEYWORD], keyword_bits),
+                        decode_terms(names[CLASSIFICATION], class_bits))
+                index.add(analysis_id, terms)
+        finally:
+            connection.close()
+        return index
+
+    def _apply_to_index(self, changes) -> None:
+        # Sob o mesmo lock da carga: um registro gravado durante a carga é
+        # aplicado depois dela (aplicar duas vezes não muda o índice)
+        with self._analytics_lock:
+            if self._analytics is None:
+                return
+            for analysis_id, old_terms, new_terms in changes:
+                if old_terms:
+                    self._analytics.remove(analysis_id, old_terms)
+                self._analytics.add(analysis_id, new_terms)
+
+    def rollup(self, since: Optional[str] = None, until: Optional[str] = None,
+               violence_type: Optional[str] = None, context: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Contagens mantidas por mês × tipo × contexto (meses AAAA-MM,
+        inclusive; contexto "" para análises sem contexto identificado).
+        """
+        conditions, params = [], []
+        for column, operator, value in (("month", ">=", since), ("month", "<=", until),
+                                        ("violence_type", "=", violence_type), ("context", "=", context)):
+            if value is not None:
+                conditions.append(f"{column} {operator} ?")
+                params.append(value)
+        sql = "SELECT month, violence_type, context, count FROM analysis_rollups WHERE count > 0"
+        if conditions:
+            sql += " AND " + " AND ".join(conditions)
+        sql += " ORDER BY month, violence_type, context"
+        connection = self.connect()
+        try:
+            return [dict(row) for row in connection.execute(sql, params)]
+        finally:
+            connection.close()
+
+    def connect(self) -> sqlite3.Connection:
+        """Nova conexão de leitura (uma por thread), com linhas acessíveis por nome."""
+        connection = _connect(self.path)
+        connection.row_factory = sqlite3.Row
+        return connection
+
+    def find(self, violence_type: Optional[str] = None, context: Optional[str] = None,
+             since: Optional[float] = None, until: Optional[float] = None,
+             limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Análises gravadas, das mais recentes para as mais antigas, filtradas
+        por tipo de violência, palavra-chave de contexto e intervalo de
+        `created_at` (timestamps Unix).
+        """
+        sql, params = self._filter("a.*", violence_type, context, since, until)
+        sql += " ORDER BY a.created_at DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        connection = self.connect()
+        try:
+            rows = connection.execute(sql, params).fetchall()
+        finally:
+            connection.close()
+        analyses = []
+        for row in rows:
+            analysis = dict(row)
+            for column in ("keywords", "classifications", "timings"):
+                analysis[column] = json.loads(analysis[column])
+            analyses.append(analysis)
+        return analyses
+
+    def count(self, violence_type: Optional[str] = None, context: Optional[str] = None,
+              since: Optional[float] = None, until: Optional[float] = None) -> int:
+        """Número de análises que atendem aos filtros de `find`."""
+        sql, params = self._filter("COUNT(*)", violence_type, context, since, until)
+        connection = self.connect()
+        try:
+            return connection.execute(sql, params).fetchone()[0]
+        finally:
+            connection.close()
+
+    @staticmethod
+    def _filter(columns: str, violence_type: Optional[str], context: Optional[str],
+                since: Optional[float], until: Optional[float]):
+        # O intervalo de tempo também entra nas subconsultas, que usam os
+        # índices (tipo/palavra-chave, created_at) das tabelas auxiliares
+        period, period_params = "", []
+        if since is not None:
+            period += " AND created_at >= ?"
+            period_params.append(since)
+        if until is not None:
+            period += " AND created_at < ?"
+            period_params.append(until)
+
+        conditions: List[str] = []
+        params: List[Any] = []
+        if violence_type is not None:
+            conditions.append("a.id IN (SELECT analysis_id FROM analysis_types"
+                              f" WHERE violence_type = ?{period})")
+            params += [violence_type, *period_params]
+        if context is not None:
+            conditions.append("a.id IN (SELECT analysis_id FROM analysis_keywords"
+                              f" WHERE category = 'context' AND keyword = ?{period})")
+            params += [context, *period_params]
+        if period:
+            conditions.append(period[len(" AND "):].replace("created_at", "a.created_at"))
+            params += period_params
+        sql = f"SELECT {columns} FROM analyses AS a"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        return sql, params
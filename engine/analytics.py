@@ -0,0 +1,214 @@
+"""
+Consultas agregadas com bitmaps sobre as análises gravadas (AnalysisStore).
+
+Cada análise gravada carrega dois bitmaps (colunas BLOB de `analyses`): um
+sobre o vocabulário de palavras-chave (categoria:palavra-chave, do
+KEYWORDS_DICT) e outro sobre o conjunto de classificações (tipo e
+tipo/subtipo). A posição de cada termo é atribuída na primeira vez em que
+ele aparece e persistida em `bitmap_terms`, então não muda quando a base de
+conhecimento ganha termos novos.
+
+Para as consultas, o AnalyticsIndex mantém em memória o índice invertido:
+um bitmap por termo (e por mês) cujos bits são os ids das análises. Um filtro
+conjuntivo ("microagressoes em sala_aula com relacao_hierarquica entre
+2025-08 e 2025-12") vira AND/OR de inteiros e uma contagem de bits, sem
+percorrer tabelas. O índice é carregado uma vez a partir das colunas de
+bitmap e atualizado pela thread de escrita a cada gravação.
+
+As contagens por tipo × contexto × mês ficam na tabela `analysis_rollups`,
+atualizada na mesma transação de cada gravação.
+"""
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple, Union
+
+KEYWORD = "keyword"
+CLASSIFICATION = "class"
+MONTH = "month"
+
+Term = Tuple[str, str]  # (espécie, termo)
+
+ANALYTICS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS bitmap_terms (
+    kind TEXT NOT NULL,
+    term TEXT NOT NULL,
+    bit INTEGER NOT NULL,
+    PRIMARY KEY (kind, term),
+    UNIQUE (kind, bit)
+);
+CREATE TABLE IF NOT EXISTS analysis_rollups (
+    month TEXT NOT NULL,
+    violence_type TEXT NOT NULL,
+    context TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (month, violence_type, context)
+);
+"""
+
+# Colunas de bitmap acrescentadas à tabela analyses (bancos antigos são migrados)
+BITMAP_COLUMNS = ("keyword_bits", "class_bits")
+
+
+def month_of(timestamp: float) -> str:
+    """Mês (UTC) no formato AAAA-MM."""
+    return time.strftime("%Y-%m", time.gmtime(timestamp))
+
+
+def keyword_terms(keywords: Mapping[str, Iterable[str]]) -> List[str]:
+    return [f"{category}:{keyword}" for category, values in keywords.items() for keyword in values]
+
+
+def classification_terms(classifications: Iterable[Mapping[str, str]]) -> List[str]:
+    terms: List[str] = []
+    for entry in classifications:
+        for term in (entry["violence_type"], f"{entry['violence_type']}/{entry.get('subtype') or ''}"):
+            if term not in terms:
+                terms.append(term)
+    return terms
+
+
+def rollup_keys(classifications: Iterable[Mapping[str, str]],
+                keywords: Mapping[str, Iterable[str]]) -> List[Tuple[str, str]]:
+    """Pares (tipo, contexto) com que uma análise contribui para os rollups."""
+    types = list(dict.fromkeys(entry["violence_type"] for entry in classifications))
+    contexts = list(keywords.get("context") or ()) or [""]
+    return [(violence_type, context) for violence_type in types for context in contexts]
+
+
+class TermBits:
+    """
+    Posições de bit estáveis por termo, persistidas em `bitmap_terms` (só
+    crescem). Usado apenas pela thread de escrita.
+    """
+
+    def __init__(self, connection: sqlite3.Connection):
+        self._bits: Dict[Term, int] = {}
+        self._next: Dict[str, int] = {}
+        for kind, term, bit in connection.execute("SELECT kind, term, bit FROM bitmap_terms"):
+            self._bits[kind, term] = bit
+            self._next[kind] = max(self._next.get(kind, 0), bit + 1)
+
+    def encode(self, connection: sqlite3.Connection, kind: str, terms: Iterable[str]) -> bytes:
+        bits = 0
+        for term in terms:
+            bit = self._bits.get((kind, term))
+            if bit is None:
+                bit = self._next.get(kind, 0)
+                connection.execute("INSERT INTO bitmap_terms VALUES (?, ?, ?)", (kind, term, bit))
+                self._bits[kind, term] = bit
+                self._next[kind] = bit + 1
+            bits |= 1 << bit
+        return bits.to_bytes((bits.bit_length() + 7) // 8, "little")
+
+    def rollback(self, connection: sqlite3.Connection) -> None:
+        """Descarta termos atribuídos em uma transação desfeita."""
+        self.__init__(connection)
+
+
+def decode_terms(names: Mapping[int, str], blob: Optional[bytes]) -> List[str]:
+    """Termos de um bitmap gravado, dado o mapa bit -> termo da espécie."""
+    bits = int.from_bytes(blob or b"", "little")
+    terms = []
+    while bits:
+        low = bits & -bits
+        terms.append(names[low.bit_length() - 1])
+        bits ^= low
+    return terms
+
+
+class AnalyticsIndex:
+    """
+    Índice invertido em memória: um bitmap (bytearray, bit = id da análise)
+    por termo de palavra-chave, de classificação e por mês.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._postings: Dict[Term, bytearray] = {}
+        self._all = bytearray()
+
+    @staticmethod
+    def _set(bitmap: bytearray, position: int) -> None:
+        index = position >> 3
+        if index >= len(bitmap):
+            bitmap.extend(bytes(index + 1 - len(bitmap)))
+        bitmap[index] |= 1 << (position & 7)
+
+    @staticmethod
+    def _clear(bitmap: bytearray, position: int) -> None:
+        index = position >> 3
+        if index < len(bitmap):
+            bitmap[index] &= ~(1 << (position & 7)) & 0xFF
+
+    def add(self, row_id: int, terms: Iterable[Term]) -> None:
+        """Marca a análise `row_id` em cada termo (idempotente)."""
+        with self._lock:
+            self._set(self._all, row_id)
+            for term in terms:
+                bitmap = self._postings.get(term)
+                if bitmap is None:
+                    bitmap = self._postings[term] = bytearray()
+                self._set(bitmap, row_id)
+
+    def remove(self, row_id: int, terms: Iterable[Term]) -> None:
+        """Desmarca a análise `row_id` dos termos (ex.: antes de regravar uma sessão)."""
+        with self._lock:
+            self._clear(self._all, row_id)
+            for term in terms:
+                bitmap = self._postings.get(term)
+                if bitmap is not None:
+                    self._clear(bitmap, row_id)
+
+    def _bitmap(self, term: Term) -> int:
+        return int.from_bytes(self._postings.get(term, b""), "little")
+
+    def select(self, violence_type: Optional[str] = None, subtype: Optional[str] = None,
+               since: Optional[str] = None, until: Optional[str] = None,
+               **keywords: Union[str, Sequence[str]]) -> int:
+        """
+        Bitmap (int) das análises que atendem a todos os filtros:
+        - violence_type / subtype: classificação obtida (o subtipo só tem
+          sentido dentro de um tipo: sem `violence_type`, levanta ValueError);
+        - since / until: meses AAAA-MM, inclusive;
+        - categoria=palavra-chave (ex.: context="sala_aula"); uma sequência
+          de palavras-chave casa com qualquer uma delas.
+        """
+        if subtype is not None and violence_type is None:
+            raise ValueError(f"Filtro por subtipo ({subtype}) exige violence_type")
+        with self._lock:
+            result = int.from_bytes(self._all, "little")
+            if violence_type is not None:
+                term = violence_type if subtype is None else f"{violence_type}/{subtype}"
+                result &= self._bitmap((CLASSIFICATION, term))
+            for category, values in keywords.items():
+                values = [values] if isinstance(values, str) else values
+                alternatives = 0
+                for value in values:
+                    alternatives |= self._bitmap((KEYWORD, f"{category}:{value}"))
+                result &= alternatives
+            if since is not None or until is not None:
+                months = 0
+                for (kind, month), bitmap in self._postings.items():
+                    if kind == MONTH and (since is None or month >= since) and (until is None or month <= until):
+                        months |= int.from_bytes(bitmap, "little")
+                result &= months
+        return result
+
+    def count(self, **filters) -> int:
+        """Número de análises que atendem aos filtros de `select`."""
+        return self.select(**filters).bit_count()
+
+    def ids(self, **filters) -> Iterator[int]:
+        """Ids (analyses.id) das análises que atendem aos filtros de `select`, em ordem."""
+        bits = self.select(**filters)
+        for index, byte in enumerate(bits.to_bytes((bits.bit_length() + 7) // 8, "little")):
+            while byte:
+                low = byte & -byte
+                yield index * 8 + low.bit_length() - 1
+                byte ^= low
+
+    @staticmethod
+    def row_terms(month: str, keywords: Iterable[str], classifications: Iterable[str]) -> List[Term]:
+        return ([(MONTH, month)] + [(KEYWORD, term) for term in keywords]
+                + [(CLASSIFICATION, term) for term in classifications])
@@ -0,0 +1,438 @@
+"""
+Classificação de relatos em lote pela linha de comando.
+
+    python -m engine.batch relatos.jsonl -o resultados.jsonl
+    cat relatos.csv | python -m engine.batch --format csv --order completion > resultados.jsonl
+    python -m engine.batch relatos.jsonl -o resultados.jsonl --resume
+    python -m engine.batch relatos.jsonl -o resultados.jsonl --workers 8
+
+A entrada é JSONL (um objeto por linha com "text" ou "relato" e, opcionalmente,
+"id"; ou uma string JSON) ou CSV com cabeçalho, lida em fluxo de um arquivo ou
+da entrada padrão. As extrações (Groq) rodam concorrentes em um pool de threads,
+dentro de uma janela limitada de relatos em andamento; a classificação de cada
+relato acontece assim que sua extração termina, em paralelo com as extrações
+seguintes: no processo principal ou, com `--workers N`, em blocos distribuídos
+entre N processos pré-aquecidos (engine.process_pool). Os resultados saem em
+JSONL, na ordem da entrada ou na ordem em que ficam prontos.
+
+O checkpoint (JSONL, só acrescentado) guarda a resposta validada do LLM de cada
+relato e marca os relatos cujo resultado já foi escrito. Ao retomar com
+`--resume`, os relatos concluídos são pulados e os que já tinham resposta são
+classificados sem nova chamada ao LLM. A saída é gravada antes da marca de
+concluído, então uma interrupção brusca pode repetir (nunca perder) alguns
+resultados; cada linha traz "index" para deduplicação.
+
+Ao final, um resumo com vazão e percentis de latência é impresso na saída de erro.
+"""
+import argparse
+import contextlib
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, IO, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+from utils.timing import LatencyHistogram, StageTimer
+from knowledge_base.reloadable import KnowledgeBaseVersion, get_knowledge_base
+from .rules.explanation_system import LazyExplanation
+
+TEXT_FIELDS = ("text", "relato")
+
+
+class BatchItem(NamedTuple):
+    """Relato lido da entrada: posição (0, 1, ...), id informado e texto."""
+    index: int
+    id: Any
+    text: str
+
+
+class BatchSummary(NamedTuple):
+    processed: int
+    skipped: int      # já concluídos em uma execução anterior (checkpoint)
+    llm_calls: int
+    reused: int       # classificados com a resposta do LLM guardada no checkpoint
+    elapsed: float    # segundos
+    latency: Dict[str, Dict[str, float]]
+
+    @property
+    def throughput(self) -> float:
+        """Relatos processados por segundo."""
+        return self.processed / self.elapsed if self.elapsed > 0 else 0.0
+
+    def format(self) -> str:
+        lines = [f"📊 {self.processed} relato(s) em {self.elapsed:.1f}s ({self.throughput:.1f}/s); "
+                 f"{self.llm_calls} chamada(s) ao LLM, {self.reused} resposta(s) do checkpoint, "
+                 f"{self.skipped} pulado(s)"]
+        for stage, stats in self.latency.items():
+            lines.append(f"   {stage}: p50={stats['p50']:.1f}ms p95={stats['p95']:.1f}ms p99={stats['p99']:.1f}ms")
+        return "\n".join(lines)
+
+
+def read_items(stream: IO[str], fmt: str = "jsonl", text_field: Optional[str] = None,
+               id_field: str = "id") -> Iterator[BatchItem]:
+    """
+    Lê os relatos em fluxo. Sem `text_field`, usa o primeiro campo de
+    TEXT_FIELDS presente. Linhas vazias (JSONL) são ignoradas sem ocupar índice.
+    """
+    if fmt == "csv":
+        rows: Iterable[Any] = csv.DictReader(stream)
+    else:
+        rows = (json.loads(line) for line in stream if line.strip())
+    for index, row in enumerate(rows):
+        if isinstance(row, str):
+            yield BatchItem(index, index, row)
+            continue
+        field = text_field or next((name for name in TEXT_FIELDS if name in row), None)
+        if field is None or row.get(field) is None:
+            raise ValueError(f"Relato {index} sem o campo de texto ({text_field or '/'.join(TEXT_FIELDS)})")
+        row_id = row.get(id_field)
+        yield BatchItem(index, index if row_id in (None, "") else row_id, row[field])
+
+
+def to_jsonable(value: Any) -> Any:
+    """
+    Converte um resultado de análise em tipos JSON: registros de explicação
+    (NamedTuple) viram objetos e explicações preguiçosas viram listas de texto.
+    """
+    if isinstance(value, dict):
+        return {key: to_jsonable(item) for key, item in value.items()}
+    if hasattr(value, "_asdict"):
+        return to_jsonable(value._asdict())
+    if isinstance(value, (list, tuple, LazyExplanation)):
+        return [to_jsonable(item) for item in value]
+    return value
+
+
+def _drop_partial_line(path: str) -> None:
+    """Remove a última linha da saída se ela foi truncada por uma interrupção."""
+    if not os.path.exists(path):
+        return
+    with open(path, "rb+") as file:
+        size = file.seek(0, os.SEEK_END)
+        position = size
+        while position > 0:
+            step = min(4096, position)
+            file.seek(position - step)
+            chunk = file.read(step)
+            newline = chunk.rfind(b"\n")
+            if newline >= 0:
+                position = position - step + newline + 1
+                break
+            position -= step
+        if position < size:
+            file.truncate(position)
+
+
+class Checkpoint:
+    """
+    Progresso de um lote em um arquivo JSONL só acrescentado: linhas
+    {"index": i, "response": ...} (resposta do LLM) e {"index": i, "done": true}
+    (resultado escrito). Uma última linha truncada por interrupção é descartada.
+
+    As linhas ficam em memória e só vão para o arquivo em `flush()`, que o
+    BatchRunner chama depois de tornar a saída durável: uma marca de
+    concluído nunca chega ao disco antes do resultado que ela descreve.
+    """
+
+    def __init__(self, path: str, resume: bool = False, flush_every: int = 100):
+        self.path = path
+        self.flush_every = flush_every
+        self.done: Set[int] = set()
+        self.responses: Dict[int, Dict[str, Any]] = {}
+        if resume and os.path.exists(path):
+            _drop_partial_line(path)
+            self._load()
+        self._file = open(path, "a" if resume else "w", encoding="utf-8")
+        self._pending: List[str] = []
+
+    def _load(self) -> None:
+        with open(self.path, encoding="utf-8") as file:
+            for line in file:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if entry.get("done"):
+                    self.done.add(entry["index"])
+                    self.responses.pop(entry["index"], None)
+                elif "response" in entry and entry["index"] not in self.done:
+                    self.responses[entry["index"]] = entry["response"]
+
+    def _write(self, entry: Dict[str, Any]) -> None:
+        self._pending.append(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def record_response(self, index: int, response: Dict[str, Any]) -> None:
+        self._write({"index": index, "response": response})
+
+    def record_done(self, index: int) -> None:
+        self.responses.pop(index, None)
+        self._write({"index": index, "done": True})
+
+    def due(self) -> bool:
+        """Se já há marcas suficientes para gravar (ver BatchRunner._emit)."""
+        return len(self._pending) >= self.flush_every
+
+    def flush(self) -> None:
+        """Grava as linhas pendentes; a saída que elas descrevem já deve estar durável."""
+        self._file.writelines(self._pending)
+        self._file.flush()
+        self._pending.clear()
+
+    def close(self) -> None:
+        self.flush()
+        self._file.close()
+
+
+class _Extracted(NamedTuple):
+    """Relato extraído aguardando classificação."""
+    sequence: int     # ordem de submissão (a ordem de entrada pula os concluídos)
+    item: BatchItem
+    submitted: float
+    response: Dict[str, Any]
+    timer: StageTimer
+
+
+class BatchRunner:
+    """
+    Executa o lote: extrações concorrentes (até `concurrency` chamadas ao
+    LLM, no máximo `window` relatos em andamento) e classificação de cada
+    relato assim que sua extração termina. Toda a execução usa a mesma
+    versão da base de conhecimento.
+
+    Com `workers` > 0 a classificação vai para um ProcessPoolClassifier:
+    os relatos extraídos são despachados em blocos de até `chunk_size` (um
+    bloco menor sai quando há worker ocioso) e cada bloco é emitido assim
+    que volta. Com `workers` = 0 ela roda no processo principal.
+    """
+
+    def __init__(self, system, concurrency: int = 8, order: str = "input",
+                 checkpoint: Optional[Checkpoint] = None, window: Optional[int] = None,
+                 include_timings: bool = False, max_results: Optional[int] = None,
+                 stop_after_severity: Optional[int] = None, latency_window: int = 100000,
+                 workers: int = 0, chunk_size: int = 32):
+        if order not in ("input", "completion"):
+            raise ValueError(f"Ordem desconhecida: {order}")
+        self.system = system
+        self.concurrency = concurrency
+        self.order = order
+        self.checkpoint = checkpoint
+        self.window = window or max(concurrency * 4, 2 * workers * chunk_size)
+        self.include_timings = include_timings
+        self.max_results = max_results
+        self.stop_after_severity = stop_after_severity
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.latency = LatencyHistogram(window=latency_window)
+
+    def run(self, items: Iterable[BatchItem], emit: Callable[[Dict[str, Any]], None],
+            flush: Optional[Callable[[], None]] = None) -> BatchSummary:
+        """
+        Processa os relatos chamando `emit` com o resultado (JSON) de cada um.
+        `flush` deve tornar durável o que já foi emitido; é chamado antes de
+        cada gravação do checkpoint.
+        """
+        self._emit_record, self._flush_output = emit, flush or (lambda: None)
+        self._processed = self._skipped = self._llm_calls = self._reused = 0
+        self._next_sequence = 0
+        self._ready: Dict[int, Dict[str, Any]] = {}
+        self._extracting: Dict[Future, Tuple[int, BatchItem, float]] = {}
+        self._extracted: List[_Extracted] = []
+        self._classifying: Dict[Future, List[_Extracted]] = {}
+        self._classifying_rows = 0
+        start = time.perf_counter()
+        sequence = 0
+        with get_knowledge_base().current().pinned() as version, \
+                ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="batch") as executor, \
+                self._open_pool(version) as pool:
+            try:
+                for item in items:
+                    if self.checkpoint is not None and item.index in self.checkpoint.done:
+                        self._skipped += 1
+                        continue
+                    self._extracting[self._extract(executor, version, item)] = (sequence, item, time.perf_counter())
+                    sequence += 1
+                    while self._in_flight() >= self.window:
+                        self._step(pool)
+                while self._extracting or self._extracted or self._classifying:
+                    self._step(pool)
+            finally:
+                for future in list(self._extracting) + list(self._classifying):
+                    future.cancel()
+                self._flush()
+        return BatchSummary(self._processed, self._skipped, self._llm_calls, self._reused,
+                            time.perf_counter() - start, self.latency.summary())
+
+    def _open_pool(self, version: KnowledgeBaseVersion):
+        if self.workers <= 0:
+            return contextlib.nullcontext()
+        from .process_pool import ClassifyOptions, ProcessPoolClassifier
+        options = ClassifyOptions(self.system.engine.render_explanations, self.max_results,
+                                  self.stop_after_severity, version.fingerprint)
+        return ProcessPoolClassifier(self.workers, chunk_size=self.chunk_size, options=options)
+
+    def _in_flight(self) -> int:
+        return len(self._extracting) + len(self._extracted) + self._classifying_rows + len(self._ready)
+
+    def _step(self, pool) -> None:
+        """Despacha os relatos extraídos, se for a hora, e trata o que terminar primeiro."""
+        if self._extracted and (pool is None or len(self._extracted) >= pool.chunk_size
+                                or len(self._classifying) < pool.workers or not self._extracting):
+            self._dispatch(pool)
+        futures = list(self._extracting) + list(self._classifying)
+        if not futures:
+            return
+        for future in wait(futures, return_when=FIRST_COMPLETED).done:
+            if future in self._extracting:
+                self._extracted.append(self._extraction_done(future))
+            else:
+                rows = self._classifying.pop(future)
+                self._classifying_rows -= len(rows)
+                for row, (_, results) in zip(rows, future.result()):
+                    self._finish(row, results)
+
+    def _extract(self, executor: ThreadPoolExecutor, version: KnowledgeBaseVersion,
+                 item: BatchItem) -> Future:
+        timer = StageTimer()
+        response = self.checkpoint.responses.get(item.index) if self.checkpoint is not None else None
+        if response is not None:
+            future: Future = Future()
+            future.set_result((response, timer, True))
+            return future
+        return executor.submit(self._extract_pinned, version, item.text, timer)
+
+    def _extract_pinned(self, version: KnowledgeBaseVersion, text: str,
+                        timer: StageTimer) -> Tuple[Dict[str, Any], StageTimer, bool]:
+        with version.pinned(), timer.span("extraction"):
+            response = self.system.text_processor.extract_keywords(text, timer=timer, ask_questions=False)
+        return response, timer, False
+
+    def _extraction_done(self, future: Future) -> _Extracted:
+        sequence, item, submitted = self._extracting.pop(future)
+        response, timer, reused = future.result()
+        if reused:
+            self._reused += 1
+        else:
+            self._llm_calls += 1
+            # Respostas vazias podem ser o fallback de uma falha do Groq: não são reaproveitadas
+            if self.checkpoint is not None and response.get("identified_keywords"):
+                self.checkpoint.record_response(item.index, response)
+        return _Extracted(sequence, item, submitted, response, timer)
+
+    def _dispatch(self, pool) -> None:
+        rows, self._extracted = self._extracted, []
+        if pool is None:
+            for row in rows:
+                self._finish(row, self.system.analyze_response(
+                    row.item.text, row.response, include_timings=True,
+                    max_results=self.max_results, stop_after_severity=self.stop_after_severity))
+            return
+        for offset in range(0, len(rows), pool.chunk_size):
+            chunk = rows[offset:offset + pool.chunk_size]
+            future = pool.submit([(row.sequence, row.item.text, row.response) for row in chunk])
+            self._classifying[future] = chunk
+            self._classifying_rows += len(chunk)
+
+    def _finish(self, row: _Extracted, results: Dict[str, Any]) -> None:
+        timings = results.pop("timings")
+        row_ms = (time.perf_counter() - row.submitted) * 1000.0
+        extraction = row.timer.spans
+        self.latency.record({"classification": timings["total"], "row": row_ms,
+                             **({"extraction": extraction["extraction"]} if "extraction" in extraction else {})})
+        record = {"index": row.item.index, "id": row.item.id,
+                  "keywords": row.response.get("identified_keywords", {}), **to_jsonable(results)}
+        if self.include_timings:
+            record["timings"] = {**{stage: round(ms, 3) for stage, ms in extraction.items()},
+                                 **{stage: ms for stage, ms in timings.items() if stage != "total"},
+                                 "classification": timings["total"], "total": round(row_ms, 3)}
+        if self.order == "completion":
+            self._emit(record)
+            return
+        self._ready[row.sequence] = record
+        while self._next_sequence in self._ready:
+            self._emit(self._ready.pop(self._next_sequence))
+            self._next_sequence += 1
+
+    def _emit(self, record: Dict[str, Any]) -> None:
+        self._emit_record(record)
+        self._processed += 1
+        if self.checkpoint is not None:
+            self.checkpoint.record_done(record["index"])
+            if self.checkpoint.due():
+                self._flush()
+
+    def _flush(self) -> None:
+        # A saída fica durável antes das marcas de concluído que a descrevem
+        self._flush_output()
+        if self.checkpoint is not None:
+            self.checkpoint.flush()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Classificação de relatos em lote (JSONL/CSV -> JSONL)")
+    parser.add_argument("input", nargs="?", default="-", help="arquivo de entrada ('-' = entrada padrão)")
+    parser.add_argument("-o", "--output", default="-", help="arquivo de saída JSONL ('-' = saída padrão)")
+    parser.add_argument("--format", choices=["jsonl", "csv"], default=None,
+                        help="formato da entrada (padrão: pela extensão; jsonl na entrada padrão)")
+    parser.add_argument("--text-field", default=None, help="campo com o relato (padrão: text ou relato)")
+    parser.add_argument("--id-field", default="id", help="campo com o id do relato")
+    parser.add_argument("--order", choices=["input", "completion"], default="input",
+                        help="ordem dos resultados na saída")
+    parser.add_argument("--concurrency", type=int, default=8, help="chamadas simultâneas ao LLM")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="processos de classificação (0 = no processo principal)")
+    parser.add_argument("--chunk-size", type=int, default=32, help="relatos por bloco enviado a um processo")
+    parser.add_argument("--window", type=int, default=None,
+                        help="máximo de relatos em andamento (padrão: o maior entre 4 x concorrência "
+                             "e 2 x workers x chunk-size)")
+    parser.add_argument("--checkpoint", default=None,
+                        help="arquivo de checkpoint (padrão: <saída>.checkpoint quando a saída é um arquivo)")
+    parser.add_argument("--resume", action="store_true", help="retoma a partir do checkpoint")
+    parser.add_argument("--explanations", action="store_true", help="inclui o texto das explicações")
+    parser.add_argument("--timings", action="store_true", help="inclui a duração das etapas em cada resultado")
+    parser.add_argument("--max-results", type=int, default=None, help="triagem: classificações mais graves")
+    parser.add_argument("--stop-after-severity", type=int, default=None,
+                        help="triagem: gravidade mínima")
+    parser.add_argument("--verbose", action="store_true", help="mostra o log do motor na saída de erro")
+    args = parser.parse_args(argv)
+
+    fmt = args.format or ("csv" if args.input.lower().endswith(".csv") else "jsonl")
+    checkpoint_path = args.checkpoint or (None if args.output == "-" else args.output + ".checkpoint")
+    if args.resume and checkpoint_path is None:
+        parser.error("--resume exige --checkpoint quando a saída é a saída padrão")
+
+    if args.resume and args.output != "-":
+        _drop_partial_line(args.output)
+    output = sys.stdout if args.output == "-" else open(args.output, "a" if args.resume else "w",
+                                                        encoding="utf-8")
+    source = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8", newline="")
+    checkpoint = Checkpoint(checkpoint_path, resume=args.resume) if checkpoint_path else None
+    # O motor registra seu progresso com print: fora da saída, que é o JSONL
+    log = sys.stderr if args.verbose else open(os.devnull, "w")
+    try:
+        with contextlib.redirect_stdout(log):
+            from .expert_system import ExpertSystem
+            system = ExpertSystem(render_explanations=args.explanations)
+            runner = BatchRunner(system, concurrency=args.concurrency, order=args.order,
+                                 checkpoint=checkpoint, window=args.window, include_timings=args.timings,
+                                 max_results=args.max_results, stop_after_severity=args.stop_after_severity,
+                                 workers=args.workers, chunk_size=args.chunk_size)
+            summary = runner.run(read_items(source, fmt, args.text_field, args.id_field),
+                                 lambda record: output.write(json.dumps(record, ensure_ascii=False) + "\n"),
+                                 flush=output.flush)
+    except KeyboardInterrupt:
+        print("⏹️  Interrompido: use --resume para continuar do checkpoint", file=sys.stderr)
+        return 130
+    finally:
+        for stream in (source, output, log):
+            if stream not in (sys.stdin, sys.stdout, sys.stderr):
+                stream.close()
+        if checkpoint is not None:
+            checkpoint.close()
+    print(summary.format(), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,63 @@
+from collections import deque
+from typing import Dict, Iterable, List, Mapping, Optional
+
+
+class ConversationContext:
+    """
+    Contexto de conversa com memória limitada.
+
+    Guarda no máximo `max_messages` mensagens (buffer circular), cada uma
+    truncada em `max_chars` caracteres. Com `digest=True`, as mensagens que
+    saem do buffer não são perdidas por completo: suas palavras-chave são
+    acumuladas em um resumo, limitado pelo vocabulário da base de
+    conhecimento, junto com a contagem de mensagens descartadas.
+    """
+
+    def __init__(self, max_messages: int = 8, max_chars: int = 2000, digest: bool = True):
+        self.max_messages = max_messages
+        self.max_chars = max_chars
+        self.keep_digest = digest
+        self._messages: deque = deque()
+        self._digest: Dict[str, List[str]] = {}
+        self.dropped = 0
+
+    def append(self, content: str, role: str = "user",
+               keywords: Optional[Mapping[str, Iterable[str]]] = None) -> None:
+        """Adiciona uma mensagem, descartando a mais antiga se o buffer estiver cheio."""
+        while self._messages and len(self._messages) >= self.max_messages:
+            self._evict()
+        self._messages.append({
+            "role": role,
+            "content": content[:self.max_chars],
+            "keywords": {category: list(values) for category, values in (keywords or {}).items() if values},
+        })
+
+    def _evict(self) -> None:
+        message = self._messages.popleft()
+        self.dropped += 1
+        if self.keep_digest:
+            for category, values in message["keywords"].items():
+                known = self._digest.setdefault(category, [])
+                known.extend(value for value in values if value not in known)
+
+    def messages(self) -> List[Dict[str, str]]:
+        """Mensagens retidas, da mais antiga para a mais recente (formato role/content)."""
+        return [{"role": message["role"], "content": message["content"]} for message in self._messages]
+
+    def digest(self) -> Optional[str]:
+        """Resumo das mensagens descartadas, ou None se nada foi descartado."""
+        if not self.dropped:
+            return None
+        summary = f"{self.dropped} mensagem(ns) anterior(es) resumida(s)"
+        if self._digest:
+            summary += ": " + "; ".join(f"{category}: {', '.join(values)}"
+                                        for category, values in self._digest.items())
+        return summary
+
+    def clear(self) -> None:
+        self._messages.clear()
+        self._digest = {}
+        self.dropped = 0
+
+    def __len__(self) -> int:
+        return len(self._messages)
@@ -1,72 +1,369 @@
-from typing import Dict, Any
-from .rules import ViolenceRules
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Dict, Any, Callable, Iterator, NamedTuple, Optional, Tuple
+from experta.utils import unfreeze
+from .rules import TriageViolenceRules, ViolenceRules
 from .text_processor import TextProcessor
-from .facts import AnalysisResult, ViolenceClassification
+from .local_extractor import LocalKeywordExtractor
+from .analysis_store import AnalysisStore
+from .facts import AnalysisResult, KeywordFact, ViolenceClassification
+from utils.timing import StageTimer, LatencyHistogram
+from utils.profiling import ProfileCapture
+from knowledge_base.reloadable import KnowledgeBaseVersion, current_version, get_knowledge_base
+
+class AnalysisEvent(NamedTuple):
+    """
+    Evento de ExpertSystem.analyze_text_iter.
+
+    kind: "keywords" (palavras-chave extraídas, por categoria),
+    "classification" (entrada de uma classificação assim que a regra
+    dispara, ainda sem pontuação) ou "result" (resultado consolidado,
+    igual ao de analyze_text).
+    """
+    kind: str
+    data: Dict[str, Any]
+
 
 class ExpertSystem:
     """Sistema especialista que conecta processador de texto e motor de regras."""
     
-    def __init__(self, api_key=None):
-        """Inicializa o sistema com processador de texto e motor de regras."""
-        self.text_processor = TextProcessor(api_key=api_key)
-        self.engine = ViolenceRules()
+    def __init__(self, api_key=None, latency_window: int = 1000, render_explanations: bool = True,
+                 context_size: int = 8, store: Optional[AnalysisStore] = None):
+        """
+        Inicializa o sistema com processador de texto e motor de regras.
+        
+        Args:
+            render_explanations: Se False (lote/headless), os resultados trazem
+                apenas "explanation_record", sem gerar o texto das explicações
+            context_size: Máximo de mensagens mantidas no contexto de conversa
+                (do processador e de cada sessão)
+            store: Se fornecido, cada análise concluída (e cada etapa das
+                sessões) é gravada nele em segundo plano
+        """
+        self.context_size = context_size
+        self.store = store
+        self.text_processor = TextProcessor(api_key=api_key, context_size=context_size)
+        self.engine = ViolenceRules(render_explanations=render_explanations)
+        self.latency = LatencyHistogram(window=latency_window)
+        self.profiler: Optional[ProfileCapture] = None
+        self._triage_engine: Optional[TriageViolenceRules] = None
+        # Modo degradado (latency_budget): chamadas ao LLM em segundo plano e
+        # motores próprios para o refinamento, fora da thread do chamador
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+        self._refinement_engines: Dict[bool, ViolenceRules] = {}
+        self._refinement_lock = threading.Lock()
+        self._local_extractor: Optional[Tuple[str, LocalKeywordExtractor]] = None
     
-    def analyze_text(self, text: str) -> Dict[str, Any]:
+    def analyze_text(self, text: str, include_timings: bool = False,
+                     max_results: Optional[int] = None,
+                     stop_after_severity: Optional[int] = None,
+                     latency_budget: Optional[float] = None,
+                     on_refined: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
         """
         Analisa um texto livre e retorna resultados estruturados.
+        
+        Args:
+            text: Relato do usuário
+            include_timings: Se True, adiciona ao resultado o campo "timings"
+                com a duração (ms) de cada etapa do pipeline
+            max_results: Triagem: para após as `max_results` classificações
+                mais graves (regras disparadas por ordem de gravidade)
+            stop_after_severity: Triagem: não dispara regras cujo alvo tenha
+                gravidade (severity_score) menor que este valor
+            latency_budget: Tempo máximo (s) de espera pelo Groq. Se o LLM não
+                responder a tempo, retorna uma análise provisória feita com a
+                extração local, com "provisional": True e "refinement": um
+                Future com o resultado refinado, calculado em segundo plano
+                quando o LLM responder
+            on_refined: Chamado (em outra thread) com o resultado refinado de
+                uma análise provisória
+        
+        Sem as opções de triagem, todas as regras disparam (modo completo).
+        """
+        if self.profiler is not None and self.profiler.should_capture(text):
+            return self.profiler.capture(self._analyze_text, text, include_timings,
+                                         max_results, stop_after_severity, latency_budget, on_refined)
+        return self._analyze_text(text, include_timings, max_results, stop_after_severity,
+                                  latency_budget, on_refined)
+
+    def analyze_response(self, text: str, response: Dict[str, Any], include_timings: bool = False,
+                         max_results: Optional[int] = None,
+                         stop_after_severity: Optional[int] = None,
+                         timer: Optional[StageTimer] = None) -> Dict[str, Any]:
+        """
+        Analisa um texto cujas palavras-chave já foram extraídas (resposta
+        validada do Groq, p. ex. guardada em um checkpoint do lote), sem
+        chamar o LLM. As opções de triagem são as de `analyze_text`; o
+        `timer`, se fornecido, já pode conter as etapas da extração.
+        """
+        with current_version().pinned():
+            return self._run_pipeline(text, include_timings, max_results, stop_after_severity,
+                                      response=response, timer=timer)
+
+    def analyze_text_iter(self, text: str, include_timings: bool = False,
+                          max_results: Optional[int] = None,
+                          stop_after_severity: Optional[int] = None) -> Iterator[AnalysisEvent]:
+        """
+        Analisa um texto produzindo eventos (AnalysisEvent) à medida que
+        acontecem: palavras-chave extraídas, cada classificação quando sua
+        regra dispara e, por último, o resultado consolidado.
+        As opções de triagem são as de `analyze_text`.
+
+        A versão da base de conhecimento é a do início da análise; ela é
+        fixada apenas durante cada passo, sem vazar para o consumidor.
+        """
+        version = get_knowledge_base().current()
+        events = self._pipeline_events(text, include_timings, max_results, stop_after_severity)
+        while True:
+            with version.pinned():
+                event = next(events, None)
+            if event is None:
+                return
+            yield event
+
+    def enable_profiling(self, output_dir: str, next_n: int = 0,
+                         predicate: Optional[Callable[[str], bool]] = None,
+                         max_captures: int = 20) -> ProfileCapture:
+        """
+        Habilita a captura de perfis cProfile de `analyze_text`.
+        
+        Args:
+            output_dir: Diretório onde os arquivos .pstats/.collapsed serão gravados
+            next_n: Número de próximas análises a perfilar
+            predicate: Função que recebe o texto e indica se a análise deve ser perfilada
+            max_captures: Número máximo de capturas mantidas no diretório
+        """
+        self.profiler = ProfileCapture(output_dir, max_captures=max_captures)
+        self.profiler.enable_next(next_n)
+        self.profiler.enable_when(predicate)
+        return self.profiler
+
+    def disable_profiling(self) -> None:
+        """Desabilita a captura de perfis."""
+        self.profiler = None
+
+    def _analyze_text(self, text: str, include_timings: bool,
+                      max_results: Optional[int] = None,
+                      stop_after_severity: Optional[int] = None,
+                      latency_budget: Optional[float] = None,
+                      on_refined: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        """
+        Executa o pipeline completo de análise sobre a versão atual da base de
+        conhecimento; a versão fica fixada até o fim, mesmo que haja recarga.
+        """
+        with get_knowledge_base().current().pinned() as version:
+            if latency_budget is None:
+                return self._run_pipeline(text, include_timings, max_results, stop_after_severity)
+            return self._run_with_budget(version, text, include_timings, max_results, stop_after_severity,
+                                         latency_budget, on_refined)
+
+    def _run_with_budget(self, version: KnowledgeBaseVersion, text: str, include_timings: bool,
+                         max_results: Optional[int], stop_after_severity: Optional[int],
+                         latency_budget: float,
+                         on_refined: Optional[Callable[[Dict[str, Any]], None]]) -> Dict[str, Any]:
         """
+        Aguarda o Groq por até `latency_budget` segundos. Se ele não
+        responder, analisa com a extração local e deixa o refinamento para
+        quando a resposta chegar.
+        """
+        timer = StageTimer()
+        llm = self._get_executor().submit(self._extract_keywords_pinned, version, text, timer)
+        try:
+            response = llm.result(timeout=latency_budget)
+        except FutureTimeout:
+            pass
+        else:
+            return self._run_pipeline(text, include_timings, max_results, stop_after_severity,
+                                      response=response, timer=timer)
+
+        print(f"⏳ Groq sem resposta em {latency_budget}s: análise provisória com extração local")
+        local_timer = StageTimer()
+        with local_timer.span("local_extraction"):
+            response = self._get_local_extractor(version).extract(text)
+        # Só o resultado refinado é gravado no store
+        results = self._run_pipeline(text, include_timings, max_results, stop_after_severity,
+                                     response=response, timer=local_timer, record=False)
+        results["provisional"] = True
+        results["refinement"] = self._refine_later(llm, version, text, include_timings, max_results,
+                                                   stop_after_severity, timer, on_refined)
+        return results
+
+    def _extract_keywords_pinned(self, version: KnowledgeBaseVersion, text: str,
+                                 timer: StageTimer) -> Dict[str, Any]:
+        with version.pinned():
+            return self.text_processor.extract_keywords(text, timer=timer)
+
+    def _refine_later(self, llm: Future, version: KnowledgeBaseVersion, text: str, include_timings: bool,
+                      max_results: Optional[int], stop_after_severity: Optional[int], timer: StageTimer,
+                      on_refined: Optional[Callable[[Dict[str, Any]], None]]) -> Future:
+        """
+        Agenda a análise com a resposta do LLM assim que ela chegar. O
+        refinamento roda no executor, com a mesma versão da base da análise
+        provisória e em um motor separado do motor principal.
+        """
+        refined: Future = Future()
+
+        def refine(done: Future) -> None:
+            try:
+                response = done.result()
+                triage = max_results is not None or stop_after_severity is not None
+                with version.pinned(), self._refinement_lock:
+                    results = self._run_pipeline(text, include_timings, max_results, stop_after_severity,
+                                                 response=response, timer=timer,
+                                                 engine=self._get_refinement_engine(triage))
+            except Exception as exc:
+                refined.set_exception(exc)
+            else:
+                refined.set_result(results)
+
+        def deliver(done: Future) -> None:
+            if done.exception() is None:
+                on_refined(done.result())
+
+        if on_refined is not None:
+            refined.add_done_callback(deliver)
+        llm.add_done_callback(lambda done: self._get_executor().submit(refine, done))
+        return refined
+
+    def _run_pipeline(self, text: str, include_timings: bool,
+                      max_results: Optional[int] = None,
+                      stop_after_severity: Optional[int] = None, **kwargs) -> Dict[str, Any]:
+        for event in self._pipeline_events(text, include_timings, max_results, stop_after_severity, **kwargs):
+            pass
+        return event.data
+
+    def _pipeline_events(self, text: str, include_timings: bool,
+                         max_results: Optional[int] = None,
+                         stop_after_severity: Optional[int] = None,
+                         response: Optional[Dict[str, Any]] = None,
+                         timer: Optional[StageTimer] = None,
+                         engine: Optional[ViolenceRules] = None,
+                         record: bool = True) -> Iterator[AnalysisEvent]:
+        timer = timer or StageTimer()
+        if engine is None:
+            engine = self.engine
+            if max_results is not None or stop_after_severity is not None:
+                engine = self._get_triage_engine()
+        
         # 1. Reiniciar o motor para garantir um estado limpo
-        self.engine.reset()
+        with timer.span("reset"):
+            engine.reset()
         
         # 2. Processar texto e obter fatos compatíveis com Experta
-        facts = self.text_processor.create_experta_facts(text)
+        facts = self.text_processor.create_experta_facts(text, timer=timer, response=response)
+        keywords: Dict[str, list] = {}
+        for fact in facts:
+            if isinstance(fact, KeywordFact):
+                keywords.setdefault(fact["category"], []).append(fact["keyword"])
+        yield AnalysisEvent("keywords", keywords)
         
         # 3. Inserir fatos no motor
-        for fact in facts:
-            self.engine.declare(fact)
+        with timer.span("declare"):
+            engine.declare_many(facts)
         
         # 4. Executar o método de debug para verificar fatos
-        self.engine.debug_facts()
+        engine.debug_facts()
         
         # 5. Executar o motor (que já consolida os resultados no final)
-        self.engine.run()
+        for entry in engine.run_iter(timer=timer, max_results=max_results,
+                                     stop_after_severity=stop_after_severity):
+            yield AnalysisEvent("classification", entry)
         
         # 6. Coletar resultados
-        results = self._collect_results()
+        with timer.span("collect"):
+            results = self._collect_results(engine)
         
-        return results
+        timings = timer.finish()
+        self.latency.record(timings)
+        if record and self.store is not None:
+            self.store.record(results, keywords, timings, current_version().fingerprint, text=text)
+        if include_timings:
+            results["timings"] = timings
+        
+        yield AnalysisEvent("result", results)
+
+    def _get_triage_engine(self) -> TriageViolenceRules:
+        """Motor com saliência por gravidade, recriado quando a versão da base muda."""
+        engine = self._triage_engine
+        if engine is None or engine.salience_fingerprint != current_version().fingerprint:
+            self._triage_engine = TriageViolenceRules(render_explanations=self.engine.render_explanations)
+        return self._triage_engine
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="groq")
+            return self._executor
+
+    def close(self) -> None:
+        """
+        Encerra o executor do modo degradado: chamadas ao LLM e refinamentos
+        ainda na fila são cancelados; os que já estão rodando terminam. Um
+        uso posterior com `latency_budget` cria um executor novo.
+        """
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def _get_refinement_engine(self, triage: bool) -> ViolenceRules:
+        """Motor usado só pelos refinamentos em segundo plano (protegido por _refinement_lock)."""
+        engine = self._refinement_engines.get(triage)
+        if engine is None:
+            engine_class = TriageViolenceRules if triage else ViolenceRules
+            engine = self._refinement_engines[triage] = engine_class(
+                render_explanations=self.engine.render_explanations)
+        return engine
+
+    def _get_local_extractor(self, version: KnowledgeBaseVersion) -> LocalKeywordExtractor:
+        """Extrator local do vocabulário da versão, reconstruído quando a base muda."""
+        if self._local_extractor is None or self._local_extractor[0] != version.fingerprint:
+            self._local_extractor = (version.fingerprint, LocalKeywordExtractor(version.keywords_dict))
+        return self._local_extractor[1]
+
+    def get_latency_percentiles(self) -> Dict[str, Dict[str, float]]:
+        """
+        Retorna p50/p95/p99 (ms) de cada etapa nas análises mais recentes.
+        """
+        return self.latency.summary()
+
+    def start_session(self) -> "AnalysisSession":
+        """
+        Inicia uma sessão de análise incremental: o relato inicial e as
+        respostas de follow-up compartilham a memória de trabalho do motor.
+        """
+        from .analysis_session import AnalysisSession
+        return AnalysisSession(self, context_size=self.context_size)
 
-    def _collect_results(self) -> Dict[str, Any]:
+    def _collect_results(self, engine: Optional[ViolenceRules] = None) -> Dict[str, Any]:
         """Coleta resultados do motor após execução."""
+        engine = self.engine if engine is None else engine
         results = {
             "classifications": [],
             "primary_result": {"violence_type": "", "subtype": ""},
             "multiple_types": False
         }
         
-        # Buscar resultado da análise
-        for fact in self.engine.facts.values():
+        # Buscar resultado da análise (os valores do fato são congelados pelo Experta)
+        for fact in engine.facts.values():
             if isinstance(fact, AnalysisResult):
-                results["classifications"] = getattr(fact, "classifications", [])
+                results["classifications"] = unfreeze(fact.get("classifications", []))
                 
                 # Atualizar primary_result se disponível
-                primary_result = getattr(fact, "primary_result", None)
+                primary_result = fact.get("primary_result")
                 if primary_result is not None:
-                    results["primary_result"] = primary_result
+                    results["primary_result"] = unfreeze(primary_result)
                 
-                results["multiple_types"] = getattr(fact, "multiple_types", False)
+                results["multiple_types"] = fact.get("multiple_types", False)
                 break
         
         # Se não encontrou AnalysisResult ou classifications está vazio, busque diretamente ViolenceClassification
         if not results["classifications"]:
             classifications = []
-            for fact_id in self.engine.get_matching_facts(ViolenceClassification):
-                fact = self.engine.facts[fact_id]
-                classifications.append({
-                    "violence_type": fact["violence_type"],
-                    "subtype": fact["subtype"],
-                    "explanation": self.engine.get_explanation(fact["violence_type"], fact["subtype"])
-                })
+            for fact_id in engine.get_matching_facts(ViolenceClassification):
+                fact = engine.facts[fact_id]
+                classifications.append(engine.build_classification_entry(fact["violence_type"], fact["subtype"]))
             
             # Se encontrou classificações, use-as
             if classifications:
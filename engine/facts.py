@@ -1,31 +1,58 @@
+import sys
+
 from experta import Fact, Field
-from knowledge_base.violence_types import VIOLENCE_TYPES, SEVERITY_LEVEL, REPORT_CONTACT
-import streamlit as st  # type: ignore
+
+# Limite de conteúdos memorizados: o vocabulário da base é fechado, mas a
+# resposta do LLM pode trazer termos arbitrários
+MAX_CACHED_FACTS = 4096
+
+_VALIDATED_FACTS = set()
+_FACT_TEMPLATES = {}
+
+class VocabularyFact(Fact):
+    """
+    Fato cujo conteúdo vem de um vocabulário fechado (palavras-chave).
+
+    A validação de schema do Experta roda a cada declaração; aqui o
+    resultado é memorizado por (classe, conteúdo), de modo que um fato já
+    validado uma vez não passa de novo pelo Schema.
+    """
+
+    def validate(self):
+        try:
+            key = (self.__class__, frozenset(self.items()))
+        except TypeError:
+            return super().validate()
+        if key in _VALIDATED_FACTS:
+            return
+        super().validate()
+        if len(_VALIDATED_FACTS) < MAX_CACHED_FACTS:
+            _VALIDATED_FACTS.add(key)
 
 class TextRelato(Fact):
     text = Field(str, mandatory=True)
     processed = Field(bool, default=False)
 
-class KeywordFact(Fact):
+class KeywordFact(VocabularyFact):
     category = Field(str, mandatory=True)
     keyword = Field(str, mandatory=True)
 
-class ViolenceBehavior(Fact):
+class ViolenceBehavior(VocabularyFact):
     behavior_type = Field(str, mandatory=True)
 
-class ContextFact(Fact):
+class ContextFact(VocabularyFact):
     location = Field(str, mandatory=True)
 
-class FrequencyFact(Fact):
+class FrequencyFact(VocabularyFact):
     value = Field(str, mandatory=True)
 
-class TargetFact(Fact):
+class TargetFact(VocabularyFact):
     characteristic = Field(str, mandatory=True)
 
-class RelationshipFact(Fact):
+class RelationshipFact(VocabularyFact):
     type = Field(str, mandatory=True)
 
-class ImpactFact(Fact):
+class ImpactFact(VocabularyFact):
     type = Field(str, mandatory=True)
 
 class ViolenceClassification(Fact):
@@ -34,7 +61,7 @@ class ViolenceClassification(Fact):
     """
     violence_type = Field(str, mandatory=True)  # Tipo principal de violência
     subtype = Field(str, default="")           # Subtipo (se aplicável)
-    explanation = Field(list, default=[])      # Lista de explicações
+    explanation = Field(list, default=[])      # Registros (ExplanationRecord) das explicações
 
 class AnalysisResult(Fact):
     """
@@ -44,9 +71,57 @@ class AnalysisResult(Fact):
     primary_result = Field(dict, default=None)  # Resultado principal
     multiple_types = Field(bool, default=False) # Indica se foram encontrados múltiplos tipos\
 
-class ProcessingPhase(Fact):
-    """Controla a fase de processamento do motor de inferência."""
-    phase = Field(str, mandatory=True)  # 'collection', 'analysis'
+# Fato tipado (classe, campo) correspondente a cada categoria do KEYWORDS_DICT
+CATEGORY_FACTS = {
+    "action_type": (ViolenceBehavior, "behavior_type"),
+    "frequency": (FrequencyFact, "value"),
+    "context": (ContextFact, "location"),
+    "target": (TargetFact, "characteristic"),
+    "relationship": (RelationshipFact, "type"),
+    "impact": (ImpactFact, "type"),
+}
+
+def _build_keyword_facts(category, keyword):
+    facts = [KeywordFact(category=category, keyword=keyword)]
+    typed = CATEGORY_FACTS.get(category)
+    if typed is not None:
+        fact_class, field = typed
+        facts.append(fact_class(**{field: keyword}))
+    return facts
+
+def _intern(value):
+    return sys.intern(value) if type(value) is str else value
+
+def _clone(template):
+    """
+    Cópia de um fato ainda não declarado pelo construtor público do Experta
+    (valores de vocabulário já internados: o freeze() os mantém como estão).
+    """
+    return type(template)(**template)
+
+def keyword_facts(category, keyword):
+    """
+    Fatos de uma palavra-chave: o KeywordFact e, se a categoria tiver um,
+    o fato tipado correspondente (CATEGORY_FACTS).
+
+    Os fatos são cópias de modelos já validados, guardados por
+    (categoria, palavra-chave) com as strings internadas.
+    """
+    try:
+        templates = _FACT_TEMPLATES.get((category, keyword))
+    except TypeError:
+        return _build_keyword_facts(category, keyword)
+    if templates is None:
+        templates = _build_keyword_facts(_intern(category), _intern(keyword))
+        try:
+            for fact in templates:
+                fact.validate()
+        except ValueError:
+            # Conteúdo inválido: o erro aparece na declaração, como antes
+            return templates
+        if len(_FACT_TEMPLATES) < MAX_CACHED_FACTS:
+            _FACT_TEMPLATES[templates[0]["category"], templates[0]["keyword"]] = templates
+    return [_clone(template) for template in templates]
 
 def create_facts_from_groq_response(response):
     facts = []
@@ -54,22 +129,15 @@ def create_facts_from_groq_response(response):
         keywords = response["identified_keywords"]
         for category, values in keywords.items():
             for keyword in values:
-                facts.append(KeywordFact(category=category, keyword=keyword))
-                if category == "action_type":
-                    facts.append(ViolenceBehavior(behavior_type=keyword))
-                elif category == "context":
-                    facts.append(ContextFact(location=keyword))
-                elif category == "frequency":
-                    facts.append(FrequencyFact(value=keyword))
-                elif category == "target":
-                    facts.append(TargetFact(characteristic=keyword))
-                elif category == "relationship":
-                    facts.append(RelationshipFact(type=keyword))
-                elif category == "impact":
-                    facts.append(ImpactFact(type=keyword))
+                facts.extend(keyword_facts(category, keyword))
     return facts
 
 def print_information(violence_type, subtype=None, confidence=None):
+    # Importados aqui para que o motor possa ser usado sem streamlit e sem
+    # construir a base de conhecimento durante o import
+    import streamlit as st  # type: ignore
+    from knowledge_base.violence_types import VIOLENCE_TYPES, SEVERITY_LEVEL, REPORT_CONTACT
+
     info = VIOLENCE_TYPES.get(violence_type)
     if not info:
         st.warning("Informações adicionais não disponíveis.")
@@ -0,0 +1,116 @@
+"""
+Extração local (sem LLM) de palavras-chave.
+
+Usada no modo degradado do ExpertSystem: quando o Groq não responde dentro do
+orçamento de latência, a análise provisória é feita com as palavras-chave
+encontradas aqui por correspondência léxica simples. Cada palavra-chave do
+vocabulário da base é reconhecida pelo próprio identificador (todos os
+radicais dos seus termos presentes no texto) ou por uma das formas comuns em
+LOCAL_CUES. Não há tratamento de negação nem de contexto: o resultado é
+apenas uma aproximação até a resposta do LLM.
+"""
+import re
+from typing import Any, Dict, Iterable, List, Mapping, Pattern, Tuple
+
+from knowledge_base.keyword_index import normalize_term
+
+# Formas comuns nos relatos que não derivam do identificador da palavra-chave
+LOCAL_CUES: Dict[str, Dict[str, Tuple[str, ...]]] = {
+    "action_type": {
+        "interrupcao": ("interromp",),
+        "questionamento_capacidade": ("questiona", "incapaz", "duvid"),
+        "perseguicao": ("me seguiu", "me segue", "persegu"),
+        "ameaca": ("ameac",),
+        "humilhacao": ("humilh",),
+        "constrangimento": ("constrang",),
+        "exclusao": ("exclu", "isolad"),
+        "insulto": ("xing", "insult", "ofend"),
+        "insulto_racial": ("macaco", "racis"),
+        "coercao_sexual": ("me forcou", "me obrigou"),
+        "contato_fisico_nao_consentido": ("me tocou", "apalp", "agarr"),
+        "cyberbullying": ("redes sociais", "grupo de whatsapp"),
+        "piada_sotaque": ("sotaque",),
+    },
+    "frequency": {
+        "unica_vez": ("uma vez",),
+        "algumas_vezes": ("algumas vezes",),
+        "repetidamente": ("varias vezes", "repetid", "sempre"),
+        "continuamente": ("todos os dias", "todo dia", "constantemente"),
+    },
+    "context": {
+        "sala_aula": ("sala de aula", "durante a aula", "na aula"),
+        "local_trabalho": ("trabalho", "escritorio", "estagio"),
+        "ambiente_online": ("online", "internet", "whatsapp", "redes sociais"),
+        "evento_academico": ("congresso", "palestra", "seminario"),
+        "local_culto_religioso": ("igreja", "templo", "terreiro"),
+    },
+    "target": {
+        "genero": ("por ser mulher", "machis"),
+        "orientacao_sexual": ("gay", "lesbica", "bissexual", "homofob", "lgbt"),
+        "raca_etnia": ("negr", "racis", "racial", "indigena"),
+        "religiao": ("religi", "evangelic", "catolic", "candomble", "umbanda"),
+        "deficiencia": ("deficien", "cadeira de rodas", "surd"),
+        "aparencia_fisica": ("gord", "aparencia"),
+        "origem_regional": ("nordestin", "sotaque"),
+        "origem_estrangeira": ("estrangeir", "imigrante"),
+        "condicao_financeira": ("pobre", "bolsista"),
+    },
+    "relationship": {
+        "relacao_hierarquica": ("chefe", "professor", "orientador", "supervisor", "coordenador", "gerente"),
+        "colega": ("colega",),
+        "desconhecido": ("desconhecid", "estranho"),
+        "ex_relacionamento": ("ex-namorad", "ex namorad", "ex-marido", "ex-companheir"),
+    },
+    "impact": {
+        "medo_inseguranca": ("medo", "insegur"),
+        "danos_emocionais": ("ansiedade", "depress", "choro", "chorei"),
+        "prejuizo_desempenho": ("minhas notas", "desempenho"),
+        "impacto_participacao": ("parei de participar", "deixei de ir"),
+    },
+}
+
+_MIN_TERM = 4   # termos menores do identificador ("de", "por", "nao") são ignorados
+_MIN_STEM = 5
+
+
+def _stem(term: str) -> str:
+    """Radical aproximado: remove a terminação (ex.: "perseguicao" -> "persegu")."""
+    return term[:max(_MIN_STEM, len(term) - 4)]
+
+
+def _word_prefix(stems: Iterable[str]) -> Pattern:
+    return re.compile(r"\b(?:" + "|".join(re.escape(normalize_term(stem)) for stem in stems) + ")")
+
+
+class LocalKeywordExtractor:
+    """Reconhece palavras-chave do vocabulário em um texto, sem LLM."""
+
+    def __init__(self, keywords_dict: Mapping[str, Iterable[str]],
+                 cues: Mapping[str, Mapping[str, Iterable[str]]] = LOCAL_CUES):
+        # (categoria, palavra-chave, radicais do identificador, formas comuns)
+        self._matchers: List[Tuple[str, str, List[Pattern], Pattern]] = []
+        for category, keywords in keywords_dict.items():
+            for keyword in keywords:
+                terms = [term for term in keyword.split("_") if len(term) >= _MIN_TERM] or [keyword]
+                stems = [_word_prefix([_stem(term)]) for term in terms]
+                phrases = tuple(cues.get(category, {}).get(keyword, ()))
+                self._matchers.append((category, keyword, stems, _word_prefix(phrases) if phrases else None))
+
+    def extract(self, text: str) -> Dict[str, Any]:
+        """
+        Retorna uma resposta no formato da resposta validada do Groq
+        ("identified_keywords", "missing_information", "follow_up_questions").
+        """
+        normalized = normalize_term(text)
+        identified: Dict[str, List[str]] = {}
+        categories: List[str] = []
+        for category, keyword, stems, phrases in self._matchers:
+            if category not in categories:
+                categories.append(category)
+            if all(stem.search(normalized) for stem in stems) or (phrases is not None and phrases.search(normalized)):
+                identified.setdefault(category, []).append(keyword)
+        return {
+            "identified_keywords": identified,
+            "missing_information": [category for category in categories if category not in identified],
+            "follow_up_questions": [],
+        }
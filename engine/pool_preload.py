@@ -0,0 +1,71 @@
+"""
+Estado pré-aquecido dos workers de ProcessPoolClassifier.
+
+Este módulo é importado no processo fork-server (set_forkserver_preload):
+constrói a base de conhecimento e um ExpertSystem com o ViolenceRules já
+compilado, roda uma análise sintética para preencher os caches (tabela de
+regras, modelos de fatos) e congela o heap com gc.freeze(). Cada worker nasce
+de um fork desse processo e herda tudo em páginas copy-on-write que o coletor
+de lixo não volta a percorrer. O processo principal não deve importá-lo.
+
+Sem fork-server (outros start methods), `warm_system` constrói o mesmo estado
+na primeira chamada dentro do worker.
+
+Se o processo principal pedir outra versão da base (fingerprint diferente da
+carregada no fork-server), o worker recarrega a base e reconstrói o sistema;
+se ainda assim as versões não coincidirem, o bloco falha em vez de ser
+classificado com regras de outra versão.
+"""
+import contextlib
+import gc
+import os
+import sys
+from typing import Dict, Optional, Tuple
+
+# O motor registra seu progresso com print; nos workers isso iria para a
+# saída do processo principal (o JSONL do lote)
+_DEVNULL = open(os.devnull, "w")
+_SYSTEMS: Dict[bool, Tuple[str, object]] = {}  # modo de explicação -> (fingerprint, sistema)
+
+# Resposta sintética usada só para aquecer os caches do motor
+WARMUP_RESPONSE = {"identified_keywords": {
+    "action_type": ["questionamento_capacidade", "interrupcao"], "target": ["genero"],
+    "frequency": ["repetidamente"], "context": ["sala_aula"], "relationship": ["relacao_hierarquica"],
+}}
+
+
+def warm_system(render_explanations: bool = False, fingerprint: Optional[str] = None):
+    """
+    ExpertSystem do worker (um por modo de explicação), aquecido na primeira
+    chamada e reconstruído quando a versão da base muda. Com `fingerprint`,
+    garante que o sistema use exatamente essa versão da base.
+    """
+    from knowledge_base.reloadable import get_knowledge_base
+    knowledge_base = get_knowledge_base()
+    with contextlib.redirect_stdout(_DEVNULL):
+        if fingerprint is not None and knowledge_base.fingerprint != fingerprint:
+            knowledge_base.reload()
+    if fingerprint is not None and knowledge_base.fingerprint != fingerprint:
+        raise RuntimeError(f"Worker com a base {knowledge_base.fingerprint}, "
+                           f"mas o lote usa a versão {fingerprint}")
+
+    version = knowledge_base.current()
+    cached = _SYSTEMS.get(render_explanations)
+    if cached is not None and cached[0] == version.fingerprint:
+        return cached[1]
+    from .expert_system import ExpertSystem
+    with contextlib.redirect_stdout(_DEVNULL), version.pinned():
+        system = ExpertSystem(api_key="", render_explanations=render_explanations)
+        system.analyze_response("", WARMUP_RESPONSE)
+    _SYSTEMS[render_explanations] = (version.fingerprint, system)
+    return system
+
+
+def _preload() -> None:
+    warm_system()
+    sys.stdout = _DEVNULL
+    gc.collect()
+    gc.freeze()
+
+
+_preload()
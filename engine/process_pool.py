@@ -0,0 +1,135 @@
+"""
+Classificação em paralelo com um pool de processos pré-aquecidos.
+
+O motor de regras é Python puro e limitado pelo GIL: threads não aumentam a
+vazão da classificação. O ProcessPoolClassifier distribui relatos já extraídos
+(texto + resposta validada do LLM) entre processos. Com o start method
+"forkserver", o processo fork-server importa engine.pool_preload antes de criar
+qualquer worker: a base de conhecimento e o ViolenceRules são construídos e
+aquecidos uma vez e o heap é congelado (gc.freeze), de modo que cada worker
+nasce pronto e compartilha essas páginas em copy-on-write.
+
+O trabalho é despachado em blocos (chunks) de relatos, para amortizar o custo
+de serialização entre processos, e os resultados voltam bloco a bloco, assim
+que cada um termina. As opções levam o fingerprint da versão da base usada
+pelo processo principal: um worker com outra versão recarrega a base antes de
+classificar e falha se não conseguir chegar à mesma versão.
+"""
+import contextlib
+import multiprocessing
+import os
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+PRELOAD_MODULE = "engine.pool_preload"
+
+Row = Tuple[Any, str, Dict[str, Any]]  # (chave, texto, resposta validada do LLM)
+
+
+def available_cores() -> int:
+    """Núcleos que este processo pode usar."""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+class ClassifyOptions(NamedTuple):
+    render_explanations: bool = False
+    max_results: Optional[int] = None
+    stop_after_severity: Optional[int] = None
+    kb_fingerprint: Optional[str] = None   # versão exigida da base (None: a do worker)
+
+
+def classify_chunk(rows: Sequence[Row], options: ClassifyOptions) -> List[Tuple[Any, Dict[str, Any]]]:
+    """
+    Executado no worker: classifica um bloco com o ExpertSystem pré-aquecido.
+    Cada resultado é o de `ExpertSystem.analyze_response`, com "timings" e,
+    com `options.render_explanations`, as explicações já renderizadas.
+    Levanta RuntimeError se o worker não tiver a versão `options.kb_fingerprint`.
+    """
+    from .pool_preload import warm_system
+    # O motor registra seu progresso com print: fora do fork-server (fork,
+    # spawn) isso iria para a saída do processo principal, o JSONL do lote
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        system = warm_system(options.render_explanations, options.kb_fingerprint)
+        return [(key, _rendered(system.analyze_response(text, response, include_timings=True,
+                                                        max_results=options.max_results,
+                                                        stop_after_severity=options.stop_after_severity)))
+                for key, text, response in rows]
+
+
+def _rendered(value: Any) -> Any:
+    """Troca as explicações preguiçosas do resultado pelas linhas de texto."""
+    from .rules.explanation_system import LazyExplanation
+    if isinstance(value, LazyExplanation):
+        return list(value)
+    if isinstance(value, dict):
+        return {key: _rendered(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_rendered(item) for item in value]
+    return value
+
+
+class ProcessPoolClassifier:
+    """
+    Pool de processos para classificação em lote.
+
+    Args:
+        workers: Número de processos (padrão: núcleos disponíveis)
+        chunk_size: Relatos por bloco despachado
+        options: Modo de explicação e opções de triagem de cada análise
+        start_method: "forkserver" (padrão, workers pré-aquecidos), "fork" ou "spawn"
+    """
+
+    def __init__(self, workers: Optional[int] = None, chunk_size: int = 32,
+                 options: ClassifyOptions = ClassifyOptions(), start_method: str = "forkserver"):
+        self.workers = workers or available_cores()
+        self.chunk_size = chunk_size
+        self.options = options
+        context = multiprocessing.get_context(start_method)
+        if start_method == "forkserver":
+            # Só tem efeito antes de o fork-server do processo ser iniciado
+            context.set_forkserver_preload([PRELOAD_MODULE])
+        self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+
+    def submit(self, rows: Sequence[Row]) -> Future:
+        """Despacha um bloco; o Future resulta em [(chave, resultado), ...]."""
+        return self._executor.submit(classify_chunk, list(rows), self.options)
+
+    def warm_up(self) -> None:
+        """Inicia todos os workers e espera que estejam prontos."""
+        wait([self.submit([]) for _ in range(self.workers)])
+
+    def map(self, rows: Iterable[Row], chunk_size: Optional[int] = None) -> Iterator[Tuple[Any, Dict[str, Any]]]:
+        """
+        Classifica os relatos em blocos, com até dois blocos por worker em
+        andamento, produzindo (chave, resultado) na ordem de conclusão.
+        """
+        size = chunk_size or self.chunk_size
+        pending = set()
+        chunk: List[Row] = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) < size:
+                continue
+            pending.add(self.submit(chunk))
+            chunk = []
+            while len(pending) >= 2 * self.workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield from future.result()
+        if chunk:
+            pending.add(self.submit(chunk))
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield from future.result()
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def __enter__(self) -> "ProcessPoolClassifier":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
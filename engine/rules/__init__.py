@@ -10,12 +10,13 @@ Este módulo contém um sistema modular de regras organizadas por tipo de violê
 - discrimination_rules.py: Regras para discriminação (gênero, racial, etc.)
 - harassment_rules.py: Regras para assédio/perseguição
 - digital_violence_rules.py: Regras para violência digital
-- violence_rules.py: Classe principal que combina todos os módulos
+- violence_rules.py: Classe principal que combina todos os módulos (e o
+  motor de triagem TriageViolenceRules, com saliência por gravidade)
 
 A classe principal ViolenceRules é exportada para ser usada pelo sistema.
 """
 
-from .violence_rules import ViolenceRules
+from .violence_rules import ViolenceRules, TriageViolenceRules
 from .explanation_system import ExplanationSystem
 
-__all__ = ['ViolenceRules', 'ExplanationSystem']
+__all__ = ['ViolenceRules', 'TriageViolenceRules', 'ExplanationSystem']
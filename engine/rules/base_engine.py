@@ -1,18 +1,36 @@
 import inspect
+from collections import Counter
+from experta.agenda import Agenda
 from experta.engine import KnowledgeEngine
 from experta import Fact
+from experta.factlist import FactList
 from experta.rule import Rule
-from experta.deffacts import DefFacts
 from experta import TEST, AS, OR, NOT, AND
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, NamedTuple, Optional, Tuple
 
 from ..facts import (
     TextRelato, KeywordFact, ViolenceBehavior, ContextFact, FrequencyFact,
     TargetFact, RelationshipFact, ImpactFact, ViolenceClassification,
-    AnalysisResult, ProcessingPhase
+    AnalysisResult
 )
 
-from knowledge_base.violence_types import VIOLENCE_TYPES
+from knowledge_base.concept_weights import ConceptWeightMatrix, rank_classifications
+from knowledge_base.reloadable import current_version
+from utils.timing import StageTimer
+from .explanation_system import (
+    ExplanationRecord, ExplanationSystem, LazyExplanation, render_explanations
+)
+from .requirement_index import RequirementIndex, collect_rule_specs
+from .rule_table import SharedJoinReteMatcher
+
+
+class EngineBaseline(NamedTuple):
+    """Estado do motor logo após um reset completo (InitialFact já propagado)."""
+    facts: List[Tuple[int, Fact]]
+    last_index: int
+    reference_counter: Counter
+    activations: List[Any]
+    memories: List[Tuple[Any, Dict[str, Any]]]
 
 
 class BaseViolenceEngine(KnowledgeEngine):
@@ -20,35 +38,53 @@ class BaseViolenceEngine(KnowledgeEngine):
     Classe base para o motor de regras de identificação de tipos de violência.
     Contém métodos comuns e infraestrutura básica.
     """
+    __matcher__ = SharedJoinReteMatcher
 
-    def __init__(self):
+    def __init__(self, render_explanations: bool = True):
+        """
+        Args:
+            render_explanations: Se False (lote/headless), as classificações
+                trazem só os registros compactos, sem o texto das explicações
+        """
         super().__init__()
-        self.explanations = {}
+        self.render_explanations = render_explanations
+        self.explanations = {}  # chave -> lista de ExplanationRecord
+        self._rendered = {}     # chave -> texto já renderizado
+        self._requirement_index = None  # (fingerprint, RequirementIndex)
+        self._new_classifications = []  # (tipo, subtipo) criados desde o último passo de run_iter
+        self._baseline: Optional[EngineBaseline] = None
 
-    @DefFacts()
-    def initial_facts(self):
-        """Define os fatos iniciais, incluindo a fase inicial de coleta."""
-        yield Fact(engine_ready=True)
-        yield ProcessingPhase(phase="collection")  # Fase inicial: coleta de fatos
+    def get_activations(self):
+        """
+        Fora de `run` as mudanças da memória de trabalho ficam acumuladas na
+        FactList: declarar fatos não propaga nada pela rede Rete. As regras
+        só se tornam elegíveis quando `run` processa todas as mudanças em
+        lote, depois da inserção dos fatos (substitui a antiga transição de
+        fase coleta → análise, sem fato de fase nem junção extra).
+        """
+        if not self.running:
+            return [], []
+        return super().get_activations()
 
-    @Rule(ProcessingPhase(phase="collection"))
-    def start_analysis_phase(self):
+    def declare_many(self, facts):
         """
-        Transição da fase de coleta para a fase de análise.
-        Esta regra dispara após todos os fatos serem declarados.
+        Declara um lote de fatos: valida e insere todos em uma única chamada
+        e atualiza a agenda uma vez, propagando o lote inteiro pela rede
+        Rete. Dentro de `run` (regras), a atualização fica para o próximo
+        passo. Retorna o último fato inserido, como `declare`.
         """
-        print("🔄 Transitando para fase de análise...")
-        # Remover a fase de coleta
-        for fact_id in self.get_matching_facts(ProcessingPhase):
-            self.retract(fact_id)
-        # Declarar a fase de análise
-        self.declare(ProcessingPhase(phase="analysis"))
+        last_inserted = self.declare(*facts)
+        if not self.running:
+            self._update_agenda()
+        return last_inserted
 
-    @Rule(Fact(engine_ready=True))
-    def rule_diagnostic(self):
-        print("✅ DIAGNÓSTICO: Motor de regras funcionando!")
+    def _update_agenda(self):
+        """Processa as mudanças acumuladas e atualiza a agenda."""
+        added, removed = self.matcher.changes(*self.facts.changes)
+        self.strategy.update_agenda(self.agenda, added, removed)
 
-    def create_classification(self, violence_type, subtype=None, explanations=None, facts_used=None, reasoning=None):
+    def create_classification(self, violence_type, subtype=None, explanations=None, facts_used=None, reasoning=None,
+                              rule_name=None):
         """
         Cria uma classificação de violência com explicações detalhadas.
         
@@ -58,6 +94,7 @@ class BaseViolenceEngine(KnowledgeEngine):
             explanations: Lista de explicações básicas (opcional)
             facts_used: Dicionário dos fatos que dispararam a regra (opcional)
             reasoning: Explicação adicional do raciocínio (opcional)
+            rule_name: Nome da regra que disparou (padrão: função chamadora)
         """
         # Garantir que subtype nunca seja None para consistência
         subtype = subtype or ""
@@ -69,77 +106,124 @@ class BaseViolenceEngine(KnowledgeEngine):
                 # Já existe, não precisamos criar outra
                 return
         
-        # Armazenar explicações, evitando duplicações
+        # Registrar a explicação de forma compacta; o texto é gerado sob demanda
         key = f"{violence_type}_{subtype}" if subtype else violence_type
+        rule_name = rule_name or inspect.currentframe().f_back.f_code.co_name
         
-        # Se temos fatos usados, gerar explicação detalhada
+        # Se temos fatos usados, a explicação detalhada é gerada a partir deles
         if facts_used:
-            rule_name = inspect.currentframe().f_back.f_code.co_name
-            conclusion = f"{violence_type}" + (f" do tipo {subtype}" if subtype else "")
-            detailed_explanations = self.format_detailed_explanation(rule_name, facts_used, conclusion, reasoning)
-            
-            if key not in self.explanations:
-                self.explanations[key] = []
-                
-            # Adicionar explicações detalhadas
-            for explanation in detailed_explanations:
-                if explanation not in self.explanations[key]:
-                    self.explanations[key].append(explanation)
+            record = ExplanationRecord.from_facts(rule_name, violence_type, subtype, facts_used, reasoning)
         # Caso contrário, usar explicações simples fornecidas
         elif explanations:
-            if key not in self.explanations:
-                self.explanations[key] = []
-                
-            # Adicionar explicações simples
-            for explanation in explanations:
-                if explanation not in self.explanations[key]:
-                    self.explanations[key].append(explanation)
+            record = ExplanationRecord(rule_name, violence_type, subtype, lines=tuple(explanations))
+        else:
+            record = None
+        
+        if record is not None:
+            records = self.explanations.setdefault(key, [])
+            if record not in records:
+                records.append(record)
+                self._rendered.pop(key, None)
         
         # Criar nova classificação
         self.declare(
             ViolenceClassification(
                 violence_type=violence_type,
                 subtype=subtype,
-                explanation=self.explanations.get(key, []).copy()  # Usar a lista completa e atual
+                explanation=list(self.explanations.get(key, []))  # Registros compactos
             )
         )
+        self._new_classifications.append((violence_type, subtype))
         print(f"📊 Criado {key}")
     
-    def run(self, steps=None):
+    def run(self, steps=None, timer: Optional[StageTimer] = None,
+            max_results: Optional[int] = None, stop_after_severity: Optional[int] = None):
         """
-        Executa o motor em modo controlado por fases.
+        Executa o motor até esvaziar a agenda e consolida os resultados.
+        Se `timer` for fornecido, registra as etapas "rule_firing" e "consolidation".
+        `max_results`/`stop_after_severity`: parada antecipada (ver run_iter).
         """
-        print("🚀 Iniciando motor de inferência com controle de fases")
+        for _ in self.run_iter(steps, timer, max_results, stop_after_severity):
+            pass
+
+    def run_iter(self, steps=None, timer: Optional[StageTimer] = None,
+                 max_results: Optional[int] = None, stop_after_severity: Optional[int] = None):
+        """
+        Executa o motor como `run`, produzindo cada classificação nova (no
+        formato de build_classification_entry, ainda sem pontuação) logo após
+        a regra que a criou disparar. Os resultados são consolidados no fim.
+        O tempo do consumidor entre os itens não entra em "rule_firing".
+
+        Parada antecipada (para motores com saliência por gravidade, como o
+        TriageViolenceRules): para após `max_results` classificações ou
+        quando a próxima regra for menos grave que `stop_after_severity`.
+        """
+        timer = timer or StageTimer()
+        print("🚀 Iniciando motor de inferência")
         steps_value = -1 if steps is None else steps
         
         # Limitar o número máximo de iterações para evitar loops infinitos
         max_iterations = 100
         iteration = 0
+        self._new_classifications = []
+        found = 0
+        
+        # Ativações de todos os fatos inseridos desde a última execução, em lote
+        with timer.span("rule_firing"):
+            self._update_agenda()
         
         # Executar até que não haja mais regras para disparar ou atingir limite
-        while self.agenda and iteration < max_iterations:
-            super().run(1)  # Executar apenas uma regra por vez
+        while self.agenda.activations and iteration < max_iterations:
+            if self._triage_complete(found, max_results, stop_after_severity):
+                print("⏹️ Parada antecipada: classificações mais graves já conhecidas")
+                break
+            
+            with timer.span("rule_firing"):
+                super().run(1)  # Executar apenas uma regra por vez
+                self._update_agenda()  # Mudanças feitas pela regra
             iteration += 1
             
-            # Sair se não houver mais regras para acionar
-            if not self.agenda:
-                break
+            created, self._new_classifications = self._new_classifications, []
+            found += len(created)
+            for violence_type, subtype in created:
+                yield self.build_classification_entry(violence_type, subtype)
         
         print("\n🔄 Consolidando resultados...")
-        self.consolidate_results()
+        with timer.span("consolidation"):
+            self.consolidate_results()
+
+    def _triage_complete(self, found, max_results, stop_after_severity):
+        """
+        Indica se a triagem pode parar. Todas as regras são de classificação;
+        no motor de triagem a saliência de cada uma é a gravidade do alvo.
+        Saliência 0 significa gravidade desconhecida: é o caso de todas as
+        regras no motor completo (ViolenceRules, sem saliência) e de alvos
+        sem severity_score. Nesses casos não há como saber se o que falta é
+        menos grave, então a execução nunca é interrompida.
+        """
+        pending = self.agenda.activations
+        if not pending or pending[-1].rule.salience <= 0:
+            return False
+        if max_results is not None and found >= max_results:
+            return True
+        return stop_after_severity is not None and pending[-1].rule.salience < stop_after_severity
 
     def consolidate_results(self):
         """
         Consolida os resultados de todas as classificações.
+
+        As classificações são pontuadas pela matriz de pesos do CONCEPT_MAPPING
+        (palavras-chave extraídas do relato) e ordenadas por pontuação e
+        gravidade; o primeiro lugar é o resultado principal.
         """
+        # Em análises incrementais o motor roda de novo: substituir o resultado anterior
+        for fact_id in self.get_matching_facts(AnalysisResult):
+            self.retract(fact_id)
+        
         all_classifications = []
         for fact_id in self.get_matching_facts(ViolenceClassification):
             fact = self.facts[fact_id]
-            all_classifications.append({
-                "violence_type": fact["violence_type"],
-                "subtype": fact["subtype"] or "",
-                "explanation": self.get_explanation(fact["violence_type"], fact["subtype"])
-            })
+            all_classifications.append(self.build_classification_entry(fact["violence_type"], fact["subtype"]))
         
         if not all_classifications:
             print("⚠️ Nenhuma classificação identificada, criando resultado vazio")
@@ -155,7 +239,8 @@ class BaseViolenceEngine(KnowledgeEngine):
         # Reportar múltiplos se houver mais de um
         report_multiple = len(all_classifications) > 1
         
-        # Primeiro resultado como principal
+        # Ordenar por pontuação e gravidade; o primeiro é o principal
+        all_classifications = self.rank_classifications(all_classifications)
         primary_result = all_classifications[0]
 
         self.declare(
@@ -167,15 +252,63 @@ class BaseViolenceEngine(KnowledgeEngine):
         )
 
         print("\n✅ Análise consolidada:")
-        print(f"- Resultado principal: {primary_result['violence_type']}{' - ' + primary_result['subtype'] if primary_result.get('subtype') else ''}")
+        print(f"- Resultado principal: {primary_result['violence_type']}{' - ' + primary_result['subtype'] if primary_result.get('subtype') else ''}"
+              f" (pontuação {primary_result['score']:g}, confiança {primary_result['confidence']:.0%})")
         print(f"- Reportar múltiplos: {report_multiple}")
+
+    def build_classification_entry(self, violence_type, subtype):
+        """
+        Monta a classificação com o registro compacto da explicação; o texto
+        só é renderizado quando "explanation" for lido (ou nunca, se
+        render_explanations for False).
+        """
+        key = f"{violence_type}_{subtype}" if subtype else violence_type
+        records = tuple(self.explanations.get(key, ()))
+        entry = {
+            "violence_type": violence_type,
+            "subtype": subtype or "",
+            "explanation_record": records,
+        }
+        if self.render_explanations:
+            entry["explanation"] = LazyExplanation(records)
+        return entry
+
+    def rank_classifications(self, classifications):
+        """
+        Pontua e ordena classificações com a versão atual da base de conhecimento.
+        """
+        kb = current_version()
+        matrix = kb.weight_matrix or ConceptWeightMatrix.from_concept_mapping(kb.concept_mapping)
+        keywords = [(self.facts[fact_id]["category"], self.facts[fact_id]["keyword"])
+                    for fact_id in self.get_matching_facts(KeywordFact)]
+        return rank_classifications(classifications, keywords, matrix,
+                                    severity=kb.manager.get_severity_score)
         
+    def suggest_follow_up(self, keywords, limit=3):
+        """
+        Escolhe localmente (sem LLM) as perguntas do FIELDS_QUESTIONS que
+        podem desbloquear as classificações mais graves ainda não obtidas.
+        Retorna uma lista de (categoria, pergunta).
+        """
+        kb = current_version()
+        if self._requirement_index is None or self._requirement_index[0] != kb.fingerprint:
+            index = RequirementIndex(collect_rule_specs(type(self)), kb.manager.get_severity_score)
+            self._requirement_index = (kb.fingerprint, index)
+        classified = [(self.facts[fact_id]["violence_type"], self.facts[fact_id]["subtype"])
+                      for fact_id in self.get_matching_facts(ViolenceClassification)]
+        return self._requirement_index[1].select_questions(keywords, kb.fields_questions, limit,
+                                                           exclude=classified)
+
     def get_explanation(self, violence_type, subtype=None):
         """
         Recupera explicações armazenadas para um tipo/subtipo.
         """
         key = f"{violence_type}_{subtype}" if subtype else violence_type
-        return self.explanations.get(key, [])
+        if key not in self._rendered:
+            if key not in self.explanations:
+                return []
+            self._rendered[key] = render_explanations(self.explanations[key])
+        return self._rendered[key]
     
     def get_matching_facts(self, fact_type):
         """
@@ -192,17 +325,50 @@ class BaseViolenceEngine(KnowledgeEngine):
         for fact_id, fact in self.facts.items():
             print(f"- {fact_id}: {fact}")
 
-    def reset(self):
+    def reset(self, full: bool = False):
         """
-        Reinicia completamente o motor, limpando todos os fatos e explicações.
+        Reinicia o motor, limpando todos os fatos e explicações.
+
+        O primeiro reset (ou `full=True`) é o reset completo do Experta:
+        nova memória de trabalho, DefFacts e InitialFact propagado pela rede.
+        O estado resultante fica registrado (EngineBaseline) e os resets
+        seguintes apenas o restauram, sem varrer o motor atrás de DefFacts
+        nem repropagar o InitialFact. O resultado é o mesmo do reset completo,
+        inclusive os índices dos fatos declarados depois.
         """
         # Limpar explicações
         self.explanations = {}
-        
-        # Chamar o reset original
-        super().reset()
+        self._rendered = {}
+        self._new_classifications = []
+
+        if full or self._baseline is None:
+            # Chamar o reset original
+            super().reset()
+            self._update_agenda()
+            self._baseline = self._capture_baseline()
+        else:
+            self._restore_baseline(self._baseline)
         print("🔄 Motor de regras reiniciado completamente")
 
+    def _capture_baseline(self) -> EngineBaseline:
+        return EngineBaseline(
+            facts=list(self.facts.items()),
+            last_index=self.facts.last_index,
+            reference_counter=Counter(self.facts.reference_counter),
+            activations=list(self.agenda.activations),
+            memories=self.matcher.snapshot(),
+        )
+
+    def _restore_baseline(self, baseline: EngineBaseline) -> None:
+        self.agenda = Agenda()
+        self.agenda.activations = list(baseline.activations)
+        self.facts = FactList()
+        self.facts.update(baseline.facts)
+        self.facts.last_index = baseline.last_index
+        self.facts.reference_counter = Counter(baseline.reference_counter)
+        self.matcher.restore(baseline.memories)
+        self.running = False
+
     def format_detailed_explanation(self, rule_name, facts_used, conclusion, reasoning=None):
         """
         Gera uma explicação detalhada em linguagem natural baseada nos fatos que ativaram a regra.
@@ -213,53 +379,4 @@ class BaseViolenceEngine(KnowledgeEngine):
             conclusion: A conclusão alcançada pela regra
             reasoning: Explicação adicional do raciocínio (opcional)
         """
-        basic_explanation = []
-        detailed_explanation = []
-        
-        # Criar explicação básica
-        basic_explanation.append(f"Identificado: {conclusion}")
-        
-        # Construir uma explicação detalhada baseada nos fatos utilizados
-        detailed_explanation.append(f"**Como chegamos a esta conclusão:**")
-        
-        # Explicar os comportamentos identificados
-        if 'behavior' in facts_used:
-            behaviors = facts_used['behavior']
-            behavior_text = ", ".join(behaviors) if len(behaviors) > 1 else behaviors[0]
-            detailed_explanation.append(f"- Identificamos em seu relato comportamentos de {behavior_text}")
-        
-        # Explicar o contexto, se houver
-        if 'context' in facts_used:
-            contexts = facts_used['context']
-            context_text = ", ".join(contexts) if len(contexts) > 1 else contexts[0]
-            detailed_explanation.append(f"- O incidente ocorreu em um contexto de {context_text}")
-        
-        # Explicar a frequência, se houver
-        if 'frequency' in facts_used:
-            frequencies = facts_used['frequency']
-            freq_text = ", ".join(frequencies) if len(frequencies) > 1 else frequencies[0]
-            detailed_explanation.append(f"- O comportamento ocorre {freq_text}")
-        
-        # Explicar as características do alvo, se houver
-        if 'target' in facts_used:
-            targets = facts_used['target']
-            target_text = ", ".join(targets) if len(targets) > 1 else targets[0]
-            detailed_explanation.append(f"- O comportamento foi direcionado com base em {target_text}")
-        
-        # Explicar o relacionamento, se houver
-        if 'relationship' in facts_used:
-            relationships = facts_used['relationship']
-            rel_text = ", ".join(relationships) if len(relationships) > 1 else relationships[0]
-            detailed_explanation.append(f"- Existe uma relação de {rel_text} entre as partes envolvidas")
-        
-        # Explicar o impacto, se houver
-        if 'impact' in facts_used:
-            impacts = facts_used['impact']
-            impact_text = ", ".join(impacts) if len(impacts) > 1 else impacts[0]
-            detailed_explanation.append(f"- O comportamento causou {impact_text}")
-        
-        # Adicionar raciocínio específico se fornecido
-        if reasoning:
-            detailed_explanation.append(f"\n**Por que isso é importante:** {reasoning}")
-        
-        return basic_explanation + detailed_explanation
+        return ExplanationSystem.format_rule_explanation(facts_used, conclusion, reasoning)
@@ -1,289 +1,200 @@
-from experta.rule import Rule
-from experta import OR
-from .base_engine import BaseViolenceEngine
-from ..facts import (
-    ViolenceBehavior, KeywordFact, TargetFact, FrequencyFact, ProcessingPhase
-)
-
+from .rule_table import RuleSpec, compile_rules, either, keyword, typed
 
-class DiscriminationRulesMixin:
-    """
-    Mixin contendo regras específicas para identificação de diferentes tipos de discriminação.
-    """
 
+DISCRIMINATION_RULES = (
     # DISCRIMINAÇÃO DE GÊNERO
-    @Rule(
-        ProcessingPhase(phase="analysis"),
-        OR(
-            ViolenceBehavior(behavior_type="exclusao"),
-            KeywordFact(category="action_type", keyword="exclusao")
+    RuleSpec(
+        name="detect_discriminacao_flagrante",
+        doc="Detecta discriminação flagrante baseada em gênero ou orientação sexual.",
+        violence_type="discriminacao_genero",
+        subtype="discriminacao_flagrante",
+        conditions=(
+            either("action_type", "exclusao"),
+            either("target", "genero", "orientacao_sexual"),
         ),
-        OR(
-            TargetFact(characteristic="genero"),
-            TargetFact(characteristic="orientacao_sexual"),
-            KeywordFact(category="target", keyword="genero"),
-            KeywordFact(category="target", keyword="orientacao_sexual")
-        )
-    )
-    def detect_discriminacao_flagrante(self):
-        """Detecta discriminação flagrante baseada em gênero ou orientação sexual."""
-        self.create_classification("discriminacao_genero", "discriminacao_flagrante", [
+        explanations=(
             "Identificado comportamento de exclusão",
-            "Direcionado a características de gênero ou orientação sexual"
-        ])
-
-    @Rule(
-        ProcessingPhase(phase="analysis"),
-        OR(
-            ViolenceBehavior(behavior_type="questionamento_capacidade"),
-            KeywordFact(category="action_type", keyword="questionamento_capacidade")
+            "Direcionado a características de gênero ou orientação sexual",
         ),
-        OR(
-            TargetFact(characteristic="genero"),
-            KeywordFact(category="target", keyword="genero")
+    ),
+    RuleSpec(
+        name="detect_discriminacao_sutil",
+        doc="Detecta discriminação sutil baseada em gênero.",
+        violence_type="discriminacao_genero",
+        subtype="discriminacao_sutil",
+        conditions=(
+            either("action_type", "questionamento_capacidade"),
+            either("target", "genero"),
+            either("frequency", "repetidamente", "continuamente"),
         ),
-        OR(
-            FrequencyFact(value="repetidamente"),
-            FrequencyFact(value="continuamente"),
-            KeywordFact(category="frequency", keyword="repetidamente"),
-            KeywordFact(category="frequency", keyword="continuamente")
-        )
-    )
-    def detect_discriminacao_sutil(self):
-        """Detecta discriminação sutil baseada em gênero."""
-        self.create_classification("discriminacao_genero", "discriminacao_sutil", [
+        explanations=(
             "Identificado comportamento de questionamento de capacidade",
             "Direcionado a características de gênero",
-            "Ocorre repetidamente ou continuamente"
-        ])
+            "Ocorre repetidamente ou continuamente",
+        ),
+    ),
 
     # DISCRIMINAÇÃO RACIAL
-    @Rule(
-        ProcessingPhase(phase="analysis"),
-        OR(
-            ViolenceBehavior(behavior_type="insulto"),
-            ViolenceBehavior(behavior_type="piadas_estereotipos"),
-            KeywordFact(category="action_type", keyword="insulto"),
-            KeywordFact(category="action_type", keyword="piadas_estereotipos")
+    RuleSpec(
+        name="detect_discriminacao_racial_direta",
+        doc="Detecta discriminação racial direta.",
+        violence_type="discriminacao_racial",
+        subtype="ofensa_direta",
+        conditions=(
+            either("action_type", "insulto", "piadas_estereotipos"),
+            either("target", "raca_etnia"),
         ),
-        OR(
-            TargetFact(characteristic="raca_etnia"),
-            KeywordFact(category="target", keyword="raca_etnia")
-        )
-    )
-    def detect_discriminacao_racial_direta(self):
-        """Detecta discriminação racial direta."""
-        facts_used = {}
-        
-        # Verificar comportamentos identificados
-        behaviors = []
-        for fact_id in self.get_matching_facts(ViolenceBehavior):
-            behavior = self.facts[fact_id]["behavior_type"]
-            if behavior in ["insulto", "piadas_estereotipos"]:
-                behaviors.append(behavior)
-        
-        if behaviors:
-            facts_used["behavior"] = behaviors
-            
-        # Verificar características do alvo
-        targets = []
-        for fact_id in self.get_matching_facts(TargetFact):
-            target = self.facts[fact_id]["characteristic"]
-            if target == "raca_etnia":
-                targets.append(target)
-        
-        if targets:
-            facts_used["target"] = targets
-            
-        reasoning = "A discriminação racial direta por meio de insultos ou estereótipos configura crime de racismo ou injúria racial, conforme a Lei 7.716/89 e art. 140 do Código Penal, sendo inafiançável e imprescritível."
-        
-        self.create_classification(
-            "discriminacao_racial", 
-            "ofensa_direta", 
-            facts_used=facts_used,
-            reasoning=reasoning
-        )
-
-    @Rule(
-        ProcessingPhase(phase="analysis"),
-        OR(
-            KeywordFact(category="action_type", keyword="insulto_racial")
+        reasoning="A discriminação racial direta por meio de insultos ou estereótipos configura crime de racismo ou injúria racial, conforme a Lei 7.716/89 e art. 140 do Código Penal, sendo inafiançável e imprescritível.",
+    ),
+    RuleSpec(
+        name="detect_discriminacao_racial_ofensa",
+        doc="Detecta ofensa racial.",
+        violence_type="discriminacao_racial",
+        subtype="ofensa_direta",
+        conditions=(
+            keyword("action_type", "insulto_racial"),
+            either("target", "raca_etnia"),
         ),
-        OR(
-            TargetFact(characteristic="raca_etnia"),
-            KeywordFact(category="target", keyword="raca_etnia")
-        )
-    )
-    def detect_discriminacao_racial_ofensa(self):
-        """Detecta ofensa racial."""
-        self.create_classification("discriminacao_racial", "ofensa_direta", [
+        explanations=(
             "Identificada ofensa verbal de natureza racial",
-            "Direcionada à raça/etnia da vítima"
-        ])
-
-    @Rule(
-        ProcessingPhase(phase="analysis"),
-        KeywordFact(category="action_type", keyword="insulto_racial"),
-        TargetFact(characteristic="raca_etnia")
-    )
-    def detect_discriminacao_racial_direta_insulto(self):
-        """Detecta insulto racial direto."""
-        self.create_classification("discriminacao_racial", "ofensa_direta", [
+            "Direcionada à raça/etnia da vítima",
+        ),
+    ),
+    RuleSpec(
+        name="detect_discriminacao_racial_direta_insulto",
+        doc="Detecta insulto racial direto.",
+        violence_type="discriminacao_racial",
+        subtype="ofensa_direta",
+        conditions=(
+            keyword("action_type", "insulto_racial"),
+            typed("target", "raca_etnia"),
+        ),
+        explanations=(
             "Identificada ofensa verbal explícita de natureza racial",
-            "Direcionada especificamente à raça/etnia da vítima"
-        ])
-
-    @Rule(
-        ProcessingPhase(phase="analysis"),
-        ViolenceBehavior(behavior_type="insulto_racial"),
-        OR(
-            TargetFact(characteristic="raca_etnia"),
-            KeywordFact(category="target", keyword="raca_etnia")
-        )
-    )
-    def detect_discriminacao_racial_comportamento(self):
-        """Detecta comportamento de insulto racial."""
-        self.create_classification("discriminacao_racial", "ofensa_direta", [
+            "Direcionada especificamente à raça/etnia da vítima",
+        ),
+    ),
+    RuleSpec(
+        name="detect_discriminacao_racial_comportamento",
+        doc="Detecta comportamento de insulto racial.",
+        violence_type="discriminacao_racial",
+        subtype="ofensa_direta",
+        conditions=(
+            typed("action_type", "insulto_racial"),
+            either("target", "raca_etnia"),
+        ),
+        explanations=(
             "Identificado comportamento de insulto racial",
-            "Direcionado à raça/etnia da vítima"
-        ])
-
-    @Rule(
-        ProcessingPhase(phase="analysis"),
-        KeywordFact(category="action_type", keyword="insulto_racial")
-    )
-    def detect_insulto_racial_simples(self):
-        """Detecta menção simples a insulto racial."""
-        self.create_classification("discriminacao_racial", "ofensa_direta", [
-            "Identificada menção a insulto racial"
-        ])
+            "Direcionado à raça/etnia da vítima",
+        ),
+    ),
+    RuleSpec(
+        name="detect_insulto_racial_simples",
+        doc="Detecta menção simples a insulto racial.",
+        violence_type="discriminacao_racial",
+        subtype="ofensa_direta",
+        conditions=(keyword("action_type", "insulto_racial"),),
+        explanations=("Identificada menção a insulto racial",),
+    ),
 
     # DISCRIMINAÇÃO RELIGIOSA
-    @Rule(
-        ProcessingPhase(phase="analysis"),
-        OR(
-            ViolenceBehavior(behavior_type="zombaria_religiao"),
-            KeywordFact(category="action_type", keyword="zombaria_religiao")
+    RuleSpec(
+        name="detect_ofensa_religiosa_direta",
+        doc="Detecta ofensa religiosa direta.",
+        violence_type="discriminacao_religiosa",
+        subtype="ofensa_direta",
+        conditions=(
+            either("action_type", "zombaria_religiao"),
+            either("target", "religiao"),
         ),
-        OR(
-            TargetFact(characteristic="religiao"),
-            KeywordFact(category="target", keyword="religiao")
-        )
-    )
-    def detect_ofensa_religiosa_direta(self):
-        """Detecta ofensa religiosa direta."""
-        self.create_classification("discriminacao_religiosa", "ofensa_direta", [
+        explanations=(
             "Identificada zombaria ou piadas sobre religião",
-            "Direcionada a características religiosas da vítima"
-        ])
-
-    @Rule(
-        ProcessingPhase(phase="analysis"),
-        OR(
-            ViolenceBehavior(behavior_type="impedimento_pratica_religiosa"),
-            KeywordFact(category="action_type", keyword="impedimento_pratica_religiosa")
-        )
-    )
-    def detect_discriminacao_religiosa_institucional(self):
-        """Detecta discriminação religiosa institucional."""
-        self.create_classification("discriminacao_religiosa", "discriminacao_institucional", [
-            "Identificado impedimento de práticas religiosas"
-        ])
+            "Direcionada a características religiosas da vítima",
+        ),
+    ),
+    RuleSpec(
+        name="detect_discriminacao_religiosa_institucional",
+        doc="Detecta discriminação religiosa institucional.",
+        violence_type="discriminacao_religiosa",
+        subtype="discriminacao_institucional",
+        conditions=(either("action_type", "impedimento_pratica_religiosa"),),
+        explanations=("Identificado impedimento de práticas religiosas",),
+    ),
 
     # GORDOFOBIA
-    @Rule(
-        ProcessingPhase(phase="analysis"),
-        OR(
-            ViolenceBehavior(behavior_type="comentarios_sobre_peso"),
-            ViolenceBehavior(behavior_type="piadas_sobre_peso"),
-            KeywordFact(category="action_type", keyword="comentarios_sobre_peso"),
-            KeywordFact(category="action_type", keyword="piadas_sobre_peso")
-        )
-    )
-    def detect_gordofobia_direta(self):
-        """Detecta gordofobia direta."""
-        self.create_classification("gordofobia", "discriminacao_direta", [
-            "Identificados comentários ou piadas sobre peso/corpo"
-        ])
-
-    @Rule(
-        ProcessingPhase(phase="analysis"),
-        OR(
-            ViolenceBehavior(behavior_type="exclusao_por_peso"),
-            KeywordFact(category="action_type", keyword="exclusao_por_peso")
-        )
-    )
-    def detect_gordofobia_estrutural(self):
-        """Detecta gordofobia estrutural."""
-        self.create_classification("gordofobia", "discriminacao_estrutural", [
-            "Identificada exclusão baseada em peso/aparência física"
-        ])
+    RuleSpec(
+        name="detect_gordofobia_direta",
+        doc="Detecta gordofobia direta.",
+        violence_type="gordofobia",
+        subtype="discriminacao_direta",
+        conditions=(either("action_type", "comentarios_sobre_peso", "piadas_sobre_peso"),),
+        explanations=("Identificados comentários ou piadas sobre peso/corpo",),
+    ),
+    RuleSpec(
+        name="detect_gordofobia_estrutural",
+        doc="Detecta gordofobia estrutural.",
+        violence_type="gordofobia",
+        subtype="discriminacao_estrutural",
+        conditions=(either("action_type", "exclusao_por_peso"),),
+        explanations=("Identificada exclusão baseada em peso/aparência física",),
+    ),
 
     # CAPACITISMO
-    @Rule(
-        ProcessingPhase(phase="analysis"),
-        OR(
-            ViolenceBehavior(behavior_type="negacao_acessibilidade"),
-            KeywordFact(category="action_type", keyword="negacao_acessibilidade")
-        )
-    )
-    def detect_barreiras_fisicas(self):
-        """Detecta capacitismo por barreiras físicas."""
-        self.create_classification("capacitismo", "barreiras_fisicas", [
-            "Identificada negação de acessibilidade ou barreiras físicas"
-        ])
-
-    @Rule(
-        ProcessingPhase(phase="analysis"),
-        OR(
-            ViolenceBehavior(behavior_type="infantilizacao"),
-            KeywordFact(category="action_type", keyword="infantilizacao")
+    RuleSpec(
+        name="detect_barreiras_fisicas",
+        doc="Detecta capacitismo por barreiras físicas.",
+        violence_type="capacitismo",
+        subtype="barreiras_fisicas",
+        conditions=(either("action_type", "negacao_acessibilidade"),),
+        explanations=("Identificada negação de acessibilidade ou barreiras físicas",),
+    ),
+    RuleSpec(
+        name="detect_barreiras_atitudinais",
+        doc="Detecta capacitismo por barreiras atitudinais.",
+        violence_type="capacitismo",
+        subtype="barreiras_atitudinais",
+        conditions=(
+            either("action_type", "infantilizacao"),
+            either("target", "deficiencia"),
         ),
-        OR(
-            TargetFact(characteristic="deficiencia"),
-            KeywordFact(category="target", keyword="deficiencia")
-        )
-    )
-    def detect_barreiras_atitudinais(self):
-        """Detecta capacitismo por barreiras atitudinais."""
-        self.create_classification("capacitismo", "barreiras_atitudinais", [
+        explanations=(
             "Identificado comportamento de infantilização",
-            "Direcionado a pessoa com deficiência"
-        ])
+            "Direcionado a pessoa com deficiência",
+        ),
+    ),
 
     # XENOFOBIA
-    @Rule(
-        ProcessingPhase(phase="analysis"),
-        OR(
-            ViolenceBehavior(behavior_type="piada_sotaque"),
-            KeywordFact(category="action_type", keyword="piada_sotaque")
+    RuleSpec(
+        name="detect_discriminacao_regional",
+        doc="Detecta discriminação regional.",
+        violence_type="xenofobia",
+        subtype="discriminacao_regional",
+        conditions=(
+            either("action_type", "piada_sotaque"),
+            either("target", "origem_regional"),
         ),
-        OR(
-            TargetFact(characteristic="origem_regional"),
-            KeywordFact(category="target", keyword="origem_regional")
-        )
-    )
-    def detect_discriminacao_regional(self):
-        """Detecta discriminação regional."""
-        self.create_classification("xenofobia", "discriminacao_regional", [
+        explanations=(
             "Identificadas piadas ou comentários sobre sotaque",
-            "Direcionados à origem regional da vítima"
-        ])
-
-    @Rule(
-        ProcessingPhase(phase="analysis"),
-        OR(
-            ViolenceBehavior(behavior_type="discriminacao_origem"),
-            KeywordFact(category="action_type", keyword="discriminacao_origem")
+            "Direcionados à origem regional da vítima",
+        ),
+    ),
+    RuleSpec(
+        name="detect_xenofobia_internacional",
+        doc="Detecta xenofobia internacional.",
+        violence_type="xenofobia",
+        subtype="xenofobia_internacional",
+        conditions=(
+            either("action_type", "discriminacao_origem"),
+            either("target", "origem_estrangeira"),
         ),
-        OR(
-            TargetFact(characteristic="origem_estrangeira"),
-            KeywordFact(category="target", keyword="origem_estrangeira")
-        )
-    )
-    def detect_xenofobia_internacional(self):
-        """Detecta xenofobia internacional."""
-        self.create_classification("xenofobia", "xenofobia_internacional", [
+        explanations=(
             "Identificada discriminação baseada em origem",
-            "Direcionada à origem estrangeira da vítima"
-        ])
+            "Direcionada à origem estrangeira da vítima",
+        ),
+    ),
+)
+
+DiscriminationRulesMixin = compile_rules(
+    "DiscriminationRulesMixin", DISCRIMINATION_RULES,
+    doc="Mixin contendo regras específicas para identificação de diferentes tipos de discriminação."
+)
@@ -1,75 +1,145 @@
-from typing import Dict, List, Any
-from knowledge_base.violence_types import VIOLENCE_TYPES
+from typing import Dict, Iterable, List, Any, NamedTuple, Optional, Sequence, Tuple
+from knowledge_base.explanation_bundles import ExplanationBundle, build_explanation_bundles, lookup_bundle
+from knowledge_base.reloadable import current_version
+
+
+class ExplanationRecord(NamedTuple):
+    """
+    Registro compacto de uma classificação: regra, fatos que a ativaram e
+    raciocínio. O texto em linguagem natural só é gerado em `render()`.
+    (NamedTuple: é criado a cada disparo e guardado no fato, então precisa ser
+    imutável e barato. O raciocínio é a própria string constante da regra,
+    referenciada e não copiada, e vai junto quando o registro é serializado
+    para outro processo.)
+    """
+    rule_name: str
+    violence_type: str
+    subtype: str = ""
+    facts_used: Tuple[Tuple[str, Tuple[str, ...]], ...] = ()
+    reasoning: Optional[str] = None
+    lines: Tuple[str, ...] = ()  # explicações simples, já prontas
+
+    @classmethod
+    def from_facts(cls, rule_name: str, violence_type: str, subtype: str,
+                   facts_used: Dict[str, List[str]], reasoning: Optional[str] = None) -> "ExplanationRecord":
+        facts = tuple([(key, tuple(values)) for key, values in facts_used.items()])
+        return cls(rule_name, violence_type, subtype, facts, reasoning or None)
+
+    def render(self) -> List[str]:
+        """Gera as linhas de explicação (mesmo texto de format_detailed_explanation)."""
+        if not self.facts_used:
+            return list(self.lines)
+        conclusion = self.violence_type + (f" do tipo {self.subtype}" if self.subtype else "")
+        return ExplanationSystem.format_rule_explanation(dict(self.facts_used), conclusion, self.reasoning)
+
+
+def render_explanations(records: Iterable[ExplanationRecord]) -> List[str]:
+    """Concatena as linhas dos registros, sem repetir linhas."""
+    lines: List[str] = []
+    for record in records:
+        for line in record.render():
+            if line not in lines:
+                lines.append(line)
+    return lines
+
+
+class LazyExplanation(Sequence):
+    """
+    Lista de explicações renderizada no primeiro acesso.
+    Resultados que nunca são exibidos não pagam a formatação do texto.
+    """
+    __slots__ = ("records", "_lines")
+
+    def __init__(self, records: Iterable[ExplanationRecord]):
+        self.records = tuple(records)
+        self._lines: Optional[List[str]] = None
+
+    @property
+    def rendered(self) -> bool:
+        return self._lines is not None
+
+    def _render(self) -> List[str]:
+        if self._lines is None:
+            self._lines = render_explanations(self.records)
+        return self._lines
+
+    def __getitem__(self, index):
+        return self._render()[index]
+
+    def __len__(self) -> int:
+        return len(self._render())
+
+    def __iter__(self):
+        return iter(self._render())
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, LazyExplanation):
+            return self.records == other.records
+        if isinstance(other, (list, tuple)):
+            return list(self._render()) == list(other)
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash(self.records)
+
+    def __repr__(self) -> str:
+        state = repr(self._lines) if self.rendered else f"{len(self.records)} registro(s) não renderizado(s)"
+        return f"LazyExplanation({state})"
 
 
 class ExplanationSystem:
     """
     Sistema responsável por gerar explicações detalhadas sobre as classificações de violência.
+
+    Os dados de cada tipo/subtipo vêm dos pacotes pré-resolvidos da versão
+    atual da base de conhecimento (knowledge_base/explanation_bundles.py).
     """
     
+    @staticmethod
+    def get_bundle(violence_type: str, subtype: str = None) -> ExplanationBundle:
+        """
+        Retorna o pacote de explicação (herança subtipo → tipo já aplicada).
+        """
+        kb = current_version()
+        bundles = kb.explanation_bundles
+        if bundles is None:
+            bundles = build_explanation_bundles(kb.manager)
+        return lookup_bundle(bundles, violence_type, subtype)
+    
     @staticmethod
     def get_violence_definition(violence_type: str, subtype: str = None) -> str:
         """
         Retorna a definição de um tipo/subtipo de violência.
         """
-        info = VIOLENCE_TYPES.get(violence_type, {})
-        
-        if subtype and 'subtipos' in info and subtype in info['subtipos']:
-            return info['subtipos'][subtype].get('definicao', '')
-        
-        return info.get('definicao', '')
+        return ExplanationSystem.get_bundle(violence_type, subtype).definition
     
     @staticmethod
     def get_legal_context(violence_type: str, subtype: str = None) -> str:
         """
         Retorna o contexto legal para um tipo/subtipo de violência.
         """
-        info = VIOLENCE_TYPES.get(violence_type, {})
-        
-        if subtype and 'subtipos' in info and subtype in info['subtipos']:
-            subtype_info = info['subtipos'][subtype]
-            return subtype_info.get('contexto_legal', info.get('contexto_legal', ''))
-        
-        return info.get('contexto_legal', '')
+        return ExplanationSystem.get_bundle(violence_type, subtype).legal_context
     
     @staticmethod
     def get_severity_level(violence_type: str, subtype: str = None) -> str:
         """
         Retorna o nível de gravidade de um tipo/subtipo de violência.
         """
-        info = VIOLENCE_TYPES.get(violence_type, {})
-        
-        if subtype and 'subtipos' in info and subtype in info['subtipos']:
-            subtype_info = info['subtipos'][subtype]
-            return subtype_info.get('gravidade', info.get('gravidade', ''))
-        
-        return info.get('gravidade', '')
+        return ExplanationSystem.get_bundle(violence_type, subtype).severity
     
     @staticmethod
-    def get_recommendations(violence_type: str, subtype: str = None) -> List[str]:
+    def get_recommendations(violence_type: str, subtype: str = None) -> Sequence[str]:
         """
         Retorna as recomendações para um tipo/subtipo de violência.
         """
-        info = VIOLENCE_TYPES.get(violence_type, {})
-        
-        if subtype and 'subtipos' in info and subtype in info['subtipos']:
-            subtype_info = info['subtipos'][subtype]
-            return subtype_info.get('recomendacoes', info.get('recomendacoes', []))
-        
-        return info.get('recomendacoes', [])
+        return ExplanationSystem.get_bundle(violence_type, subtype).recommendations
     
     @staticmethod
-    def get_reporting_channels(violence_type: str, subtype: str = None) -> List[str]:
+    def get_reporting_channels(violence_type: str, subtype: str = None) -> Sequence[str]:
         """
         Retorna os canais de denúncia para um tipo/subtipo de violência.
         """
-        info = VIOLENCE_TYPES.get(violence_type, {})
-        
-        if subtype and 'subtipos' in info and subtype in info['subtipos']:
-            subtype_info = info['subtipos'][subtype]
-            return subtype_info.get('canais_denuncia', info.get('canais_denuncia', []))
-        
-        return info.get('canais_denuncia', [])
+        return ExplanationSystem.get_bundle(violence_type, subtype).reporting_channels
     
     @staticmethod
     def format_complete_explanation(violence_type: str, subtype: str = None, 
@@ -78,20 +148,82 @@ class ExplanationSystem:
         Formata uma explicação completa incluindo definição, contexto legal, 
         recomendações e análise dos fatos.
         """
+        bundle = ExplanationSystem.get_bundle(violence_type, subtype)
         explanation = {
             'type': violence_type,
             'subtype': subtype or '',
-            'definition': ExplanationSystem.get_violence_definition(violence_type, subtype),
-            'legal_context': ExplanationSystem.get_legal_context(violence_type, subtype),
-            'severity': ExplanationSystem.get_severity_level(violence_type, subtype),
-            'recommendations': ExplanationSystem.get_recommendations(violence_type, subtype),
-            'reporting_channels': ExplanationSystem.get_reporting_channels(violence_type, subtype),
+            'definition': bundle.definition,
+            'legal_context': bundle.legal_context,
+            'severity': bundle.severity,
+            'recommendations': bundle.recommendations,
+            'reporting_channels': bundle.reporting_channels,
             'analysis': ExplanationSystem.format_fact_analysis(facts_used) if facts_used else [],
             'reasoning': reasoning or ''
         }
         
         return explanation
     
+    @staticmethod
+    def format_rule_explanation(facts_used: Dict, conclusion: str, reasoning: str = None) -> List[str]:
+        """
+        Gera uma explicação detalhada em linguagem natural baseada nos fatos que ativaram a regra.
+        
+        Args:
+            facts_used: Dicionário dos fatos relevantes que ativaram a regra
+            conclusion: A conclusão alcançada pela regra
+            reasoning: Explicação adicional do raciocínio (opcional)
+        """
+        basic_explanation = []
+        detailed_explanation = []
+        
+        # Criar explicação básica
+        basic_explanation.append(f"Identificado: {conclusion}")
+        
+        # Construir uma explicação detalhada baseada nos fatos utilizados
+        detailed_explanation.append(f"**Como chegamos a esta conclusão:**")
+        
+        # Explicar os comportamentos identificados
+        if 'behavior' in facts_used:
+            behaviors = facts_used['behavior']
+            behavior_text = ", ".join(behaviors) if len(behaviors) > 1 else behaviors[0]
+            detailed_explanation.append(f"- Identificamos em seu relato comportamentos de {behavior_text}")
+        
+        # Explicar o contexto, se houver
+        if 'context' in facts_used:
+            contexts = facts_used['context']
+            context_text = ", ".join(contexts) if len(contexts) > 1 else contexts[0]
+            detailed_explanation.append(f"- O incidente ocorreu em um contexto de {context_text}")
+        
+        # Explicar a frequência, se houver
+        if 'frequency' in facts_used:
+            frequencies = facts_used['frequency']
+            freq_text = ", ".join(frequencies) if len(frequencies) > 1 else frequencies[0]
+            detailed_explanation.append(f"- O comportamento ocorre {freq_text}")
+        
+        # Explicar as características do alvo, se houver
+        if 'target' in facts_used:
+            targets = facts_used['target']
+            target_text = ", ".join(targets) if len(targets) > 1 else targets[0]
+            detailed_explanation.append(f"- O comportamento foi direcionado com base em {target_text}")
+        
+        # Explicar o relacionamento, se houver
+        if 'relationship' in facts_used:
+            relationships = facts_used['relationship']
+            rel_text = ", ".join(relationships) if len(relationships) > 1 else relationships[0]
+            detailed_explanation.append(f"- Existe uma relação de {rel_text} entre as partes envolvidas")
+        
+        # Explicar o impacto, se houver
+        if 'impact' in facts_used:
+            impacts = facts_used['impact']
+            impact_text = ", ".join(impacts) if len(impacts) > 1 else impacts[0]
+            detailed_explanation.append(f"- O comportamento causou {impact_text}")
+        
+        # Adicionar raciocínio específico se fornecido
+        if reasoning:
+            detailed_explanation.append(f"\n**Por que isso é importante:** {reasoning}")
+        
+        return basic_explanation + detailed_explanation
+
     @staticmethod
     def format_fact_analysis(facts_used: Dict) -> List[str]:
         """
@@ -0,0 +1,115 @@
+"""
+Índice dos requisitos das regras para perguntas de follow-up locais.
+
+Cada RuleSpec exige um conjunto de condições (categoria, valores aceitos).
+Dado o conjunto atual de palavras-chave, o índice encontra as regras "quase
+satisfeitas": todas as condições atendidas exceto uma, cuja categoria ainda
+não tem nenhuma palavra-chave. Perguntar por essa categoria (FIELDS_QUESTIONS)
+pode desbloquear a classificação; as categorias são ordenadas pela maior
+gravidade que desbloqueiam.
+
+O custo é proporcional às palavras-chave presentes (listas invertidas por
+(categoria, valor)), sem chamada ao LLM.
+"""
+from typing import Callable, Dict, Iterable, List, Mapping, NamedTuple, Optional, Set, Tuple
+
+from .rule_table import RuleSpec
+
+Target = Tuple[str, str]
+
+
+class NearMiss(NamedTuple):
+    """Regra que depende de uma única categoria ausente."""
+    rule_name: str
+    target: Target
+    missing_category: str
+    severity: int
+
+
+def collect_rule_specs(engine_class: type) -> Tuple[RuleSpec, ...]:
+    """Reúne as tabelas `rule_specs` de todos os mixins do motor (na ordem do MRO)."""
+    specs: List[RuleSpec] = []
+    for cls in engine_class.__mro__:
+        specs.extend(vars(cls).get("rule_specs", ()))
+    return tuple(specs)
+
+
+class RequirementIndex:
+    """
+    Listas invertidas (categoria, valor) -> condições de regra satisfeitas.
+
+    Args:
+        specs: Tabelas de regras (RuleSpec)
+        severity: Função (tipo, subtipo) -> score de gravidade
+    """
+    __slots__ = ("specs", "_postings", "_severity", "_single_condition")
+
+    def __init__(self, specs: Iterable[RuleSpec], severity: Callable[[str, Optional[str]], int]):
+        self.specs: Tuple[RuleSpec, ...] = tuple(specs)
+        self._postings: Dict[Tuple[str, str], List[Tuple[int, int]]] = {}
+        self._severity: List[int] = []
+        for rule, spec in enumerate(self.specs):
+            for cond, condition in enumerate(spec.conditions):
+                for value in condition.values:
+                    self._postings.setdefault((condition.category, value), []).append((rule, cond))
+            self._severity.append(severity(spec.violence_type, spec.subtype))
+        # Regras de uma só condição são "quase satisfeitas" sem nenhuma palavra-chave
+        self._single_condition = [rule for rule, spec in enumerate(self.specs) if len(spec.conditions) == 1]
+
+    def near_misses(self, keywords: Mapping[str, Iterable[str]],
+                    exclude: Iterable[Target] = ()) -> List[NearMiss]:
+        """
+        Regras com exatamente uma condição não atendida cuja categoria está
+        ausente em `keywords`. Alvos em `exclude` (já classificados) são ignorados.
+        """
+        present = {category for category, values in keywords.items() if values}
+        satisfied: Dict[int, Set[int]] = {}
+        for category, values in keywords.items():
+            for value in values:
+                for rule, cond in self._postings.get((category, value), ()):
+                    satisfied.setdefault(rule, set()).add(cond)
+
+        excluded = {(vtype, subtype or "") for vtype, subtype in exclude}
+        candidates = set(satisfied).union(self._single_condition)
+        misses = []
+        for rule in sorted(candidates):
+            spec = self.specs[rule]
+            met = satisfied.get(rule, ())
+            if len(met) != len(spec.conditions) - 1:
+                continue
+            missing = next(c for i, c in enumerate(spec.conditions) if i not in met)
+            target = (spec.violence_type, spec.subtype or "")
+            if missing.category in present or target in excluded:
+                continue
+            misses.append(NearMiss(spec.name, target, missing.category, self._severity[rule]))
+        return misses
+
+    def rank_missing_categories(self, keywords: Mapping[str, Iterable[str]],
+                                exclude: Iterable[Target] = ()) -> List[Tuple[str, int, int]]:
+        """
+        Categorias ausentes como (categoria, maior gravidade desbloqueada,
+        número de alvos desbloqueados), da mais para a menos relevante.
+        """
+        unlocked: Dict[str, Dict[Target, int]] = {}
+        for miss in self.near_misses(keywords, exclude):
+            targets = unlocked.setdefault(miss.missing_category, {})
+            targets[miss.target] = max(targets.get(miss.target, 0), miss.severity)
+        ranked = [(category, max(targets.values()), len(targets)) for category, targets in unlocked.items()]
+        ranked.sort(key=lambda item: (-item[1], -item[2], item[0]))
+        return ranked
+
+    def select_questions(self, keywords: Mapping[str, Iterable[str]],
+                         fields_questions: Mapping[str, str], limit: int = 3,
+                         exclude: Iterable[Target] = ()) -> List[Tuple[str, str]]:
+        """
+        Escolhe até `limit` perguntas do FIELDS_QUESTIONS, como (categoria,
+        pergunta), pelas categorias que desbloqueiam as classificações mais graves.
+        """
+        selected = []
+        for category, _, _ in self.rank_missing_categories(keywords, exclude):
+            question = fields_questions.get(category)
+            if question:
+                selected.append((category, question))
+                if len(selected) == limit:
+                    break
+        return selected
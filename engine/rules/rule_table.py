@@ -0,0 +1,256 @@
+"""
+Tabelas declarativas de regras e seu compilador.
+
+As regras de classificação seguem quase todas o mesmo formato: grupos OR
+(fato tipado ou KeywordFact) + classificação resultante com explicação
+simples ou raciocínio detalhado. Cada mixin descreve suas
+regras como uma tupla de RuleSpec, e `compile_rules` gera a classe com as
+regras Experta correspondentes.
+
+O compilador reaproveita a mesma instância de padrão para condições iguais, e
+o SharedJoinReteMatcher compartilha os nós de junção (beta) de prefixos de
+condições idênticos entre regras, reduzindo o tamanho da rede e o custo de
+propagação de cada fato.
+"""
+from copy import copy
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from experta import OR
+from experta.fact import Fact
+from experta.rule import Rule
+from experta.matchers import ReteMatcher
+from experta.matchers.rete.check import SameContextCheck
+from experta.matchers.rete.nodes import ConflictSetNode, OrdinaryMatchNode
+from experta.matchers.rete.utils import wire_rule
+
+# Atributos de memória dos nós Rete (OrdinaryMatchNode, NotNode, ConflictSetNode)
+NODE_MEMORIES = ("left_memory", "right_memory", "memory")
+
+from ..facts import CATEGORY_FACTS, KeywordFact
+
+# Chave usada em facts_used (format_detailed_explanation) para cada categoria
+EVIDENCE_KEYS = {
+    "action_type": "behavior",
+    "frequency": "frequency",
+    "context": "context",
+    "target": "target",
+    "relationship": "relationship",
+    "impact": "impact",
+}
+
+
+@dataclass(frozen=True)
+class Condition:
+    """
+    Grupo OR exigido por uma regra: algum dos `values` da categoria, como
+    fato tipado (ViolenceBehavior, TargetFact, ...) e/ou como KeywordFact.
+    """
+    category: str
+    values: Tuple[str, ...]
+    typed: bool = True
+    keyword: bool = True
+
+
+def either(category: str, *values: str) -> Condition:
+    """Condição satisfeita pelo fato tipado ou pelo KeywordFact."""
+    return Condition(category, values)
+
+
+def typed(category: str, *values: str) -> Condition:
+    """Condição satisfeita apenas pelo fato tipado."""
+    return Condition(category, values, keyword=False)
+
+
+def keyword(category: str, *values: str) -> Condition:
+    """Condição satisfeita apenas pelo KeywordFact."""
+    return Condition(category, values, typed=False)
+
+
+@dataclass(frozen=True)
+class RuleSpec:
+    """
+    Uma linha da tabela de regras.
+
+    Com `reasoning`, a classificação recebe a explicação detalhada montada a
+    partir dos fatos tipados que satisfazem cada condição (mais as categorias
+    de `extra_evidence`, coletadas sem filtro). Sem `reasoning`, usa as
+    `explanations` simples.
+    """
+    name: str
+    violence_type: str
+    subtype: Optional[str]
+    conditions: Tuple[Condition, ...]
+    explanations: Tuple[str, ...] = ()
+    reasoning: Optional[str] = None
+    extra_evidence: Tuple[str, ...] = ()
+    doc: str = ""
+
+
+class PatternPool:
+    """Garante uma única instância de padrão por (classe, campos)."""
+
+    def __init__(self):
+        self._patterns: Dict[tuple, Fact] = {}
+
+    def get(self, fact_class, **fields) -> Fact:
+        key = (fact_class, tuple(sorted(fields.items())))
+        pattern = self._patterns.get(key)
+        if pattern is None:
+            pattern = self._patterns[key] = fact_class(**fields)
+        return pattern
+
+    def __len__(self) -> int:
+        return len(self._patterns)
+
+
+_patterns = PatternPool()
+
+
+def condition_patterns(condition: Condition, pool: PatternPool = _patterns) -> List[Fact]:
+    """Padrões da condição: fatos tipados primeiro, depois os KeywordFact."""
+    patterns = []
+    if condition.typed:
+        fact_class, field = CATEGORY_FACTS[condition.category]
+        patterns.extend(pool.get(fact_class, **{field: value}) for value in condition.values)
+    if condition.keyword:
+        patterns.extend(pool.get(KeywordFact, category=condition.category, keyword=value)
+                        for value in condition.values)
+    return patterns
+
+
+def build_lhs(spec: RuleSpec, pool: PatternPool = _patterns) -> List:
+    """
+    Lado esquerdo da regra: um elemento por condição. Não há padrão de fase:
+    o motor só calcula ativações em `run`, após a inserção dos fatos.
+    """
+    lhs = []
+    for condition in spec.conditions:
+        patterns = condition_patterns(condition, pool)
+        lhs.append(patterns[0] if len(patterns) == 1 else OR(*patterns))
+    return lhs
+
+
+def collect_evidence(engine, spec: RuleSpec) -> Dict[str, List[str]]:
+    """Fatos tipados que sustentam a regra, no formato de facts_used."""
+    facts_used = {}
+    for condition in spec.conditions:
+        fact_class, field = CATEGORY_FACTS[condition.category]
+        found = [engine.facts[fact_id][field] for fact_id in engine.get_matching_facts(fact_class)
+                 if engine.facts[fact_id][field] in condition.values]
+        if found:
+            facts_used[EVIDENCE_KEYS[condition.category]] = found
+    for category in spec.extra_evidence:
+        fact_class, field = CATEGORY_FACTS[category]
+        found = [engine.facts[fact_id][field] for fact_id in engine.get_matching_facts(fact_class)]
+        if found:
+            facts_used[EVIDENCE_KEYS[category]] = found
+    return facts_used
+
+
+def _make_action(spec: RuleSpec):
+    """Gera o lado direito da regra a partir da especificação."""
+    if spec.reasoning is None:
+        def action(self):
+            self.create_classification(spec.violence_type, spec.subtype,
+                                       list(spec.explanations), rule_name=spec.name)
+    else:
+        def action(self):
+            self.create_classification(spec.violence_type, spec.subtype,
+                                       facts_used=collect_evidence(self, spec),
+                                       reasoning=spec.reasoning, rule_name=spec.name)
+    action.__name__ = action.__qualname__ = spec.name
+    action.__doc__ = spec.doc
+    return action
+
+
+def compile_rules(class_name: str, specs: Iterable[RuleSpec], doc: str = "") -> type:
+    """
+    Compila uma tabela de RuleSpec em um mixin com uma regra Experta por linha.
+    As especificações ficam disponíveis em `<mixin>.rule_specs`.
+    """
+    specs = tuple(specs)
+    namespace = {"__doc__": doc, "rule_specs": specs}
+    for spec in specs:
+        if spec.name in namespace:
+            raise ValueError(f"Regra duplicada na tabela: {spec.name}")
+        namespace[spec.name] = Rule(*build_lhs(spec))(_make_action(spec))
+    return type(class_name, (), namespace)
+
+
+class SharedJoinReteMatcher(ReteMatcher):
+    """
+    ReteMatcher que compartilha nós de junção entre regras.
+
+    O ReteMatcher padrão cria uma cadeia nova de OrdinaryMatchNode para cada
+    regra e para cada ramo da DNF, mesmo quando o prefixo de padrões é o
+    mesmo. Aqui cada junção é identificada pelos nós de entrada (esquerdo,
+    direito) e reaproveitada; apenas o ConflictSetNode é exclusivo da regra.
+    Regras com NOT/TEST/EXISTS/FORALL usam a montagem original.
+    """
+
+    def nodes(self) -> List[Any]:
+        """Nós da rede, cada um uma única vez (a rede não muda após a montagem)."""
+        nodes = getattr(self, "_nodes", None)
+        if nodes is None:
+            nodes, seen, pending = [], set(), [self.root_node]
+            while pending:
+                node = pending.pop()
+                if id(node) not in seen:
+                    seen.add(id(node))
+                    nodes.append(node)
+                    pending.extend(child.node for child in node.children)
+            self._nodes = nodes
+        return nodes
+
+    def reset(self):
+        """
+        Limpa a memória de cada nó uma vez. O reset recursivo do Experta
+        revisita os nós de junção compartilhados a partir de cada pai.
+        """
+        for node in self.nodes():
+            node._reset()
+
+    def snapshot(self) -> List[Tuple[Any, Dict[str, Any]]]:
+        """Cópia das memórias não vazias dos nós, para `restore`."""
+        memories = []
+        for node in self.nodes():
+            state = {name: copy(getattr(node, name)) for name in NODE_MEMORIES if getattr(node, name, None)}
+            if state:
+                memories.append((node, state))
+        return memories
+
+    def restore(self, memories: List[Tuple[Any, Dict[str, Any]]]) -> None:
+        """Volta a rede ao estado registrado por `snapshot`."""
+        self.reset()
+        for node, state in memories:
+            for name, value in state.items():
+                setattr(node, name, copy(value))
+
+    def build_beta_part(self, ruleset, alpha_terminals):
+        joins: Dict[Tuple[int, int], OrdinaryMatchNode] = {}
+        for rule in ruleset:
+            branches = rule[0] if isinstance(rule[0], OR) else [rule]
+            for branch in branches:
+                elements = [branch] if isinstance(branch, Fact) else list(branch)
+                if all(isinstance(element, Fact) for element in elements):
+                    self._wire_shared(rule, elements, alpha_terminals, joins)
+                else:
+                    wire_rule(rule, alpha_terminals, lhs=branch)
+
+    @staticmethod
+    def _wire_shared(rule, elements, alpha_terminals, joins) -> None:
+        node = alpha_terminals[elements[0]]
+        for element in elements[1:]:
+            right = alpha_terminals[element]
+            key = (id(node), id(right))
+            join = joins.get(key)
+            if join is None:
+                join = OrdinaryMatchNode(SameContextCheck())
+                node.add_child(join, join.activate_left)
+                right.add_child(join, join.activate_right)
+                joins[key] = join
+            node = join
+
+        conflict_set_node = ConflictSetNode(rule)
+        node.add_child(conflict_set_node, conflict_set_node.activate)
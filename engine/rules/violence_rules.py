@@ -1,9 +1,15 @@
+import threading
+
+from knowledge_base.reloadable import current_version
+
 from .base_engine import BaseViolenceEngine
 from .microaggression_rules import MicroaggressionRulesMixin
 from .sexual_violence_rules import SexualViolenceRulesMixin
 from .discrimination_rules import DiscriminationRulesMixin
 from .harassment_rules import HarassmentRulesMixin
 from .digital_violence_rules import DigitalViolenceRulesMixin
+from .requirement_index import collect_rule_specs
+from .rule_table import compile_rules
 
 
 class ViolenceRules(
@@ -27,11 +33,11 @@ class ViolenceRules(
     - DigitalViolenceRulesMixin: Regras para violência digital
     """
     
-    def __init__(self):
+    def __init__(self, render_explanations: bool = True):
         """
         Inicializa o motor de regras completo.
         """
-        super().__init__()
+        super().__init__(render_explanations=render_explanations)
         print("🔧 Motor de regras ViolenceRules inicializado com todos os módulos")
     
     def get_loaded_modules(self):
@@ -47,3 +53,50 @@ class ViolenceRules(
             "DigitalViolenceRulesMixin - Regras de violência digital"
         ]
         return modules
+
+
+TriageRulesMixin = compile_rules(
+    "TriageRulesMixin",
+    collect_rule_specs(ViolenceRules),
+    doc="Todas as regras de ViolenceRules; a saliência é atribuída por TriageViolenceRules.",
+)
+
+
+class TriageViolenceRules(BaseViolenceEngine, TriageRulesMixin):
+    """
+    Motor de triagem: mesmas regras de ViolenceRules, mas com saliência igual
+    à gravidade do alvo (SEVERITY_RANKING), então as classificações mais
+    graves disparam primeiro. Com `max_results`/`stop_after_severity` em
+    `run_iter`, o motor para assim que as classificações mais graves pedidas
+    são conhecidas, sem disparar as regras de menor gravidade.
+
+    O modo completo continua em ViolenceRules (ordem padrão da agenda).
+    """
+    _salience_fingerprint = None  # versão da base usada na saliência atual das regras
+    _salience_lock = threading.Lock()
+
+    def __init__(self, render_explanations: bool = True):
+        # As regras são copiadas (com a saliência da classe) na construção:
+        # aplicar e construir sob o mesmo lock evita misturar versões
+        with TriageViolenceRules._salience_lock:
+            self.salience_fingerprint = self._apply_severity_salience()
+            super().__init__(render_explanations=render_explanations)
+        print("🔧 Motor de triagem inicializado (saliência por gravidade)")
+
+    @classmethod
+    def _apply_severity_salience(cls) -> str:
+        """
+        Atribui às regras a gravidade da versão atual da base e retorna seu
+        fingerprint. É feito na construção (e não na importação, para não
+        construir a base antes do primeiro acesso) e refeito quando a versão
+        muda. As regras da classe são copiadas pelo Experta em cada motor,
+        então um motor já construído mantém a saliência da sua versão.
+        """
+        version = current_version()
+        if cls._salience_fingerprint == version.fingerprint:
+            return version.fingerprint
+        for spec in TriageRulesMixin.rule_specs:
+            vars(TriageRulesMixin)[spec.name].salience = \
+                version.manager.get_severity_score(spec.violence_type, spec.subtype)
+        TriageViolenceRules._salience_fingerprint = version.fingerprint
+        return version.fingerprint
@@ -1,33 +1,40 @@
 import os
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 import json
 
-from knowledge_base.keywords_dictionary import KEYWORDS_DICT, FIELDS_QUESTIONS
+from knowledge_base.reloadable import current_version
 from utils.groq_integration import GroqAPI
+from utils.timing import StageTimer
 
-from engine.facts import (
-    TextRelato, KeywordFact, ViolenceBehavior, ContextFact, FrequencyFact,
-    TargetFact, RelationshipFact, ImpactFact, create_facts_from_groq_response
-)
+from engine.conversation_context import ConversationContext
+
+from engine.facts import TextRelato, keyword_facts
 
 class TextProcessor:
     """
     Processa texto livre do usuário para extrair fatos e disparar regras.
+
+    O processador costuma ser compartilhado entre usuários (ExpertSystem em
+    cache no main.py), então `conversation_context` é limitado a
+    `context_size` mensagens; o contexto de cada conversa fica na
+    AnalysisSession.
     """
     def __init__(self, api_key: str = None, 
-                 model: str = "meta-llama/llama-4-scout-17b-16e-instruct"):
+                 model: str = "meta-llama/llama-4-scout-17b-16e-instruct",
+                 context_size: int = 8):
 
         self.api_key = api_key if api_key else os.environ.get("GROQ_API_KEY", "")
         self.model = model
         self.groq_api = GroqAPI(api_key=self.api_key, model=self.model)
-        self.conversation_context = []
+        self.conversation_context = ConversationContext(max_messages=context_size)
 
     def process_user_text(self, text: str) -> Dict[str, Any]:
         """
         Processa texto do usuário e retorna informações extraídas (para interface).
         """
-        self.conversation_context.append({"role": "user", "content": text})
-        prompt = self.groq_api.build_prompt(text, KEYWORDS_DICT)
+        self.conversation_context.append(text)
+        kb = current_version()
+        prompt = self.groq_api.build_prompt(text, kb.keywords_dict, fingerprint=kb.fingerprint)
         response = self.groq_api.send_request(prompt)
 
         keywords = response.get("identified_keywords", {})
@@ -51,8 +58,10 @@ class TextProcessor:
         """
         Processa resposta de follow-up para complementar informações.
         """
-        self.conversation_context.append({"role": "user", "content": follow_up_text})
-        prompt = self.groq_api.build_prompt(follow_up_text, KEYWORDS_DICT, is_follow_up=True, missing_fields=missing_fields)
+        self.conversation_context.append(follow_up_text)
+        kb = current_version()
+        prompt = self.groq_api.build_prompt(follow_up_text, kb.keywords_dict, is_follow_up=True,
+                                            missing_fields=missing_fields, fingerprint=kb.fingerprint)
         response = self.groq_api.send_request(prompt)
 
         combined_keywords = self._combine_keywords(previous_keywords, response.get("identified_keywords", {}))
@@ -88,10 +97,16 @@ class TextProcessor:
                 result[category] = values
         return result
     
-    def create_experta_facts(self, text: str) -> List[Any]:
+    def create_experta_facts(self, text: str, timer: Optional[StageTimer] = None,
+                             response: Optional[Dict[str, Any]] = None) -> List[Any]:
         """
         Cria fatos Experta a partir de um texto, para inserção no motor de regras.
+        Se `timer` for fornecido, registra as etapas "prompt", "groq_request",
+        "validation" e "fact_creation".
+        Se `response` for fornecida (palavras-chave já extraídas, pelo Groq ou
+        localmente), o Groq não é consultado.
         """
+        timer = timer or StageTimer()
         print(f"\n🔍 Processando texto para criar fatos: {text[:100]}{'...' if len(text) > 100 else ''}")
         
         # Lista para armazenar os fatos que serão retornados
@@ -99,56 +114,50 @@ class TextProcessor:
         
         try:
             # Extrair palavras-chave usando o Groq
-            prompt = self.groq_api.build_prompt(text, KEYWORDS_DICT)
-            response = self.groq_api.send_request(prompt)
+            if response is None:
+                response = self.extract_keywords(text, timer=timer)
             
-            if "identified_keywords" in response and response["identified_keywords"]:
-                print(f"✅ Palavras-chave identificadas: {json.dumps(response['identified_keywords'], indent=2)}")
-                
-                # Converter resposta em fatos Experta
-                keywords = response["identified_keywords"]
-                
-                for category, values in keywords.items():
-                    for keyword in values:
-                        # Criar fato KeywordFact
-                        kw_fact = KeywordFact(category=category, keyword=keyword)
-                        facts.append(kw_fact)
-                        print(f"📌 Criado fato Experta: KeywordFact(category='{category}', keyword='{keyword}')")
-                        
-                        # Criar fatos específicos correspondentes
-                        if category == "action_type":
-                            behavior_fact = ViolenceBehavior(behavior_type=keyword)
-                            facts.append(behavior_fact)
-                            print(f"📌 Criado fato Experta: ViolenceBehavior(behavior_type='{keyword}')")
-                        
-                        elif category == "context":
-                            context_fact = ContextFact(location=keyword)
-                            facts.append(context_fact)
-                            print(f"📌 Criado fato Experta: ContextFact(location='{keyword}')")
-                        
-                        elif category == "frequency":
-                            freq_fact = FrequencyFact(value=keyword)
-                            facts.append(freq_fact)
-                            print(f"📌 Criado fato Experta: FrequencyFact(value='{keyword}')")
-                        
-                        elif category == "target":
-                            target_fact = TargetFact(characteristic=keyword)
-                            facts.append(target_fact)
-                            print(f"📌 Criado fato Experta: TargetFact(characteristic='{keyword}')")
-                        
-                        elif category == "relationship":
-                            rel_fact = RelationshipFact(type=keyword)
-                            facts.append(rel_fact)
-                            print(f"📌 Criado fato Experta: RelationshipFact(type='{keyword}')")
-                        
-                        elif category == "impact":
-                            impact_fact = ImpactFact(type=keyword)
-                            facts.append(impact_fact)
-                            print(f"📌 Criado fato Experta: ImpactFact(type='{keyword}')")
-            else:
-                print("⚠️ Nenhuma palavra-chave identificada no texto")
+            with timer.span("fact_creation"):
+                self._append_keyword_facts(facts, response)
         
         except Exception as e:
             print(f"❌ Erro ao processar texto: {str(e)}")
         
-        return facts
\ No newline at end of file
+        return facts
+
+    def extract_keywords(self, text: str, timer: Optional[StageTimer] = None,
+                         is_follow_up: bool = False,
+                         missing_fields: Optional[List[str]] = None,
+                         ask_questions: bool = True) -> Dict[str, Any]:
+        """
+        Extrai palavras-chave de um texto via Groq e retorna a resposta validada
+        ("identified_keywords", "missing_information", "follow_up_questions").
+        Se `timer` for fornecido, registra as etapas "prompt", "groq_request" e "validation".
+        Com `ask_questions=False` o LLM não gera perguntas complementares.
+        """
+        timer = timer or StageTimer()
+        with timer.span("prompt"):
+            kb = current_version()
+            prompt = self.groq_api.build_prompt(text, kb.keywords_dict, is_follow_up=is_follow_up,
+                                                missing_fields=missing_fields, fingerprint=kb.fingerprint,
+                                                ask_questions=ask_questions)
+        return self.groq_api.send_request(prompt, timer=timer)
+
+    def _append_keyword_facts(self, facts: List[Any], response: Dict[str, Any]) -> None:
+        """
+        Converte as palavras-chave da resposta validada em fatos Experta.
+        """
+        if "identified_keywords" in response and response["identified_keywords"]:
+            print(f"✅ Palavras-chave identificadas: {json.dumps(response['identified_keywords'], indent=2)}")
+            
+            # Converter resposta em fatos Experta (KeywordFact + fato tipado da categoria)
+            keywords = response["identified_keywords"]
+            
+            for category, values in keywords.items():
+                for keyword in values:
+                    for fact in keyword_facts(category, keyword):
+                        facts.append(fact)
+                        fields = ", ".join(f"{name}={value!r}" for name, value in fact.as_dict().items())
+                        print(f"📌 Criado fato Experta: {type(fact).__name__}({fields})")
+        else:
+            print("⚠️ Nenhuma palavra-chave identificada no texto")
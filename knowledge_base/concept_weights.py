@@ -0,0 +1,218 @@
+"""
+Matriz esparsa de pesos compilada a partir do CONCEPT_MAPPING.
+
+Cada linha é uma palavra-chave extraída (categoria, palavra) e cada coluna
+um alvo (tipo, subtipo); o valor é o peso do CriterionWeights registrado no
+CONCEPT_MAPPING. A matriz é compilada uma única vez por versão da base de
+conhecimento e usada para pontuar as classificações do motor:
+
+- `score(keywords)`: pontuação de um relato em O(palavras-chave extraídas);
+- `score_batch(batch)`: pontuação de vários relatos de uma vez (vetorizada
+  com numpy quando disponível);
+- `confidence(...)`: pontuação normalizada pelo máximo alcançável pelo alvo.
+
+Pesos definidos no nível do tipo (sem subtipo) ficam na coluna (tipo, "").
+"""
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+# Categoria do CONCEPT_MAPPING -> categoria das palavras-chave extraídas
+CONCEPT_FIELDS = {
+    "comportamentos": "action_type",
+    "frequencia": "frequency",
+    "contexto": "context",
+    "caracteristicas_alvo": "target",
+    "relacionamento": "relationship",
+    "impacto": "impact",
+}
+
+Keyword = Tuple[str, str]    # (categoria, palavra-chave)
+Target = Tuple[str, str]     # (tipo, subtipo ou "")
+
+
+def _numpy():
+    """
+    numpy é opcional (sem ele, score_batch pontua relato a relato) e só é
+    importado no primeiro lote, para não pesar no tempo de import do motor.
+    """
+    try:
+        import numpy
+    except ImportError:  # pragma: no cover - depende do ambiente
+        return None
+    return numpy
+
+
+def _iter_weights(concept_mapping: Mapping) -> Iterable[Tuple[Keyword, Target, float]]:
+    """Percorre o CONCEPT_MAPPING produzindo (linha, coluna, peso)."""
+    for concept, keywords in concept_mapping.items():
+        category = CONCEPT_FIELDS.get(concept)
+        if category is None:
+            continue
+        for keyword, targets in keywords.items():
+            for violence_type, value in targets.items():
+                if isinstance(value, Mapping):
+                    for subtype, weight in value.items():
+                        yield (category, keyword), (violence_type, subtype), float(weight)
+                else:
+                    yield (category, keyword), (violence_type, ""), float(value)
+
+
+class ConceptWeightMatrix:
+    """
+    Matriz palavra-chave x (tipo, subtipo) em formato CSR (linhas comprimidas).
+
+    Args:
+        entries: Triplas (linha, coluna, peso); pesos repetidos são somados
+    """
+    __slots__ = ("rows", "columns", "_row_index", "_column_index",
+                 "_row_ptr", "_col_idx", "_data", "_max_scores", "_dense_weights")
+
+    def __init__(self, entries: Iterable[Tuple[Keyword, Target, float]]):
+        cells: Dict[Keyword, Dict[int, float]] = {}
+        self._column_index: Dict[Target, int] = {}
+        for row, column, weight in entries:
+            col = self._column_index.setdefault(column, len(self._column_index))
+            row_cells = cells.setdefault(row, {})
+            row_cells[col] = row_cells.get(col, 0.0) + weight
+
+        self.rows: Tuple[Keyword, ...] = tuple(cells)
+        self.columns: Tuple[Target, ...] = tuple(self._column_index)
+        self._row_index = {row: i for i, row in enumerate(self.rows)}
+
+        row_ptr, col_idx, data = [0], [], []
+        for row in self.rows:
+            for col, weight in sorted(cells[row].items()):
+                col_idx.append(col)
+                data.append(weight)
+            row_ptr.append(len(col_idx))
+        self._row_ptr = tuple(row_ptr)
+        self._col_idx = tuple(col_idx)
+        self._data = tuple(data)
+
+        # Máximo alcançável por coluna: o maior peso de cada categoria, somado
+        best: Dict[Tuple[int, str], float] = {}
+        for (category, _), row_cells in cells.items():
+            for col, weight in row_cells.items():
+                key = (col, category)
+                best[key] = max(best.get(key, 0.0), weight)
+        max_scores = [0.0] * len(self.columns)
+        for (col, _), weight in best.items():
+            max_scores[col] += weight
+        self._max_scores = tuple(max_scores)
+        self._dense_weights = None
+
+    @classmethod
+    def from_concept_mapping(cls, concept_mapping: Mapping) -> "ConceptWeightMatrix":
+        """Compila o CONCEPT_MAPPING (formato de keywords_dictionary.py)."""
+        return cls(_iter_weights(concept_mapping))
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return len(self.rows), len(self.columns)
+
+    @property
+    def nnz(self) -> int:
+        """Número de pesos armazenados."""
+        return len(self._data)
+
+    def column_for(self, violence_type: str, subtype: Optional[str] = None) -> Optional[int]:
+        """
+        Coluna de um tipo/subtipo; sem coluna própria, o subtipo herda a
+        coluna do tipo. Retorna None se o alvo não tem pesos.
+        """
+        col = self._column_index.get((violence_type, subtype or ""))
+        if col is None and subtype:
+            col = self._column_index.get((violence_type, ""))
+        return col
+
+    def _row_ids(self, keywords: Iterable[Keyword]) -> List[int]:
+        row_index = self._row_index
+        return [row_index[kw] for kw in set(keywords) if kw in row_index]
+
+    def score(self, keywords: Iterable[Keyword]) -> Dict[Target, float]:
+        """
+        Pontua as palavras-chave de um relato; retorna apenas os alvos com
+        pontuação. Palavras repetidas contam uma única vez.
+        """
+        totals: Dict[int, float] = {}
+        row_ptr, col_idx, data = self._row_ptr, self._col_idx, self._data
+        for row in self._row_ids(keywords):
+            for pos in range(row_ptr[row], row_ptr[row + 1]):
+                col = col_idx[pos]
+                totals[col] = totals.get(col, 0.0) + data[pos]
+        return {self.columns[col]: total for col, total in totals.items()}
+
+    def score_batch(self, batch: Sequence[Iterable[Keyword]]):
+        """
+        Pontua vários relatos de uma vez.
+
+        Retorna uma matriz (relatos x colunas): ndarray quando numpy está
+        disponível, senão lista de listas.
+        """
+        np = _numpy()
+        if np is None:
+            out = [[0.0] * len(self.columns) for _ in batch]
+            for item, keywords in enumerate(batch):
+                for (vtype, subtype), total in self.score(keywords).items():
+                    out[item][self._column_index[(vtype, subtype)]] = total
+            return out
+
+        # Matriz indicadora (relatos x palavras-chave) multiplicada pelos pesos;
+        # a atribuição na indicadora já descarta palavras repetidas no mesmo relato
+        row_index = self._row_index
+        items, rows = [], []
+        for item, keywords in enumerate(batch):
+            for keyword in keywords:
+                row = row_index.get(keyword)
+                if row is not None:
+                    items.append(item)
+                    rows.append(row)
+        indicator = np.zeros((len(batch), len(self.rows)))
+        indicator[items, rows] = 1.0
+        return indicator @ self._dense(np)
+
+    def _dense(self, np):
+        """Pesos em forma densa, montados no primeiro lote (a matriz é pequena)."""
+        if self._dense_weights is None:
+            dense = np.zeros(self.shape)
+            for row in range(len(self.rows)):
+                for pos in range(self._row_ptr[row], self._row_ptr[row + 1]):
+                    dense[row, self._col_idx[pos]] += self._data[pos]
+            self._dense_weights = dense
+        return self._dense_weights
+
+    def confidence(self, violence_type: str, subtype: Optional[str], score: float) -> float:
+        """Pontuação normalizada (0 a 1) pelo máximo alcançável pelo alvo."""
+        col = self.column_for(violence_type, subtype)
+        if col is None or not self._max_scores[col]:
+            return 0.0
+        return round(min(score / self._max_scores[col], 1.0), 2)
+
+    def score_target(self, scores: Mapping[Target, float],
+                     violence_type: str, subtype: Optional[str] = None) -> float:
+        """Pontuação de um tipo/subtipo em um resultado de `score`."""
+        col = self.column_for(violence_type, subtype)
+        return 0.0 if col is None else scores.get(self.columns[col], 0.0)
+
+
+def rank_classifications(classifications: List[Dict], keywords: Iterable[Keyword],
+                         matrix: ConceptWeightMatrix,
+                         severity=lambda violence_type, subtype: 0) -> List[Dict]:
+    """
+    Ordena as classificações por pontuação e, em caso de empate, por
+    gravidade (SEVERITY_RANKING); empates restantes mantêm a ordem original.
+
+    Cada classificação recebe "score", "confidence" e "rank" (1 = principal).
+    """
+    scores = matrix.score(keywords)
+    ranked = []
+    for order, item in enumerate(classifications):
+        vtype, subtype = item["violence_type"], item.get("subtype") or ""
+        score = matrix.score_target(scores, vtype, subtype)
+        entry = dict(item, score=score, confidence=matrix.confidence(vtype, subtype, score))
+        ranked.append((-score, -severity(vtype, subtype), order, entry))
+    ranked.sort(key=lambda key: key[:3])
+    result = []
+    for rank, (*_, entry) in enumerate(ranked, start=1):
+        entry["rank"] = rank
+        result.append(entry)
+    return result
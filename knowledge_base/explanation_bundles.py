@@ -0,0 +1,58 @@
+"""
+Pacotes de explicação pré-resolvidos por (tipo, subtipo).
+
+Cada pacote reúne definição, contexto legal, gravidade, recomendações e
+canais de denúncia já com a herança aplicada (o subtipo herda do tipo o que
+não define). A tabela é plana e montada uma vez por versão da base de
+conhecimento (KnowledgeBaseVersion.explanation_bundles); consultar um
+pacote é um único acesso ao dicionário.
+"""
+from typing import Dict, NamedTuple, Optional, Tuple
+
+
+class ExplanationBundle(NamedTuple):
+    definition: str
+    legal_context: str
+    severity: str
+    recommendations: Tuple[str, ...]
+    reporting_channels: Tuple[str, ...]
+
+
+EMPTY_BUNDLE = ExplanationBundle("", "", "", (), ())
+
+BundleTable = Dict[Tuple[str, str], ExplanationBundle]
+
+
+def build_explanation_bundles(manager) -> BundleTable:
+    """
+    Monta a tabela {(tipo, subtipo): pacote}; o pacote do próprio tipo fica
+    em (tipo, ""). Os modelos não têm contexto legal, que fica vazio.
+    """
+    table: BundleTable = {}
+    for name, vtype in manager.get_all_violence_types().items():
+        base = ExplanationBundle(
+            definition=vtype.definition,
+            legal_context="",
+            severity=vtype.severity.value,
+            recommendations=vtype.recommendations,
+            reporting_channels=vtype.report_channels,
+        )
+        table[(name, "")] = base
+        for subtype_name, subtype in vtype.subtypes.items():
+            table[(name, subtype_name)] = ExplanationBundle(
+                definition=subtype.definition,
+                legal_context=base.legal_context,
+                severity=subtype.severity.value if subtype.severity else base.severity,
+                recommendations=subtype.recommendations or base.recommendations,
+                reporting_channels=subtype.report_channels or base.reporting_channels,
+            )
+    return table
+
+
+def lookup_bundle(table: BundleTable, violence_type: str,
+                  subtype: Optional[str] = None) -> ExplanationBundle:
+    """Pacote do subtipo; subtipo desconhecido cai no tipo e tipo desconhecido no vazio."""
+    bundle = table.get((violence_type, subtype or ""))
+    if bundle is None:
+        bundle = table.get((violence_type, ""), EMPTY_BUNDLE)
+    return bundle
@@ -0,0 +1,123 @@
+"""
+Índice invertido das palavras-chave da base de conhecimento.
+
+Usado por ViolenceTypeManager.search_by_keywords. O índice é construído uma
+vez por gerenciador (isto é, por versão da base) e:
+- normaliza termos com NFKD, remoção de acentos e casefold
+  ("Histérico" e "histerico" são o mesmo termo);
+- mapeia cada termo do vocabulário para as entradas (tipo, subtipo) que o usam;
+- indexa trigramas do vocabulário para consultas por substring;
+- mantém o vocabulário ordenado para consultas por prefixo (bisect).
+"""
+import bisect
+import unicodedata
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+NGRAM_SIZE = 3
+
+Entry = Tuple[str, Optional[str]]
+
+
+def normalize_term(text: str) -> str:
+    """Normaliza um termo para comparação: sem acentos e em casefold."""
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch)).casefold()
+
+
+def _ngrams(term: str, size: int = NGRAM_SIZE) -> Set[str]:
+    return {term[i:i + size] for i in range(len(term) - size + 1)}
+
+
+class KeywordIndex:
+    """
+    Índice das palavras-chave por entrada (tipo, subtipo).
+
+    A ordem das entradas é a ordem de inserção (tipo principal seguido de seus
+    subtipos), usada como critério de desempate no ranking.
+    """
+
+    def __init__(self):
+        self._entries: List[Entry] = []
+        self._vocabulary: List[str] = []
+        self._term_ids: Dict[str, int] = {}
+        self._postings: List[Set[int]] = []          # termo -> entradas
+        self._ngrams: Dict[str, Set[int]] = {}       # trigrama -> termos
+        self._sorted_terms: List[str] = []
+        self._sorted_ids: List[int] = []
+
+    @classmethod
+    def from_violence_types(cls, violence_types) -> "KeywordIndex":
+        """Constrói o índice a partir de {nome: ViolenceType}."""
+        index = cls()
+        for vtype_name, vtype in violence_types.items():
+            index.add_entry((vtype_name, None), vtype.keywords)
+            for subtype_name, subtype in vtype.subtypes.items():
+                index.add_entry((vtype_name, subtype_name), subtype.keywords)
+        index.freeze()
+        return index
+
+    def add_entry(self, entry: Entry, keywords: Iterable[str]) -> None:
+        """Registra uma entrada e suas palavras-chave."""
+        entry_id = len(self._entries)
+        self._entries.append(entry)
+        for keyword in keywords:
+            term = normalize_term(keyword)
+            term_id = self._term_ids.get(term)
+            if term_id is None:
+                term_id = len(self._vocabulary)
+                self._term_ids[term] = term_id
+                self._vocabulary.append(term)
+                self._postings.append(set())
+                for gram in _ngrams(term):
+                    self._ngrams.setdefault(gram, set()).add(term_id)
+            self._postings[term_id].add(entry_id)
+
+    def freeze(self) -> None:
+        """Prepara o vocabulário ordenado para consultas por prefixo."""
+        order = sorted(range(len(self._vocabulary)), key=self._vocabulary.__getitem__)
+        self._sorted_terms = [self._vocabulary[i] for i in order]
+        self._sorted_ids = order
+
+    def matching_terms(self, query: str, prefix: bool = False) -> Set[int]:
+        """
+        Retorna os ids dos termos do vocabulário que contêm `query`
+        (ou que começam com `query`, se `prefix=True`).
+        """
+        query = normalize_term(query)
+        if prefix:
+            start = bisect.bisect_left(self._sorted_terms, query)
+            end = start
+            while end < len(self._sorted_terms) and self._sorted_terms[end].startswith(query):
+                end += 1
+            return set(self._sorted_ids[start:end])
+
+        if len(query) < NGRAM_SIZE:
+            # Consultas curtas não têm trigramas: varre o vocabulário (sem duplicatas)
+            return {i for i, term in enumerate(self._vocabulary) if query in term}
+
+        candidates: Optional[Set[int]] = None
+        for gram in _ngrams(query):
+            posting = self._ngrams.get(gram)
+            if not posting:
+                return set()
+            candidates = set(posting) if candidates is None else candidates & posting
+        return {i for i in candidates if query in self._vocabulary[i]}
+
+    def search(self, keywords: Sequence[str], prefix: bool = False) -> List[Tuple[str, Optional[str], int]]:
+        """
+        Ranking de entradas por número de palavras-chave da consulta encontradas.
+
+        O score de uma entrada é a quantidade de palavras da consulta que
+        aparecem (como substring, ou prefixo) em alguma palavra-chave dela.
+        Empates mantêm a ordem de inserção.
+        """
+        scores: Dict[int, int] = {}
+        for keyword in keywords:
+            hit_entries: Set[int] = set()
+            for term_id in self.matching_terms(keyword, prefix=prefix):
+                hit_entries |= self._postings[term_id]
+            for entry_id in hit_entries:
+                scores[entry_id] = scores.get(entry_id, 0) + 1
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return [(*self._entries[entry_id], score) for entry_id, score in ranked]
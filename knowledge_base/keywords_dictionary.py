@@ -1,7 +1,6 @@
-from knowledge_base.violence_types import VIOLENCE_TYPES, CRITERION_WEIGHTS
 from typing import Dict, List
+from knowledge_base import violence_types
 from knowledge_base.violence_types import CRITERION_WEIGHTS
-from typing import Dict, List
 
 CONCEPT_MAPPING = {
     "comportamentos": {
@@ -333,7 +332,7 @@ def extract_keywords_from_violence_types():
     }
     
     # Extrair palavras-chave de cada tipo de violência
-    for vtype, vdata in VIOLENCE_TYPES.items():
+    for vtype, vdata in violence_types.VIOLENCE_TYPES.items():
         # Extrair do tipo principal
         if "palavras_chave" in vdata:
             keywords["action_type"].extend(vdata["palavras_chave"])
@@ -1,11 +1,22 @@
 """
 Modelos de dados para tipos de violência.
+
+Os modelos são imutáveis (frozen) e usam __slots__; as sequências são
+armazenadas como tuplas de strings internadas, de modo que as visões de
+compatibilidade (knowledge_base/views.py) possam expô-las sem cópia.
 """
+import sys
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional, Union
+from types import MappingProxyType
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
 from enum import Enum
 
 
+def _interned(values: Iterable[str]) -> Tuple[str, ...]:
+    """Converte uma sequência de strings em tupla de strings internadas."""
+    return tuple(sys.intern(value) for value in values)
+
+
 class Severity(Enum):
     """Níveis de gravidade das violências."""
     BAIXA = "baixa"
@@ -17,35 +28,55 @@ class Severity(Enum):
     GRAVISSIMA = "gravissima"
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class ViolenceSubtype:
     """Representa um subtipo de violência."""
     name: str
     definition: str
-    keywords: List[str] = field(default_factory=list)
-    behaviors: List[str] = field(default_factory=list)
+    keywords: Tuple[str, ...] = ()
+    behaviors: Tuple[str, ...] = ()
     severity: Optional[Severity] = None
-    report_channels: List[str] = field(default_factory=list)
-    recommendations: List[str] = field(default_factory=list)
+    report_channels: Tuple[str, ...] = ()
+    recommendations: Tuple[str, ...] = ()
     severity_score: int = 0
 
+    def __post_init__(self):
+        object.__setattr__(self, "name", sys.intern(self.name))
+        object.__setattr__(self, "keywords", _interned(self.keywords))
+        object.__setattr__(self, "behaviors", _interned(self.behaviors))
+        object.__setattr__(self, "report_channels", _interned(self.report_channels))
+        object.__setattr__(self, "recommendations", tuple(self.recommendations))
 
-@dataclass
+
+@dataclass(frozen=True, slots=True)
 class ViolenceType:
     """Representa um tipo principal de violência."""
     name: str
     definition: str
     severity: Severity
-    keywords: List[str] = field(default_factory=list)
-    common_targets: List[str] = field(default_factory=list)
-    report_channels: List[str] = field(default_factory=list)
-    recommendations: List[str] = field(default_factory=list)
-    subtypes: Dict[str, ViolenceSubtype] = field(default_factory=dict)
+    keywords: Tuple[str, ...] = ()
+    common_targets: Tuple[str, ...] = ()
+    report_channels: Tuple[str, ...] = ()
+    recommendations: Tuple[str, ...] = ()
+    subtypes: Mapping[str, ViolenceSubtype] = field(default_factory=dict, compare=False)
     severity_score: int = 0
+    _subtype_store: Dict[str, ViolenceSubtype] = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
+
+    def __post_init__(self):
+        object.__setattr__(self, "name", sys.intern(self.name))
+        object.__setattr__(self, "keywords", _interned(self.keywords))
+        object.__setattr__(self, "common_targets", tuple(self.common_targets))
+        object.__setattr__(self, "report_channels", _interned(self.report_channels))
+        object.__setattr__(self, "recommendations", tuple(self.recommendations))
+        store = dict(self.subtypes)
+        object.__setattr__(self, "_subtype_store", store)
+        object.__setattr__(self, "subtypes", MappingProxyType(store))
 
     def add_subtype(self, subtype: ViolenceSubtype) -> None:
-        """Adiciona um subtipo a este tipo de violência."""
-        self.subtypes[subtype.name] = subtype
+        """Adiciona um subtipo a este tipo de violência (usado durante a construção)."""
+        self._subtype_store[subtype.name] = subtype
 
     def get_subtype(self, name: str) -> Optional[ViolenceSubtype]:
         """Retorna um subtipo específico."""
@@ -53,7 +84,7 @@ class ViolenceType:
 
     def get_all_keywords(self) -> List[str]:
         """Retorna todas as palavras-chave do tipo e seus subtipos."""
-        all_keywords = self.keywords.copy()
+        all_keywords = list(self.keywords)
         for subtype in self.subtypes.values():
             all_keywords.extend(subtype.keywords)
         return list(set(all_keywords))
@@ -65,10 +96,13 @@ class ViolenceType:
         return self.severity_score
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class ReportChannel:
     """Canal de denúncia."""
     name: str
     description: str
     contact: str = ""
     procedure: str = ""
+
+    def __post_init__(self):
+        object.__setattr__(self, "name", sys.intern(self.name))
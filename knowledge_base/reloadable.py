@@ -0,0 +1,274 @@
+"""
+Base de conhecimento recarregável sem reiniciar a aplicação.
+
+ReloadableKnowledgeBase mantém a versão atual da base (gerenciador de tipos,
+KEYWORDS_DICT, CONCEPT_MAPPING, FIELDS_QUESTIONS e as estruturas derivadas:
+matriz de pesos do CONCEPT_MAPPING e pacotes de explicação) e pode observar as fontes
+(ou o snapshot) por alteração. A nova versão é construída fora da thread de
+atendimento e trocada de forma atômica:
+- análises em andamento continuam na versão em que começaram
+  (`with version.pinned():` fixa a versão no contexto da thread);
+- novas análises passam a usar a nova versão.
+
+Cada versão tem um `fingerprint` (hash do conteúdo), que deve ser usado como
+parte da chave de caches derivados (prompt, extração, memo de resultados).
+
+Somente os dados são recarregados: factories/violence_factory.py,
+violence_manager.py e keywords_dictionary.py são reexecutados em módulos
+novos, sem alterar sys.modules. Mudanças nas classes de models/ e no código
+das regras continuam exigindo reinício.
+"""
+import os
+import threading
+import time
+import types
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from . import violence_manager
+from .concept_weights import ConceptWeightMatrix
+from .explanation_bundles import BundleTable, build_explanation_bundles
+from .snapshot import (
+    PACKAGE_DIR, SOURCE_FILES, collect_sections, content_fingerprint, load_snapshot
+)
+
+_pinned_version: ContextVar[Optional["KnowledgeBaseVersion"]] = ContextVar(
+    "pinned_knowledge_base", default=None
+)
+
+
+@dataclass(frozen=True)
+class KnowledgeBaseVersion:
+    """Uma versão imutável e completa da base de conhecimento."""
+    manager: Any
+    keywords_dict: Dict[str, List[str]]
+    concept_mapping: Dict[str, Dict]
+    fields_questions: Dict[str, str]
+    fingerprint: str
+    origin: str = "fontes"
+    loaded_at: float = field(default_factory=time.time)
+    weight_matrix: Optional[ConceptWeightMatrix] = field(default=None, compare=False)
+    explanation_bundles: Optional[BundleTable] = field(default=None, compare=False)
+
+    @contextmanager
+    def pinned(self):
+        """Fixa esta versão (e seu gerenciador) no contexto atual."""
+        version_token = _pinned_version.set(self)
+        manager_token = violence_manager._pinned_manager.set(self.manager)
+        try:
+            yield self
+        finally:
+            violence_manager._pinned_manager.reset(manager_token)
+            _pinned_version.reset(version_token)
+
+
+def _exec_source(module_name: str, relative_path: str) -> types.ModuleType:
+    """
+    Executa o arquivo-fonte em um módulo novo, sem registrá-lo em sys.modules.
+    O código é compilado a partir do arquivo (sem usar o cache .pyc).
+    """
+    path = os.path.join(PACKAGE_DIR, relative_path)
+    with open(path, "rb") as source:
+        code = compile(source.read(), path, "exec")
+    module = types.ModuleType(module_name)
+    module.__file__ = path
+    module.__package__ = module_name.rpartition(".")[0]
+    exec(code, module.__dict__)
+    return module
+
+
+def _make_version(manager, keywords_module, origin: str,
+                  concept_mapping=None, keywords_dict=None,
+                  fingerprint: Optional[str] = None) -> KnowledgeBaseVersion:
+    concept_mapping = keywords_module.CONCEPT_MAPPING if concept_mapping is None else concept_mapping
+    keywords_dict = keywords_module.KEYWORDS_DICT if keywords_dict is None else keywords_dict
+    if fingerprint is None:
+        fingerprint = content_fingerprint(collect_sections(manager, concept_mapping, keywords_dict))
+    return KnowledgeBaseVersion(
+        manager=manager,
+        keywords_dict=keywords_dict,
+        concept_mapping=concept_mapping,
+        fields_questions=keywords_module.FIELDS_QUESTIONS,
+        fingerprint=fingerprint[:16],
+        origin=origin,
+        weight_matrix=ConceptWeightMatrix.from_concept_mapping(concept_mapping),
+        explanation_bundles=build_explanation_bundles(manager),
+    )
+
+
+def build_from_sources() -> KnowledgeBaseVersion:
+    """Constrói uma versão nova reexecutando as fontes da base."""
+    factory_module = _exec_source("knowledge_base.factories.violence_factory",
+                                  "factories/violence_factory.py")
+    manager_module = _exec_source("knowledge_base.violence_manager", "violence_manager.py")
+    keywords_module = _exec_source("knowledge_base.keywords_dictionary", "keywords_dictionary.py")
+    manager = manager_module.ViolenceTypeManager(factory=factory_module.ViolenceTypeFactory())
+    return _make_version(manager, keywords_module, origin="fontes")
+
+
+def build_from_snapshot(path: str) -> KnowledgeBaseVersion:
+    """Constrói uma versão a partir do snapshot; falha se ele estiver desatualizado."""
+    from . import keywords_dictionary
+
+    snapshot = load_snapshot(path)
+    if snapshot is None:
+        raise ValueError(f"snapshot ausente ou desatualizado: {path}")
+    return _make_version(
+        violence_manager.ViolenceTypeManager.from_snapshot(snapshot),
+        keywords_dictionary,
+        origin=f"snapshot:{path}",
+        concept_mapping=snapshot.section("concept_mapping"),
+        keywords_dict=snapshot.section("keywords_dict"),
+        fingerprint=snapshot.content_hash,
+    )
+
+
+class ReloadableKnowledgeBase:
+    """
+    Referência recarregável para a versão atual da base de conhecimento.
+
+    Args:
+        snapshot_path: Se informado, observa e recarrega a partir do snapshot;
+            caso contrário observa as fontes (SOURCE_FILES)
+        poll_interval: Intervalo (s) entre verificações de alteração
+    """
+
+    def __init__(self, snapshot_path: Optional[str] = None, poll_interval: float = 2.0,
+                 initial: Optional[KnowledgeBaseVersion] = None):
+        self.snapshot_path = snapshot_path
+        self.poll_interval = poll_interval
+        self._reload_lock = threading.Lock()
+        self._listeners: List[Callable[[KnowledgeBaseVersion], None]] = []
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+        self._signature = self._watch_signature()
+        self._current = initial or self._initial_version()
+        violence_manager.set_violence_manager(self._current.manager)
+
+    def _initial_version(self) -> KnowledgeBaseVersion:
+        """Versão inicial a partir do que já está carregado no processo."""
+        if self.snapshot_path:
+            return build_from_snapshot(self.snapshot_path)
+        from . import keywords_dictionary
+        return _make_version(violence_manager.get_violence_manager(), keywords_dictionary,
+                             origin="fontes")
+
+    def current(self) -> KnowledgeBaseVersion:
+        """Versão atual (leitura atômica)."""
+        return self._current
+
+    @property
+    def fingerprint(self) -> str:
+        return self._current.fingerprint
+
+    def subscribe(self, listener: Callable[[KnowledgeBaseVersion], None]) -> None:
+        """Registra uma função chamada com a nova versão após cada troca."""
+        self._listeners.append(listener)
+
+    def _watched_files(self) -> List[str]:
+        if self.snapshot_path:
+            return [self.snapshot_path]
+        return [os.path.join(PACKAGE_DIR, relative) for relative in SOURCE_FILES]
+
+    def _watch_signature(self) -> Tuple:
+        signature = []
+        for path in self._watched_files():
+            try:
+                stat = os.stat(path)
+                signature.append((path, stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                signature.append((path, None, None))
+        return tuple(signature)
+
+    def has_changed(self) -> bool:
+        """Indica se algum arquivo observado mudou desde a última verificação."""
+        return self._watch_signature() != self._signature
+
+    def reload(self) -> bool:
+        """
+        Reconstrói a base e troca a versão atual se o conteúdo mudou.
+        Retorna True se houve troca. Em caso de erro a versão atual é mantida.
+        """
+        with self._reload_lock:
+            self._signature = self._watch_signature()
+            try:
+                if self.snapshot_path:
+                    version = build_from_snapshot(self.snapshot_path)
+                else:
+                    version = build_from_sources()
+            except Exception as e:
+                print(f"⚠️ Falha ao recarregar a base de conhecimento; mantendo "
+                      f"{self._current.fingerprint}: {e}")
+                return False
+
+            if version.fingerprint == self._current.fingerprint:
+                return False
+            self._swap(version)
+            return True
+
+    def _swap(self, version: KnowledgeBaseVersion) -> None:
+        previous = self._current
+        self._current = version
+        violence_manager.set_violence_manager(version.manager)
+        print(f"🔄 Base de conhecimento recarregada: {previous.fingerprint} → "
+              f"{version.fingerprint} ({version.origin})")
+        for listener in list(self._listeners):
+            try:
+                listener(version)
+            except Exception as e:
+                print(f"⚠️ Erro ao notificar recarga da base: {e}")
+
+    def request_reload(self) -> None:
+        """Pede ao observador que recarregue imediatamente (sem bloquear)."""
+        self._wake.set()
+
+    def start_watching(self) -> None:
+        """Inicia a thread que observa as fontes e recarrega quando mudarem."""
+        if self._watcher is not None and self._watcher.is_alive():
+            return
+        self._stop.clear()
+        self._watcher = threading.Thread(target=self._watch_loop, name="kb-reload", daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self, timeout: Optional[float] = None) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._watcher is not None:
+            self._watcher.join(timeout)
+            self._watcher = None
+
+    def _watch_loop(self) -> None:
+        while not self._stop.is_set():
+            requested = self._wake.wait(self.poll_interval)
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            if requested or self.has_changed():
+                self.reload()
+
+
+_knowledge_base: Optional[ReloadableKnowledgeBase] = None
+_knowledge_base_lock = threading.Lock()
+
+
+def get_knowledge_base() -> ReloadableKnowledgeBase:
+    """
+    Retorna a referência global, criada no primeiro uso. Usa o snapshot
+    quando VIOLENCE_KB_SNAPSHOT estiver configurado.
+    """
+    global _knowledge_base
+    if _knowledge_base is None:
+        with _knowledge_base_lock:
+            if _knowledge_base is None:
+                _knowledge_base = ReloadableKnowledgeBase(
+                    snapshot_path=os.environ.get("VIOLENCE_KB_SNAPSHOT") or None
+                )
+    return _knowledge_base
+
+
+def current_version() -> KnowledgeBaseVersion:
+    """Versão fixada no contexto atual ou, na ausência, a versão global atual."""
+    return _pinned_version.get() or get_knowledge_base().current()
@@ -0,0 +1,275 @@
+"""
+Visões somente leitura da base de conhecimento no formato de dicionário legado.
+
+VIOLENCE_TYPES, REPORT_CONTACT e SEVERITY_RANKING eram dicionários aninhados
+construídos a partir dos modelos, mantendo uma segunda cópia da base em
+memória. As classes abaixo implementam a interface Mapping diretamente sobre
+os modelos (ViolenceType, ViolenceSubtype, ReportChannel), sem copiar dados:
+as chaves em português são traduzidas para os atributos no momento do acesso
+e as listas são as próprias tuplas dos modelos.
+
+As visões de nível superior recebem uma função que devolve o gerenciador
+atual, de modo que continuam válidas se a base for substituída.
+"""
+from collections.abc import Mapping
+from typing import Callable, Iterator
+
+from .models.violence_type import ViolenceType, ViolenceSubtype, ReportChannel
+
+ManagerGetter = Callable[[], object]
+
+
+def _display_name(name: str) -> str:
+    """Nome de exibição usado no formato legado ("abuso_psicologico" -> "Abuso Psicologico")."""
+    return name.replace('_', ' ').title()
+
+
+class SubtypeView(Mapping):
+    """Subtipo no formato {"definicao", "palavras_chave", "comportamentos", ...}."""
+    __slots__ = ("_subtype",)
+
+    def __init__(self, subtype: ViolenceSubtype):
+        self._subtype = subtype
+
+    def _keys(self):
+        subtype = self._subtype
+        keys = ["definicao", "palavras_chave"]
+        if subtype.behaviors:
+            keys.append("comportamentos")
+        if subtype.severity:
+            keys.append("gravidade")
+        if subtype.report_channels:
+            keys.append("canais_denuncia")
+        if subtype.recommendations:
+            keys.append("recomendacoes")
+        return keys
+
+    def __getitem__(self, key):
+        subtype = self._subtype
+        if key == "definicao":
+            return subtype.definition
+        if key == "palavras_chave":
+            return subtype.keywords
+        if key == "comportamentos" and subtype.behaviors:
+            return subtype.behaviors
+        if key == "gravidade" and subtype.severity:
+            return subtype.severity.value
+        if key == "canais_denuncia" and subtype.report_channels:
+            return subtype.report_channels
+        if key == "recomendacoes" and subtype.recommendations:
+            return subtype.recommendations
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._keys())
+
+    def __len__(self) -> int:
+        return len(self._keys())
+
+    def __repr__(self) -> str:
+        return f"SubtypeView({dict(self)!r})"
+
+
+class SubtypesView(Mapping):
+    """Subtipos de um tipo: {nome_subtipo: SubtypeView}."""
+    __slots__ = ("_subtypes",)
+
+    def __init__(self, subtypes: Mapping):
+        self._subtypes = subtypes
+
+    def __getitem__(self, key):
+        return SubtypeView(self._subtypes[key])
+
+    def __contains__(self, key) -> bool:
+        return key in self._subtypes
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._subtypes)
+
+    def __len__(self) -> int:
+        return len(self._subtypes)
+
+    def __repr__(self) -> str:
+        return f"SubtypesView({list(self._subtypes)!r})"
+
+
+class ViolenceTypeView(Mapping):
+    """Tipo de violência no formato {"nome", "definicao", "gravidade", ...}."""
+    __slots__ = ("_vtype",)
+
+    def __init__(self, vtype: ViolenceType):
+        self._vtype = vtype
+
+    def _keys(self):
+        vtype = self._vtype
+        keys = ["nome", "definicao", "gravidade", "palavras_chave",
+                "canais_denuncia", "recomendacoes"]
+        if vtype.common_targets:
+            keys.append("alvos_comuns")
+        if vtype.subtypes:
+            keys.append("subtipos")
+        return keys
+
+    def __getitem__(self, key):
+        vtype = self._vtype
+        if key == "nome":
+            return _display_name(vtype.name)
+        if key == "definicao":
+            return vtype.definition
+        if key == "gravidade":
+            return vtype.severity.value
+        if key == "palavras_chave":
+            return vtype.keywords
+        if key == "canais_denuncia":
+            return vtype.report_channels
+        if key == "recomendacoes":
+            return vtype.recommendations
+        if key == "alvos_comuns" and vtype.common_targets:
+            return vtype.common_targets
+        if key == "subtipos" and vtype.subtypes:
+            return SubtypesView(vtype.subtypes)
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._keys())
+
+    def __len__(self) -> int:
+        return len(self._keys())
+
+    def __repr__(self) -> str:
+        return f"ViolenceTypeView({self._vtype.name!r})"
+
+
+class ViolenceTypesView(Mapping):
+    """Substituto de VIOLENCE_TYPES: {tipo: ViolenceTypeView}."""
+    __slots__ = ("_get_manager",)
+
+    def __init__(self, get_manager: ManagerGetter):
+        self._get_manager = get_manager
+
+    def _types(self):
+        return self._get_manager().get_all_violence_types()
+
+    def __getitem__(self, key):
+        return ViolenceTypeView(self._types()[key])
+
+    def __contains__(self, key) -> bool:
+        return key in self._types()
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._types())
+
+    def __len__(self) -> int:
+        return len(self._types())
+
+    def __repr__(self) -> str:
+        return f"ViolenceTypesView({list(self._types())!r})"
+
+
+class ReportChannelView(Mapping):
+    """Canal de denúncia no formato {"descricao", "contato", "procedimento"}."""
+    __slots__ = ("_channel",)
+
+    _KEYS = ("descricao", "contato", "procedimento")
+
+    def __init__(self, channel: ReportChannel):
+        self._channel = channel
+
+    def __getitem__(self, key):
+        if key == "descricao":
+            return self._channel.description
+        if key == "contato":
+            return self._channel.contact
+        if key == "procedimento":
+            return self._channel.procedure
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._KEYS)
+
+    def __len__(self) -> int:
+        return len(self._KEYS)
+
+    def __repr__(self) -> str:
+        return f"ReportChannelView({dict(self)!r})"
+
+
+class ReportContactView(Mapping):
+    """Substituto de REPORT_CONTACT: {canal: ReportChannelView}."""
+    __slots__ = ("_get_manager",)
+
+    def __init__(self, get_manager: ManagerGetter):
+        self._get_manager = get_manager
+
+    def _channels(self):
+        return self._get_manager().get_all_report_channels()
+
+    def __getitem__(self, key):
+        return ReportChannelView(self._channels()[key])
+
+    def __contains__(self, key) -> bool:
+        return key in self._channels()
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._channels())
+
+    def __len__(self) -> int:
+        return len(self._channels())
+
+    def __repr__(self) -> str:
+        return f"ReportContactView({list(self._channels())!r})"
+
+
+class SubtypeScoresView(Mapping):
+    """Scores de gravidade dos subtipos de um tipo: {subtipo: score}."""
+    __slots__ = ("_subtypes",)
+
+    def __init__(self, subtypes: Mapping):
+        self._subtypes = subtypes
+
+    def __getitem__(self, key):
+        return self._subtypes[key].severity_score
+
+    def __contains__(self, key) -> bool:
+        return key in self._subtypes
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._subtypes)
+
+    def __len__(self) -> int:
+        return len(self._subtypes)
+
+    def __repr__(self) -> str:
+        return f"SubtypeScoresView({dict(self)!r})"
+
+
+class SeverityRankingView(Mapping):
+    """
+    Substituto de SEVERITY_RANKING: {tipo: {subtipo: score}} para tipos com
+    subtipos e {tipo: score} para os demais.
+    """
+    __slots__ = ("_get_manager",)
+
+    def __init__(self, get_manager: ManagerGetter):
+        self._get_manager = get_manager
+
+    def _types(self):
+        return self._get_manager().get_all_violence_types()
+
+    def __getitem__(self, key):
+        vtype = self._types()[key]
+        if vtype.subtypes:
+            return SubtypeScoresView(vtype.subtypes)
+        return vtype.severity_score
+
+    def __contains__(self, key) -> bool:
+        return key in self._types()
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._types())
+
+    def __len__(self) -> int:
+        return len(self._types())
+
+    def __repr__(self) -> str:
+        return f"SeverityRankingView({list(self._types())!r})"
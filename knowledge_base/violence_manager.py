@@ -2,24 +2,48 @@
 Gerenciador central de tipos de violência.
 Este módulo substitui o arquivo violence_types.py original com uma estrutura mais organizada.
 """
-from typing import Dict, List, Optional
+import threading
+from contextvars import ContextVar
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional, Sequence
 from .models.violence_type import ViolenceType, ViolenceSubtype, Severity, ReportChannel
 from .models.criteria import CriterionWeights
 from .factories.violence_factory import ViolenceTypeFactory
+from .keyword_index import KeywordIndex
+from .views import ViolenceTypesView, ReportContactView, SeverityRankingView
 
 
 class ViolenceTypeManager:
     """Gerenciador central para todos os tipos de violência."""
     
-    def __init__(self):
+    _keyword_index: Optional[KeywordIndex] = None
+    
+    def __init__(self, factory: Optional[ViolenceTypeFactory] = None):
         self._violence_types: Dict[str, ViolenceType] = {}
         self._report_channels: Dict[str, ReportChannel] = {}
+        self._factory = factory
         self._initialize_violence_types()
         self._initialize_report_channels()
+
+    @classmethod
+    def from_snapshot(cls, snapshot) -> "ViolenceTypeManager":
+        """Cria o gerenciador a partir de um snapshot pré-compilado, sem executar a fábrica."""
+        from .snapshot import violence_type_from_dict, report_channel_from_dict
+
+        manager = cls.__new__(cls)
+        manager._violence_types = {
+            name: violence_type_from_dict(data)
+            for name, data in snapshot.section("violence_types").items()
+        }
+        manager._report_channels = {
+            name: report_channel_from_dict(data)
+            for name, data in snapshot.section("report_channels").items()
+        }
+        return manager
     
     def _initialize_violence_types(self):
         """Inicializa todos os tipos de violência."""
-        factory = ViolenceTypeFactory()
+        factory = self._factory or ViolenceTypeFactory()
         
         # Adiciona todos os tipos de violência
         self._violence_types["microagressoes"] = factory.create_microagressoes()
@@ -103,9 +127,9 @@ class ViolenceTypeManager:
         """Retorna um tipo de violência específico."""
         return self._violence_types.get(name)
     
-    def get_all_violence_types(self) -> Dict[str, ViolenceType]:
-        """Retorna todos os tipos de violência."""
-        return self._violence_types.copy()
+    def get_all_violence_types(self) -> Mapping[str, ViolenceType]:
+        """Retorna todos os tipos de violência (visão somente leitura, sem cópia)."""
+        return MappingProxyType(self._violence_types)
     
     def get_violence_subtype(self, violence_type: str, subtype_name: str) -> Optional[ViolenceSubtype]:
         """Retorna um subtipo específico de violência."""
@@ -116,9 +140,9 @@ class ViolenceTypeManager:
         """Retorna um canal de denúncia específico."""
         return self._report_channels.get(name)
     
-    def get_all_report_channels(self) -> Dict[str, ReportChannel]:
-        """Retorna todos os canais de denúncia."""
-        return self._report_channels.copy()
+    def get_all_report_channels(self) -> Mapping[str, ReportChannel]:
+        """Retorna todos os canais de denúncia (visão somente leitura, sem cópia)."""
+        return MappingProxyType(self._report_channels)
     
     def get_severity_score(self, violence_type: str, subtype_name: str = None) -> int:
         """Retorna o score de gravidade para um tipo/subtipo de violência."""
@@ -127,35 +151,25 @@ class ViolenceTypeManager:
             return 0
         return vtype.get_severity_score(subtype_name)
     
-    def search_by_keywords(self, keywords: List[str]) -> List[tuple]:
+    def search_by_keywords(self, keywords: List[str], prefix: bool = False) -> List[tuple]:
         """
         Busca tipos de violência por palavras-chave.
         Retorna lista de tuplas (violence_type, subtype, relevance_score).
-        """
-        results = []
-        keywords_lower = [k.lower() for k in keywords]
         
-        for vtype_name, vtype in self._violence_types.items():
-            # Verifica palavras-chave do tipo principal
-            vtype_keywords = [k.lower() for k in vtype.keywords]
-            main_matches = sum(1 for k in keywords_lower if any(k in vk for vk in vtype_keywords))
-            
-            if main_matches > 0:
-                results.append((vtype_name, None, main_matches))
-            
-            # Verifica palavras-chave dos subtipos
-            for subtype_name, subtype in vtype.subtypes.items():
-                subtype_keywords = [k.lower() for k in subtype.keywords]
-                sub_matches = sum(1 for k in keywords_lower if any(k in sk for sk in subtype_keywords))
-                
-                if sub_matches > 0:
-                    results.append((vtype_name, subtype_name, sub_matches))
-        
-        # Ordena por relevância (mais matches primeiro)
-        results.sort(key=lambda x: x[2], reverse=True)
-        return results
+        A comparação ignora acentos e maiúsculas; cada palavra da consulta
+        conta um ponto para a entrada se for substring (ou prefixo, com
+        `prefix=True`) de alguma de suas palavras-chave.
+        """
+        return self.keyword_index.search(keywords, prefix=prefix)
+    
+    @property
+    def keyword_index(self) -> KeywordIndex:
+        """Índice invertido das palavras-chave, construído no primeiro uso."""
+        if self._keyword_index is None:
+            self._keyword_index = KeywordIndex.from_violence_types(self._violence_types)
+        return self._keyword_index
     
-    def get_recommendations(self, violence_type: str, subtype_name: str = None) -> List[str]:
+    def get_recommendations(self, violence_type: str, subtype_name: str = None) -> Sequence[str]:
         """Retorna recomendações para um tipo/subtipo de violência."""
         vtype = self.get_violence_type(violence_type)
         if not vtype:
@@ -186,7 +200,10 @@ class ViolenceTypeManager:
         return [self._report_channels[name] for name in channel_names if name in self._report_channels]
 
     def to_dict_format(self) -> Dict:
-        """Converte para o formato de dicionário compatível com o código existente."""
+        """
+        Converte para o formato de dicionário compatível com o código existente.
+        Gera uma cópia independente; para leitura use ViolenceTypesView (VIOLENCE_TYPES).
+        """
         result = {}
         
         for vtype_name, vtype in self._violence_types.items():
@@ -225,35 +242,87 @@ class ViolenceTypeManager:
         return result
 
 
-# Instância global para compatibilidade com o código existente
-_violence_manager = ViolenceTypeManager()
+# Instância global, construída sob demanda no primeiro acesso
+_violence_manager_instance: Optional[ViolenceTypeManager] = None
+_violence_manager_lock = threading.Lock()
+
+# Gerenciador fixado no contexto atual (thread/tarefa), usado para que uma
+# análise em andamento enxergue sempre a mesma versão da base (ver reloadable.py)
+_pinned_manager: ContextVar[Optional[ViolenceTypeManager]] = ContextVar(
+    "pinned_violence_manager", default=None
+)
+
+def get_violence_manager() -> ViolenceTypeManager:
+    """
+    Retorna o gerenciador global, construindo a base de conhecimento no primeiro uso.
+    Usa o snapshot pré-compilado quando VIOLENCE_KB_SNAPSHOT está configurado
+    e o arquivo corresponde às fontes atuais.
+    """
+    global _violence_manager_instance
+    pinned = _pinned_manager.get()
+    if pinned is not None:
+        return pinned
+    if _violence_manager_instance is None:
+        with _violence_manager_lock:
+            if _violence_manager_instance is None:
+                from .snapshot import load_configured_snapshot
+                snapshot = load_configured_snapshot()
+                if snapshot is not None:
+                    _violence_manager_instance = ViolenceTypeManager.from_snapshot(snapshot)
+                else:
+                    _violence_manager_instance = ViolenceTypeManager()
+    return _violence_manager_instance
+
+def set_violence_manager(manager: ViolenceTypeManager) -> None:
+    """Substitui o gerenciador global (recarga da base de conhecimento)."""
+    global _violence_manager_instance
+    with _violence_manager_lock:
+        _violence_manager_instance = manager
+        if "_violence_manager" in globals():
+            globals()["_violence_manager"] = manager
 
 # Funções para compatibilidade com o código existente
 def get_severity(vtype: str, subtype: str = None) -> int:
     """Função de compatibilidade para obter gravidade."""
-    return _violence_manager.get_severity_score(vtype, subtype)
+    return get_violence_manager().get_severity_score(vtype, subtype)
 
-def get_violence_types() -> Dict[str, Dict]:
-    """Função de compatibilidade para obter todos os tipos."""
-    return _violence_manager.to_dict_format()
+def get_violence_types() -> Mapping[str, Mapping]:
+    """Função de compatibilidade para obter todos os tipos (visão somente leitura)."""
+    return ViolenceTypesView(get_violence_manager)
 
 def get_criterion_weights() -> Dict[str, Dict[str, int]]:
     """Função de compatibilidade para obter pesos dos critérios."""
     return CriterionWeights.get_all_weights()
 
+def _build_report_contact(manager: Optional[ViolenceTypeManager] = None) -> Dict[str, Dict[str, str]]:
+    """Conversão dos canais de denúncia para o formato esperado."""
+    manager = manager or get_violence_manager()
+    report_contact = {}
+    for name, channel in manager.get_all_report_channels().items():
+        report_contact[name] = {
+            "descricao": channel.description,
+            "contato": channel.contact,
+            "procedimento": channel.procedure
+        }
+    return report_contact
+
+def _build_severity_ranking(manager: Optional[ViolenceTypeManager] = None) -> Dict[str, object]:
+    """Ranking de gravidade para compatibilidade."""
+    manager = manager or get_violence_manager()
+    severity_ranking = {}
+    for vtype_name, vtype in manager.get_all_violence_types().items():
+        if vtype.subtypes:
+            severity_ranking[vtype_name] = {
+                subtype_name: subtype.severity_score 
+                for subtype_name, subtype in vtype.subtypes.items()
+            }
+        else:
+            severity_ranking[vtype_name] = vtype.severity_score
+    return severity_ranking
+
 # Exports para compatibilidade
-VIOLENCE_TYPES = _violence_manager.to_dict_format()
 CRITERION_WEIGHTS = CriterionWeights.get_all_weights()
 
-# Conversão dos canais de denúncia para o formato esperado
-REPORT_CONTACT = {}
-for name, channel in _violence_manager.get_all_report_channels().items():
-    REPORT_CONTACT[name] = {
-        "descricao": channel.description,
-        "contato": channel.contact,
-        "procedimento": channel.procedure
-    }
-
 # Mapeamento de gravidade para compatibilidade
 SEVERITY_LEVEL = {
     "baixa": "Comportamento inadequado que requer atenção e orientação.",
@@ -265,13 +334,23 @@ SEVERITY_LEVEL = {
     "gravissima": "Violação extremamente grave que constitui crime passível de expulsão."
 }
 
-# Ranking de gravidade para compatibilidade
-SEVERITY_RANKING = {}
-for vtype_name, vtype in _violence_manager.get_all_violence_types().items():
-    if vtype.subtypes:
-        SEVERITY_RANKING[vtype_name] = {
-            subtype_name: subtype.severity_score 
-            for subtype_name, subtype in vtype.subtypes.items()
-        }
-    else:
-        SEVERITY_RANKING[vtype_name] = vtype.severity_score
+# Exports construídos sob demanda (PEP 562): importar este módulo não executa
+# a fábrica; a base é montada no primeiro acesso a um destes nomes.
+# VIOLENCE_TYPES, REPORT_CONTACT e SEVERITY_RANKING são visões somente leitura
+# sobre os modelos do gerenciador (ver views.py), não cópias em dicionário.
+_exports_lock = threading.Lock()
+_LAZY_EXPORTS = {
+    "_violence_manager": get_violence_manager,
+    "VIOLENCE_TYPES": lambda: ViolenceTypesView(get_violence_manager),
+    "REPORT_CONTACT": lambda: ReportContactView(get_violence_manager),
+    "SEVERITY_RANKING": lambda: SeverityRankingView(get_violence_manager),
+}
+
+def __getattr__(name):
+    builder = _LAZY_EXPORTS.get(name)
+    if builder is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    with _exports_lock:
+        if name not in globals():
+            globals()[name] = builder()
+    return globals()[name]
@@ -5,12 +5,18 @@ utiliza a nova estrutura modular.
 """
 
 # Importa a nova estrutura refatorada
+from . import violence_manager
 from .violence_manager import (
-    VIOLENCE_TYPES,
     CRITERION_WEIGHTS, 
     SEVERITY_LEVEL,
-    SEVERITY_RANKING,
-    REPORT_CONTACT,
     get_severity
 )
 
+# VIOLENCE_TYPES, SEVERITY_RANKING e REPORT_CONTACT são construídos sob
+# demanda em violence_manager; o acesso é repassado no primeiro uso.
+_LAZY_NAMES = ("VIOLENCE_TYPES", "SEVERITY_RANKING", "REPORT_CONTACT")
+
+def __getattr__(name):
+    if name in _LAZY_NAMES:
+        return getattr(violence_manager, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
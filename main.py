@@ -1,17 +1,19 @@
-# Corrigir erro com collections.Mapping no Python 3.10+
-import collections
-if not hasattr(collections, "Mapping"):
-    import collections.abc
-    collections.Mapping = collections.abc.Mapping
-
 import os
+import time
 import streamlit as st  # type: ignore
 from engine.expert_system import ExpertSystem
 from knowledge_base.violence_types import VIOLENCE_TYPES
+from knowledge_base.reloadable import get_knowledge_base
+
+# Tempo máximo (s) de espera pelo Groq antes de mostrar um resultado provisório
+LATENCY_BUDGET = float(os.environ.get("VIOLENCE_LATENCY_BUDGET", "3"))
 
 # Inicializar o sistema especialista
 @st.cache_resource
 def get_expert_system():
+    # Com VIOLENCE_KB_WATCH=1 a base é recarregada ao editar suas fontes
+    if os.environ.get("VIOLENCE_KB_WATCH"):
+        get_knowledge_base().start_watching()
     if 'expert_system' not in st.session_state:
         api_key = st.secrets.get("GROQ_API_KEY", os.environ.get("GROQ_API_KEY", ""))
         st.session_state.expert_system = ExpertSystem(api_key=api_key)
@@ -38,6 +40,8 @@ if 'partial_facts' not in st.session_state:
     st.session_state.partial_facts = {}
 if 'results' not in st.session_state:
     st.session_state.results = []
+if 'refinement' not in st.session_state:
+    st.session_state.refinement = None  # Future do resultado refinado de uma etapa provisória
 
 expert_system = get_expert_system()
 
@@ -56,8 +60,14 @@ if st.session_state.state == 'initial':
             st.error("Por favor, forneça um relato mais detalhado para análise.")
         else:
             with st.spinner("Analisando seu relato..."):
-                # Usar o sistema especialista em vez do processador diretamente
-                result = expert_system.analyze_text(user_text)
+                # Sessão incremental: o follow-up reaproveita a memória desta análise
+                session = expert_system.start_session()
+                result = session.analyze(user_text, latency_budget=LATENCY_BUDGET)
+                st.session_state.analysis_session = session
+                st.session_state.refinement = result.get("refinement")
+                st.session_state.keywords = result["identified_keywords"]
+                st.session_state.missing_fields = result["missing_fields"]
+                st.session_state.questions = result["questions"]
                 
                 # Atualizar a interface com os resultados
                 st.session_state.results = result["classifications"]
@@ -89,11 +99,13 @@ elif st.session_state.state == 'follow_up':
     if st.button("Continuar análise"):
         if follow_up_text:
             with st.spinner("Processando suas respostas..."):
-                # Processar a resposta complementar através do sistema especialista
-                combined_text = follow_up_text  # Você pode combinar com o texto original se necessário
-                
-                # Usar o sistema especialista para analisar o texto complementar
-                result = expert_system.analyze_text(combined_text)
+                # Declarar apenas os fatos novos da resposta sobre a análise inicial
+                session = st.session_state.get('analysis_session')
+                if session is not None:
+                    result = session.follow_up(follow_up_text, latency_budget=LATENCY_BUDGET)
+                else:
+                    result = expert_system.analyze_text(follow_up_text, latency_budget=LATENCY_BUDGET)
+                st.session_state.refinement = result.get("refinement")
                 
                 # Atualizar a interface com os resultados
                 st.session_state.results = result["classifications"]
@@ -104,6 +116,17 @@ elif st.session_state.state == 'follow_up':
 
 elif st.session_state.state == 'result':
     st.subheader("Resultados da Análise")
+
+    # Resultado provisório (Groq lento): troca pelo refinado quando ele chegar
+    refinement = st.session_state.refinement
+    if refinement is not None and refinement.done():
+        if not refinement.cancelled() and refinement.exception() is None:
+            refined = refinement.result()
+            st.session_state.results = refined["classifications"]
+            st.session_state.keywords = refined.get("identified_keywords", st.session_state.keywords)
+        st.session_state.refinement = refinement = None
+    if refinement is not None:
+        st.info("Resultado provisório: a análise completa ainda está em andamento e será exibida aqui.")
     
     if not st.session_state.results:
         st.info("Nenhum tipo de violência foi identificado com base nas informações fornecidas.")
@@ -145,8 +168,14 @@ elif st.session_state.state == 'result':
     # Opção para reiniciar
     if st.button("Iniciar Nova Análise"):
         # Resetar todos os estados
-        for key in ['state', 'keywords', 'questions', 'missing_fields', 'partial_facts', 'results', 'expert_system']:
+        for key in ['state', 'keywords', 'questions', 'missing_fields', 'partial_facts', 'results', 'expert_system',
+                    'analysis_session', 'refinement']:
             if key in st.session_state:
                 del st.session_state[key]
         st.session_state.state = 'initial'
+        st.rerun()
+
+    # Consulta o refinamento pendente até que ele termine
+    if refinement is not None:
+        time.sleep(0.5)
         st.rerun()
\ No newline at end of file
@@ -0,0 +1,8 @@
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Aplica a correção de compatibilidade do Experta (collections.Mapping) antes
+# que qualquer teste importe experta diretamente
+import engine  # noqa: E402,F401
@@ -0,0 +1,51 @@
+import contextlib
+import io
+
+from engine.expert_system import ExpertSystem
+from engine.facts import KeywordFact, TextRelato
+
+
+def _fake_extraction(responses):
+    calls = []
+
+    def extract_keywords(text, timer=None, is_follow_up=False, missing_fields=None, ask_questions=True):
+        assert not ask_questions
+        calls.append((text, is_follow_up, missing_fields))
+        return responses[text]
+    return extract_keywords, calls
+
+
+def _types(result):
+    return {(c["violence_type"], c["subtype"]) for c in result["classifications"]}
+
+
+def test_follow_up_declares_only_new_facts(monkeypatch):
+    responses = {
+        "relato": {"identified_keywords": {"action_type": ["interrupcao"], "target": ["genero"]},
+                   "missing_information": ["frequency"], "follow_up_questions": ["Com que frequência?"]},
+        "resposta": {"identified_keywords": {"target": ["genero"], "frequency": ["repetidamente"],
+                                             "action_type": ["questionamento_capacidade"]}},
+        "tudo": {"identified_keywords": {"action_type": ["interrupcao", "questionamento_capacidade"],
+                                         "target": ["genero"], "frequency": ["repetidamente"]}},
+    }
+    with contextlib.redirect_stdout(io.StringIO()):
+        system = ExpertSystem(api_key="teste")
+        extract, calls = _fake_extraction(responses)
+        monkeypatch.setattr(system.text_processor, "extract_keywords", extract)
+
+        session = system.start_session()
+        first = session.analyze("relato")
+        second = session.follow_up("resposta")
+        full = system.start_session().analyze("tudo")
+
+    assert first["missing_fields"] == ["frequency"]
+    assert calls[1] == ("resposta", True, ["frequency"])
+    assert second["new_keywords"] == {"frequency": ["repetidamente"],
+                                      "action_type": ["questionamento_capacidade"]}
+    assert _types(second) == _types(full)
+    assert _types(first) < _types(second)
+
+    facts = list(session.engine.facts.values())
+    assert sum(isinstance(f, TextRelato) for f in facts) == 2  # memória da primeira etapa mantida
+    assert sum(isinstance(f, KeywordFact) for f in facts) == 4
+    assert [c["rank"] for c in second["classifications"]] == list(range(1, len(second["classifications"]) + 1))
@@ -0,0 +1,160 @@
+import contextlib
+import io
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from engine.analysis_store import AnalysisStore
+from engine.analytics import AnalyticsIndex, classification_terms
+from engine.expert_system import ExpertSystem
+
+RESPONSES = {
+    "relato 1": {"identified_keywords": {"action_type": ["questionamento_capacidade"], "target": ["genero"],
+                                         "context": ["sala_aula"]}},
+    "relato 2": {"identified_keywords": {"action_type": ["perseguicao"], "context": ["local_trabalho"]}},
+    "resposta": {"identified_keywords": {"frequency": ["repetidamente"]}},
+}
+
+
+def _system(store):
+    system = ExpertSystem(api_key="teste", store=store)
+    system.text_processor.extract_keywords = lambda text, timer=None, **kwargs: RESPONSES[text]
+    return system
+
+
+def test_analyses_are_stored_without_text_and_queryable(tmp_path):
+    store = AnalysisStore(str(tmp_path / "analises.db"))
+    start = time.time()
+    with contextlib.redirect_stdout(io.StringIO()):
+        system = _system(store)
+        first = system.analyze_text("relato 1")
+        system.analyze_text("relato 2")
+        session = system.start_session()
+        session.analyze("relato 1")
+        session.follow_up("resposta")
+    store.close()
+
+    assert store.written == 4 and store.commits <= 4
+    assert store.count() == 3  # a sessão ocupa um único registro
+    assert store.count(context="sala_aula") == 2
+    assert first["primary_result"]["violence_type"] == "microagressoes"
+    assert store.count(violence_type="microagressoes", context="sala_aula", since=start) == 2
+    assert store.count(until=start) == 0
+
+    stored = store.find(context="local_trabalho")
+    assert [row["keywords"] for row in stored] == [RESPONSES["relato 2"]["identified_keywords"]]
+    assert all(row["text"] is None for row in store.find())
+    session_row = store.find(limit=1)[0]
+    assert session_row["key"] == session.key
+    assert session_row["keywords"]["frequency"] == ["repetidamente"]
+    assert set(session_row["timings"]) >= {"declare", "total"}
+
+    connection = sqlite3.connect(store.path)
+    assert connection.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    plan = " ".join(row[-1] for row in connection.execute(
+        "EXPLAIN QUERY PLAN SELECT analysis_id FROM analysis_keywords"
+        " WHERE category = 'context' AND keyword = ? AND created_at >= ?", ("sala_aula", start)))
+    assert "idx_keywords_keyword" in plan
+
+
+def test_text_is_stored_only_when_configured(tmp_path):
+    store = AnalysisStore(str(tmp_path / "analises.db"), store_text=True)
+    with contextlib.redirect_stdout(io.StringIO()):
+        _system(store).analyze_text("relato 2")
+    store.flush()
+    assert [row["text"] for row in store.find()] == ["relato 2"]
+    store.close()
+
+
+def test_bitmap_index_and_rollups_follow_the_stored_analyses(tmp_path):
+    path = str(tmp_path / "analises.db")
+    store = AnalysisStore(path)
+    incremental = store.analytics  # carregado vazio, mantido pela thread de escrita
+    with contextlib.redirect_stdout(io.StringIO()):
+        system = _system(store)
+        system.analyze_text("relato 1")
+        system.analyze_text("relato 2")
+        session = system.start_session()
+        session.analyze("relato 2")
+        session.follow_up("resposta")  # regrava a sessão: bits antigos são removidos
+    store.close()
+
+    month = time.strftime("%Y-%m", time.gmtime())
+    queries = [
+        {}, {"violence_type": "microagressoes"}, {"context": "sala_aula"},
+        {"context": ("sala_aula", "local_trabalho")}, {"action_type": "perseguicao", "frequency": "repetidamente"},
+        {"violence_type": "microagressoes", "context": "sala_aula", "since": month, "until": month},
+        {"since": "2000-01", "until": "2000-12"},
+    ]
+    counts = [incremental.count(**query) for query in queries]
+    assert counts == [3, 1, 1, 3, 1, 1, 0]
+    # Mesmas contagens das consultas SQL pelas tabelas auxiliares
+    assert counts[:3] == [store.count(), store.count(violence_type="microagressoes"), store.count(context="sala_aula")]
+
+    # Um processo novo carrega o mesmo índice das colunas de bitmap
+    reopened = AnalysisStore(path)
+    assert [reopened.analytics.count(**query) for query in queries] == counts
+    ids = list(reopened.analytics.ids(frequency="repetidamente"))
+    assert [row["id"] for row in reopened.find(limit=1)] == ids
+
+    rollup = {(row["violence_type"], row["context"]): row["count"] for row in reopened.rollup(since=month)}
+    assert rollup[("microagressoes", "sala_aula")] == 1
+    assert sum(rollup.values()) == sum(row["count"] for row in reopened.rollup())
+    reopened.close()
+
+    # Banco anterior aos bitmaps: colunas e rollups são reconstruídos ao abrir
+    connection = sqlite3.connect(path)
+    with connection:
+        for column in ("keyword_bits", "class_bits"):
+            connection.execute(f"ALTER TABLE analyses DROP COLUMN {column}")
+        connection.execute("DELETE FROM analysis_rollups")
+    connection.close()
+    with contextlib.redirect_stdout(io.StringIO()):
+        migrated = AnalysisStore(path)
+    assert [migrated.analytics.count(**query) for query in queries] == counts
+    assert {(row["violence_type"], row["context"]): row["count"] for row in migrated.rollup(since=month)} == rollup
+    migrated.close()
+
+
+def _flushes(store, timeout=10):
+    flushed = threading.Thread(target=store.flush, daemon=True)
+    flushed.start()
+    flushed.join(timeout)
+    return not flushed.is_alive()
+
+
+def test_unserializable_record_does_not_stop_the_writer(tmp_path):
+    store = AnalysisStore(str(tmp_path / "analises.db"))
+    good = {"classifications": [{"violence_type": "perseguicao", "subtype": ""}]}
+    bad = {"classifications": [{"violence_type": "perseguicao", "subtype": "", "score": object()}]}
+    keywords = RESPONSES["relato 2"]["identified_keywords"]
+
+    with contextlib.redirect_stdout(io.StringIO()) as output:
+        # No mesmo lote: só o registro inválido é descartado
+        keys = [store.record(results, keywords, {"total": 1.0}, "kb") for results in (good, bad, good)]
+        assert _flushes(store)
+        # Depois do erro a thread de escrita continua gravando
+        keys.append(store.record(bad, keywords, {"total": 1.0}, "kb"))
+        assert _flushes(store)
+        keys.append(store.record(good, keywords, {"total": 1.0}, "kb"))
+        assert _flushes(store), "flush() bloqueou: a thread de escrita morreu"
+        store.close()
+
+    assert store.failed == 2 and store.written == 3
+    assert keys[1] in output.getvalue() and keys[3] in output.getvalue()
+    assert {row["key"] for row in store.find()} == {keys[0], keys[2], keys[4]}
+
+
+def test_subtype_filter_requires_a_violence_type():
+    index = AnalyticsIndex()
+    for row_id, (violence_type, subtype) in enumerate([("microagressoes", "interrupcoes_constantes"),
+                                                       ("discriminacao_genero", "discriminacao_sutil")]):
+        terms = classification_terms([{"violence_type": violence_type, "subtype": subtype}])
+        index.add(row_id, AnalyticsIndex.row_terms("2024-01", [], terms))
+
+    assert index.count(violence_type="microagressoes", subtype="interrupcoes_constantes") == 1
+    assert index.count(violence_type="microagressoes", subtype="discriminacao_sutil") == 0
+    with pytest.raises(ValueError):
+        index.count(subtype="interrupcoes_constantes")
@@ -0,0 +1,119 @@
+import contextlib
+import io
+import json
+import random
+import threading
+import time
+
+from engine.batch import BatchRunner, Checkpoint, read_items, to_jsonable
+from engine.expert_system import ExpertSystem
+
+RESPONSES = {
+    "relato 1": {"identified_keywords": {"action_type": ["questionamento_capacidade"], "target": ["genero"]}},
+    "relato 2": {"identified_keywords": {"action_type": ["perseguicao"], "context": ["local_trabalho"]}},
+    "relato 3": {"identified_keywords": {"action_type": ["interrupcao"], "target": ["genero"],
+                                         "frequency": ["repetidamente"]}},
+    "relato 4": {"identified_keywords": {"action_type": ["exposicao_conteudo"]}},
+}
+INPUT = "".join(json.dumps({"id": f"r{i}", "text": f"relato {i % 3 + 1}"}) + "\n" for i in range(12))
+
+
+def _system(calls, render_explanations=False):
+    system = ExpertSystem(api_key="teste", render_explanations=render_explanations)
+    lock = threading.Lock()
+
+    def extract(text, timer=None, **kwargs):
+        time.sleep(random.uniform(0, 0.01))
+        with lock:
+            calls.append(text)
+        return RESPONSES[text]
+
+    system.text_processor.extract_keywords = extract
+    return system
+
+
+def _run(system, order="input", checkpoint=None, limit=None, workers=0, source=INPUT):
+    records = []
+    items = list(read_items(io.StringIO(source)))[:limit]
+    with contextlib.redirect_stdout(io.StringIO()):
+        summary = BatchRunner(system, concurrency=4, order=order, checkpoint=checkpoint,
+                              workers=workers, chunk_size=3).run(
+            items, lambda record: records.append(json.loads(json.dumps(record))))
+    return records, summary
+
+
+def test_batch_results_match_single_analyses_in_input_order():
+    calls = []
+    system = _system(calls)
+    records, summary = _run(system)
+    completed, _ = _run(system, order="completion")
+    pooled, _ = _run(system, workers=2)
+    with contextlib.redirect_stdout(io.StringIO()):
+        expected = json.loads(json.dumps(to_jsonable(system.analyze_text("relato 1"))))
+
+    assert [record["id"] for record in records] == [f"r{i}" for i in range(12)]
+    assert sorted(record["index"] for record in completed) == list(range(12))
+    assert pooled == records
+    assert summary.processed == 12 and summary.llm_calls == 12
+    assert {"p50", "p95", "p99"} <= set(summary.latency["row"])
+
+    first = records[0]
+    assert first["primary_result"] == expected["primary_result"]
+    assert first["classifications"] == expected["classifications"]
+    assert first["classifications"][0]["explanation_record"][0]["rule_name"]
+
+
+def test_pooled_explanations_match_inline_ones():
+    source = "".join(json.dumps({"id": f"r{i}", "text": f"relato {i}"}) + "\n" for i in range(1, 5))
+    system = _system([], render_explanations=True)
+    inline, _ = _run(system, source=source)
+    pooled, _ = _run(system, workers=1, source=source)
+
+    assert pooled == inline
+    exposure = inline[3]["primary_result"]
+    assert exposure["violence_type"] == "violencia_digital"
+    assert exposure["explanation"][-1].startswith("\n**Por que isso é importante:**")
+
+
+def test_resume_skips_done_rows_and_reuses_stored_responses(tmp_path):
+    path = str(tmp_path / "lote.checkpoint")
+    calls = []
+    checkpoint = Checkpoint(path)
+    first, _ = _run(_system(calls), checkpoint=checkpoint, limit=5)
+    # Interrupção após extrair o relato 5 sem escrever seu resultado
+    checkpoint.record_response(5, RESPONSES["relato 3"])
+    checkpoint.close()
+    with open(path, "a") as file:
+        file.write('{"index": 6, "resp')
+
+    calls.clear()
+    resumed = Checkpoint(path, resume=True)
+    rest, summary = _run(_system(calls), checkpoint=resumed)
+    resumed.close()
+
+    assert [record["index"] for record in first + rest] == list(range(12))
+    assert summary.skipped == 5 and summary.reused == 1 and summary.llm_calls == 6
+    assert len(calls) == 6
+
+
+def test_done_markers_never_reach_disk_before_their_output(tmp_path):
+    path = str(tmp_path / "lote.checkpoint")
+    items = [item._replace(index=i) for i, item in
+             enumerate(list(read_items(io.StringIO(INPUT))) * 40)]
+    checkpoint = Checkpoint(path, flush_every=1000)
+    written, durable = [], set()
+
+    def emit(record):
+        written.append(record["index"])
+        # Uma interrupção brusca aqui perde o que não foi gravado pelo flush
+        with open(path) as file:
+            on_disk = {json.loads(line)["index"] for line in file if '"done"' in line}
+        assert on_disk <= durable
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        BatchRunner(_system([]), concurrency=4, checkpoint=checkpoint).run(
+            items, emit, flush=lambda: durable.update(written))
+    checkpoint.close()
+
+    assert len(durable) == 480
+    assert len(Checkpoint(path, resume=True).done) == 480
@@ -0,0 +1,69 @@
+import contextlib
+import io
+
+from engine.facts import AnalysisResult, TextRelato, create_facts_from_groq_response
+from engine.rules import ViolenceRules
+from knowledge_base import concept_weights
+from knowledge_base.concept_weights import ConceptWeightMatrix, rank_classifications
+from knowledge_base.keywords_dictionary import CONCEPT_MAPPING
+
+
+def test_matrix_scores_match_concept_mapping():
+    matrix = ConceptWeightMatrix.from_concept_mapping(CONCEPT_MAPPING)
+    keywords = [("action_type", "questionamento_capacidade"), ("target", "genero"),
+                ("frequency", "repetidamente"), ("action_type", "questionamento_capacidade")]
+    scores = matrix.score(keywords)
+    # 7 (comportamento relevante) + 10 (alvo crítico) + 6 (repetidamente)
+    assert scores[("discriminacao_genero", "discriminacao_sutil")] == 23
+    # 10 (comportamento crítico) + 6 (repetidamente); palavras repetidas contam uma vez
+    assert scores[("microagressoes", "questionar_julgamento")] == 16
+    # Subtipo sem coluna própria herda os pesos do tipo
+    assert matrix.score_target(scores, "perseguicao", "qualquer_subtipo") == 6
+    assert matrix.score_target(scores, "gordofobia") == 0
+    assert 0 < matrix.confidence("discriminacao_genero", "discriminacao_sutil", 23) <= 1
+
+    batch = [keywords, [], [("context", "local_trabalho"), ("frequency", "continuamente")]]
+    vectorized = matrix.score_batch(batch)
+    for item, row_keywords in enumerate(batch):
+        for (vtype, subtype), total in matrix.score(row_keywords).items():
+            assert vectorized[item][matrix.column_for(vtype, subtype)] == total
+        assert sum(vectorized[item]) == sum(matrix.score(row_keywords).values())
+
+
+def test_score_batch_without_numpy(monkeypatch):
+    matrix = ConceptWeightMatrix.from_concept_mapping(CONCEPT_MAPPING)
+    batch = [[("action_type", "ameaca"), ("impact", "danos_emocionais")], [("target", "religiao")]]
+    expected = matrix.score_batch(batch).tolist()
+    monkeypatch.setattr(concept_weights, "_numpy", lambda: None)
+    assert matrix.score_batch(batch) == expected
+
+
+def test_rank_breaks_ties_by_severity():
+    matrix = ConceptWeightMatrix([(("action_type", "x"), ("a", ""), 5.0),
+                                  (("action_type", "x"), ("b", ""), 5.0),
+                                  (("action_type", "x"), ("c", ""), 9.0)])
+    severity = {"a": 2, "b": 7, "c": 1}
+    ranked = rank_classifications(
+        [{"violence_type": t, "subtype": ""} for t in "abc"], [("action_type", "x")], matrix,
+        severity=lambda vtype, subtype: severity[vtype])
+    assert [(c["violence_type"], c["rank"]) for c in ranked] == [("c", 1), ("b", 2), ("a", 3)]
+    assert ranked[0]["confidence"] == 1.0
+
+
+def test_engine_ranks_primary_result():
+    engine = ViolenceRules()
+    with contextlib.redirect_stdout(io.StringIO()):
+        engine.reset()
+        engine.declare(TextRelato(text="relato", processed=True))
+        for fact in create_facts_from_groq_response({"identified_keywords": {
+                "action_type": ["questionamento_capacidade", "interrupcao"],
+                "target": ["genero"], "frequency": ["continuamente"]}}):
+            engine.declare(fact)
+        engine.run()
+    result = next(f for f in engine.facts.values() if isinstance(f, AnalysisResult))
+    classifications = result["classifications"]
+    assert [c["rank"] for c in classifications] == list(range(1, len(classifications) + 1))
+    assert [c["score"] for c in classifications] == sorted((c["score"] for c in classifications),
+                                                           reverse=True)
+    assert result["primary_result"] == classifications[0]
+    assert classifications[0]["violence_type"] == "discriminacao_genero"
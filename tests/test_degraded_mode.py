@@ -0,0 +1,95 @@
+import contextlib
+import io
+import threading
+from concurrent.futures import wait
+
+from engine.expert_system import ExpertSystem
+
+TEXT = "Meu professor me interrompe sempre durante a aula e questiona minha capacidade por ser mulher."
+RESPONSE = {"identified_keywords": {"action_type": ["interrupcao", "questionamento_capacidade"],
+                                    "target": ["genero"], "frequency": ["repetidamente"],
+                                    "relationship": ["relacao_hierarquica"], "context": ["sala_aula"]}}
+
+
+def _system(release):
+    system = ExpertSystem(api_key="teste")
+
+    def slow_groq(text, timer=None, **kwargs):
+        release.wait(5)
+        return RESPONSE
+
+    system.text_processor.extract_keywords = slow_groq
+    return system
+
+
+def _targets(result):
+    return {(c["violence_type"], c["subtype"]) for c in result["classifications"]}
+
+
+def test_slow_llm_returns_provisional_result_and_refines_later():
+    release, delivered_event = threading.Event(), threading.Event()
+    delivered = []
+
+    def on_refined(result):
+        delivered.append(result)
+        delivered_event.set()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        system = _system(release)
+        provisional = system.analyze_text(TEXT, latency_budget=0.05, on_refined=on_refined)
+        assert provisional["provisional"] is True
+        assert provisional["classifications"]  # extração local já classifica
+        assert not provisional["refinement"].done()
+
+        release.set()
+        refined = provisional["refinement"].result(timeout=5)
+        expected = system.analyze_text(TEXT)
+        assert delivered_event.wait(5)
+
+    assert "provisional" not in refined and refined == expected
+    assert delivered == [refined]
+    assert _targets(provisional) <= _targets(expected)
+
+
+def test_llm_within_budget_gives_the_normal_result():
+    release = threading.Event()
+    release.set()
+    with contextlib.redirect_stdout(io.StringIO()):
+        system = _system(release)
+        assert system.analyze_text(TEXT, latency_budget=5) == system.analyze_text(TEXT)
+
+
+def test_session_pass_is_provisional_and_refined_with_llm_keywords():
+    release = threading.Event()
+    with contextlib.redirect_stdout(io.StringIO()):
+        system = _system(release)
+        session = system.start_session()
+        provisional = session.analyze(TEXT, latency_budget=0.05)
+        assert provisional["provisional"] is True and provisional["classifications"]
+
+        release.set()
+        refined = provisional["refinement"].result(timeout=5)
+        expected = system.start_session().analyze(TEXT)
+        assert session.follow_up("resposta")["identified_keywords"] == expected["identified_keywords"]
+        system.close()
+
+    assert "provisional" not in refined
+    assert refined["identified_keywords"] == RESPONSE["identified_keywords"]
+    assert _targets(refined) == _targets(expected)
+    assert system._executor is None
+
+
+def test_refinement_of_a_restarted_session_is_cancelled():
+    release = threading.Event()
+    with contextlib.redirect_stdout(io.StringIO()):
+        system = _system(release)
+        session = system.start_session()
+        stale = session.analyze(TEXT, latency_budget=0.05)["refinement"]
+        current = session.analyze(TEXT, latency_budget=0.05)["refinement"]  # reinicia antes do LLM
+        release.set()
+        refined = current.result(timeout=5)
+        wait([stale], timeout=5)
+        system.close()
+
+    assert stale.cancelled()
+    assert refined["identified_keywords"] == RESPONSE["identified_keywords"]
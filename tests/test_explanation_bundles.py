@@ -0,0 +1,37 @@
+from engine.rules import ExplanationSystem
+from knowledge_base.explanation_bundles import EMPTY_BUNDLE
+from knowledge_base.violence_types import VIOLENCE_TYPES
+
+
+def _legacy(key, violence_type, subtype, default):
+    """Percurso antigo sobre VIOLENCE_TYPES, com a herança subtipo → tipo."""
+    info = VIOLENCE_TYPES.get(violence_type, {})
+    if subtype and 'subtipos' in info and subtype in info['subtipos']:
+        subtype_info = info['subtipos'][subtype]
+        fallback = default if key == 'definicao' else info.get(key, default)
+        return subtype_info.get(key, fallback)
+    return info.get(key, default)
+
+
+def test_bundles_match_legacy_lookups():
+    targets = [(vtype, None) for vtype in VIOLENCE_TYPES]
+    targets += [(vtype, subtype) for vtype, info in VIOLENCE_TYPES.items()
+                for subtype in info.get('subtipos', {})]
+    targets += [("perseguicao", "inexistente"), ("inexistente", None)]
+    for vtype, subtype in targets:
+        explanation = ExplanationSystem.format_complete_explanation(vtype, subtype)
+        assert explanation['definition'] == _legacy('definicao', vtype, subtype, '')
+        assert explanation['legal_context'] == _legacy('contexto_legal', vtype, subtype, '')
+        assert explanation['severity'] == _legacy('gravidade', vtype, subtype, '')
+        assert tuple(explanation['recommendations']) == tuple(_legacy('recomendacoes', vtype, subtype, []))
+        assert tuple(explanation['reporting_channels']) == tuple(_legacy('canais_denuncia', vtype, subtype, []))
+
+    assert ExplanationSystem.get_bundle("inexistente") is EMPTY_BUNDLE
+
+
+def test_complete_explanation_adds_fact_analysis():
+    explanation = ExplanationSystem.format_complete_explanation(
+        "violencia_sexual", "estupro", {"behavior": ["coercao_sexual"]}, "motivo")
+    assert explanation['analysis'] == ["Comportamentos identificados: coercao_sexual"]
+    assert explanation['reasoning'] == "motivo"
+    assert explanation['severity'] == VIOLENCE_TYPES["violencia_sexual"]["gravidade"]
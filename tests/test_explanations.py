@@ -0,0 +1,68 @@
+import contextlib
+import io
+import os
+import pickle
+import subprocess
+import sys
+
+from engine.facts import AnalysisResult, TextRelato, create_facts_from_groq_response
+from engine.rules import ViolenceRules
+from engine.rules.explanation_system import ExplanationRecord, LazyExplanation
+
+
+def _analyze(engine, keywords):
+    with contextlib.redirect_stdout(io.StringIO()):
+        engine.reset()
+        engine.declare(TextRelato(text="relato", processed=True))
+        for fact in create_facts_from_groq_response({"identified_keywords": keywords}):
+            engine.declare(fact)
+        engine.run()
+    return next(f for f in engine.facts.values() if isinstance(f, AnalysisResult))
+
+
+def test_explanations_are_rendered_on_first_access():
+    engine = ViolenceRules()
+    result = _analyze(engine, {"action_type": ["perseguicao"], "impact": ["medo_inseguranca"]})
+    primary = result["primary_result"]
+
+    record, = primary["explanation_record"]
+    assert isinstance(record, ExplanationRecord)
+    assert record.rule_name in ("detect_perseguicao", "detect_perseguicao_com_medo")
+    assert record.facts_used[0] == ("behavior", ("perseguicao",))
+    assert record.reasoning.startswith("A perseguição")
+
+    explanation = primary["explanation"]
+    assert isinstance(explanation, LazyExplanation) and not explanation.rendered
+    assert explanation[0] == "Identificado: perseguicao"
+    assert explanation.rendered
+    assert list(explanation) == engine.get_explanation("perseguicao")
+    assert explanation[-1].startswith("\n**Por que isso é importante:**")
+
+
+def test_headless_mode_skips_rendering():
+    engine = ViolenceRules(render_explanations=False)
+    result = _analyze(engine, {"action_type": ["interrupcao"], "frequency": ["repetidamente"]})
+    for classification in result["classifications"]:
+        assert "explanation" not in classification
+        assert classification["explanation_record"]
+    # O texto continua disponível sob demanda
+    assert "- O comportamento ocorre repetidamente" in \
+        engine.get_explanation("microagressoes", "interrupcoes_constantes")
+
+
+def test_record_renders_its_reasoning_in_another_process():
+    engine = ViolenceRules(render_explanations=False)
+    result = _analyze(engine, {"action_type": ["exposicao_conteudo"]})
+    record, = result["primary_result"]["explanation_record"]
+    assert record.reasoning
+
+    # Um processo novo não disparou nenhuma regra: o texto precisa vir no registro
+    code = (
+        "import pickle, sys\n"
+        "import engine\n"
+        "record = pickle.loads(sys.stdin.buffer.read())\n"
+        "print(record.render()[-1])\n"
+    )
+    rendered = subprocess.run([sys.executable, "-c", code], input=pickle.dumps(record), check=True,
+                              capture_output=True, cwd=os.path.dirname(os.path.dirname(__file__))).stdout
+    assert rendered.decode().strip() == f"**Por que isso é importante:** {record.reasoning}"
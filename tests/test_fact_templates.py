@@ -0,0 +1,52 @@
+import contextlib
+import io
+
+import engine  # noqa: F401  (compatibilidade do experta com Python 3.10+)
+from engine import facts
+from engine.facts import KeywordFact, TextRelato, ViolenceBehavior, keyword_facts
+from engine.rules import ViolenceRules
+
+
+def test_keyword_facts_are_independent_copies_of_validated_templates(monkeypatch):
+    first = keyword_facts("action_type", "".join(["interrup", "cao"]))
+    second = keyword_facts("action_type", "interrupcao")
+
+    assert first == second == [KeywordFact(category="action_type", keyword="interrupcao"),
+                               ViolenceBehavior(behavior_type="interrupcao")]
+    assert all(a is not b for a, b in zip(first, second))
+    assert first[0]["keyword"] is second[0]["keyword"]  # string internada
+
+    def schema_validation(self):
+        raise AssertionError("validação repetida")
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        engine_ = ViolenceRules()
+        engine_.reset()
+        # Fatos já validados não passam de novo pelo Schema na declaração
+        monkeypatch.setattr(facts.Fact, "validate", schema_validation)
+        engine_.declare_many(first)
+        engine_.declare_many(second)  # duplicatas continuam sendo descartadas
+    assert len(engine_.facts) == 3
+    assert first[0].__factid__ is not None and second[0].__factid__ is None
+
+
+def test_invalid_keywords_still_fail_on_declaration():
+    with contextlib.redirect_stdout(io.StringIO()):
+        engine_ = ViolenceRules()
+        engine_.reset()
+        try:
+            engine_.declare_many(keyword_facts("action_type", ["lista"]))
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("palavra-chave inválida aceita")
+
+
+def test_clones_have_their_own_defaults():
+    template = TextRelato(text="relato")
+    clone = facts._clone(template)
+
+    assert type(clone) is TextRelato and clone == template and clone is not template
+    assert clone["processed"] is False  # default do Field, resolvido na cópia
+    clone["processed"] = True
+    assert template["processed"] is False and "processed" not in template
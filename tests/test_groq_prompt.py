@@ -0,0 +1,32 @@
+import re
+
+from utils.groq_integration import GroqAPI
+
+KEYWORDS = {"action_type": ["interrupcao", "perseguicao"], "target": ["genero"]}
+
+
+def _system_prompt(**kwargs):
+    return GroqAPI(api_key="teste").build_prompt("relato", KEYWORDS, fingerprint="v1", **kwargs)["system"]
+
+
+def test_extraction_only_prompt_has_no_question_instructions():
+    for follow_up in (False, True):
+        asking = _system_prompt(is_follow_up=follow_up, missing_fields=["frequency"])
+        extraction = _system_prompt(is_follow_up=follow_up, missing_fields=["frequency"], ask_questions=False)
+
+        assert '"follow_up_questions"' in asking
+        assert '"follow_up_questions"' not in extraction
+        assert not re.search(r"pergunt", extraction, re.IGNORECASE)
+        assert '"interrupcao", "perseguicao"' in extraction and '"missing_information"' in extraction
+        # As regras continuam numeradas em sequência
+        assert re.findall(r"^\s+(\d+)\. ", extraction, re.MULTILINE) == ["1", "2", "3", "4"]
+        assert re.findall(r"^\s+(\d+)\. ", asking, re.MULTILINE) == ["1", "2", "3", "4", "5", "6"]
+
+
+def test_cached_prompts_are_kept_apart_by_question_mode():
+    api = GroqAPI(api_key="teste")
+    asking = api.build_prompt("relato", KEYWORDS, fingerprint="v1")["system"]
+    extraction = api.build_prompt("relato", KEYWORDS, fingerprint="v1", ask_questions=False)["system"]
+
+    assert '"follow_up_questions"' not in extraction
+    assert api.build_prompt("outro", KEYWORDS, fingerprint="v1")["system"] is asking
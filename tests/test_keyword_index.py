@@ -0,0 +1,31 @@
+from knowledge_base.keyword_index import KeywordIndex, normalize_term
+from knowledge_base.violence_manager import get_violence_manager
+
+
+def _index():
+    index = KeywordIndex()
+    index.add_entry(("a", None), ["Histérico", "cortar fala"])
+    index.add_entry(("a", "sub"), ["histérico", "ameaça"])
+    index.add_entry(("b", None), ["ameaçar"])
+    index.freeze()
+    return index
+
+
+def test_normalize_term_strips_accents_and_case():
+    assert normalize_term("HISTÉRICO") == "histerico"
+    assert normalize_term("ameaça") == "ameaca"
+
+
+def test_search_scores_and_ties_keep_insertion_order():
+    index = _index()
+    assert index.search(["histerico", "fala"]) == [("a", None, 2), ("a", "sub", 1)]
+    assert index.search(["AMEAC"]) == [("a", "sub", 1), ("b", None, 1)]
+    assert index.search(["mea"], prefix=True) == []
+    assert index.search(["amea"], prefix=True) == [("a", "sub", 1), ("b", None, 1)]
+    assert index.search(["inexistente"]) == []
+
+
+def test_manager_search_is_accent_insensitive():
+    manager = get_violence_manager()
+    assert manager.search_by_keywords(["histerico"]) == manager.search_by_keywords(["histérico"])
+    assert ("microagressoes", "comentarios_saude_mental", 1) in manager.search_by_keywords(["histerico"])
@@ -0,0 +1,103 @@
+import contextlib
+import gc
+import os
+import tracemalloc
+
+from engine.conversation_context import ConversationContext
+from engine.expert_system import ExpertSystem
+
+
+class _NullWriter:
+    def write(self, text):
+        return len(text)
+
+    def flush(self):
+        pass
+
+
+def _traced_growth(run, settle, measure):
+    """Crescimento da memória rastreada em `measure` passos, após `settle` passos de aquecimento."""
+    tracemalloc.start()
+    try:
+        run(settle)
+        gc.collect()
+        before = tracemalloc.get_traced_memory()[0]
+        run(measure)
+        gc.collect()
+        return tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+
+
+def test_context_is_a_ring_buffer_with_digest():
+    context = ConversationContext(max_messages=4, max_chars=50)
+    step = iter(range(10 ** 6))
+
+    def run(n):
+        for _ in range(n):
+            i = next(step)
+            context.append(f"mensagem {i} " + "x" * 100, keywords={"frequency": [f"termo{i % 3}"]})
+
+    growth = _traced_growth(run, 1000, 100_000)
+    assert growth < 8 * 1024
+    assert len(context) == 4
+    assert context.dropped == 101_000 - 4
+    assert all(len(message["content"]) == 50 for message in context.messages())
+    assert context.digest().endswith("frequency: termo0, termo1, termo2")
+
+
+def test_session_memory_is_flat_across_follow_ups():
+    response = {"identified_keywords": {"action_type": ["interrupcao"], "target": ["genero"]}}
+    with contextlib.redirect_stdout(open(os.devnull, "w")):
+        system = ExpertSystem(api_key="teste", latency_window=8, context_size=4)
+        system.text_processor.extract_keywords = lambda text, timer=None, **kwargs: response
+        session = system.start_session()
+        session.analyze("relato")
+        step = iter(range(10 ** 6))
+
+        def run(n):
+            for _ in range(n):
+                # Textos grandes: reter cada relato cresceria ~20 KB por etapa
+                session.follow_up(f"resposta {next(step)} " + "x" * 20_000)
+
+        run(10)
+        growth = _traced_growth(run, 5, 20)
+
+    assert growth < 100 * 1024
+    assert len(session.context) == 4
+    assert len(session.engine.facts) < 20
+
+
+def test_shared_system_memory_is_flat_across_analyses():
+    responses = [{"identified_keywords": {"action_type": ["interrupcao"], "target": ["genero"]}},
+                 {"identified_keywords": {"action_type": ["perseguicao"], "context": ["local_trabalho"],
+                                          "frequency": ["repetidamente"]}}]
+    # Saída descartada sem buffer: o buffer de um arquivo oscilaria entre as medições
+    with contextlib.redirect_stdout(_NullWriter()):
+        # Janela de latência pequena: o histograma enche durante o aquecimento
+        system = ExpertSystem(api_key="teste", latency_window=8)
+        system.text_processor.extract_keywords = \
+            lambda text, timer=None, **kwargs: responses[len(text) % 2]
+        step = iter(range(10 ** 6))
+
+        def run(n):
+            for _ in range(n):
+                # Relatos distintos de ~1 KB: reter cada um cresceria ~300 KB por lote
+                i = next(step)
+                system.analyze_text(f"relato {i} " + "x" * (1000 + i % 2))
+
+        tracemalloc.start()
+        try:
+            run(200)
+            growth = []
+            for _ in range(3):
+                gc.collect()
+                before = tracemalloc.get_traced_memory()[0]
+                run(300)
+                gc.collect()
+                growth.append(tracemalloc.get_traced_memory()[0] - before)
+        finally:
+            tracemalloc.stop()
+
+    # Vazamento cresce a cada lote; oscilações dos conjuntos do Rete não acumulam
+    assert abs(sum(growth[1:])) / 600 < 16, growth
@@ -0,0 +1,53 @@
+import contextlib
+import gc
+import io
+
+import pytest
+
+from engine.batch import to_jsonable
+from engine.expert_system import ExpertSystem
+from engine.process_pool import ClassifyOptions, ProcessPoolClassifier
+from knowledge_base.reloadable import get_knowledge_base
+from utils.pool_benchmark import synthetic_rows
+
+
+def _worker_state(_):
+    import sys
+    preload = sys.modules.get("engine.pool_preload")
+    return gc.get_freeze_count() > 0 and bool(preload and preload._SYSTEMS)
+
+
+def test_pool_streams_the_same_results_as_a_single_process():
+    rows = synthetic_rows(get_knowledge_base().current().keywords_dict, 40, seed=1)
+    with contextlib.redirect_stdout(io.StringIO()):
+        system = ExpertSystem(api_key="teste", render_explanations=False)
+        expected = {key: system.analyze_response(text, response) for key, text, response in rows}
+
+    with ProcessPoolClassifier(workers=2, chunk_size=8) as pool:
+        assert all(pool._executor.map(_worker_state, range(4)))  # pré-aquecidos no fork-server
+        streamed = list(pool.map(rows))
+
+    assert sorted(key for key, _ in streamed) == list(range(40))
+    for key, results in streamed:
+        assert results.pop("timings")["total"] > 0
+        assert to_jsonable(results) == to_jsonable(expected[key])
+
+
+def test_worker_refuses_a_knowledge_base_version_it_cannot_load():
+    rows = synthetic_rows(get_knowledge_base().current().keywords_dict, 4, seed=2)
+    current = ClassifyOptions(kb_fingerprint=get_knowledge_base().fingerprint)
+    stale = ClassifyOptions(kb_fingerprint="0" * 16)
+
+    with ProcessPoolClassifier(workers=1, options=current) as pool:
+        assert len(pool.submit(rows).result()) == 4
+    with ProcessPoolClassifier(workers=1, options=stale) as pool:
+        with pytest.raises(RuntimeError, match="0" * 16):
+            pool.submit(rows).result()
+
+
+def test_workers_without_fork_server_keep_stdout_clean(capfd):
+    rows = synthetic_rows(get_knowledge_base().current().keywords_dict, 8, seed=3)
+    with ProcessPoolClassifier(workers=1, chunk_size=4, start_method="spawn") as pool:
+        assert len(list(pool.map(rows))) == 8
+    # O lote escreve o JSONL na saída padrão: nada do motor pode aparecer nela
+    assert capfd.readouterr().out == ""
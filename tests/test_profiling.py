@@ -0,0 +1,70 @@
+import contextlib
+import io
+import os
+import re
+import time
+from types import SimpleNamespace
+
+from engine.expert_system import ExpertSystem
+from utils import profiling
+from utils.profiling import TRUNCATED_FRAME, collapse_stacks
+
+RESPONSE = {"identified_keywords": {"action_type": ["interrupcao"], "target": ["genero"]}}
+COLLAPSED_LINE = re.compile(r"^[^ ]+(;[^ ]+)* \d+$")
+
+
+def _system():
+    system = ExpertSystem(api_key="teste")
+    system.text_processor.extract_keywords = lambda text, timer=None, **kwargs: RESPONSE
+    return system
+
+
+def _captures(directory):
+    return sorted(name[:-len(".pstats")] for name in os.listdir(directory) if name.endswith(".pstats"))
+
+
+def test_next_n_captures_exactly_n_analyses_in_collapsed_format(tmp_path):
+    with contextlib.redirect_stdout(io.StringIO()):
+        system = _system()
+        system.enable_profiling(str(tmp_path), next_n=2)
+        for _ in range(3):
+            system.analyze_text("relato")
+
+    captures = _captures(tmp_path)
+    assert len(captures) == 2
+    for stem in captures:
+        with open(tmp_path / (stem + ".collapsed"), encoding="utf-8") as file:
+            lines = file.read().splitlines()
+        assert lines and all(COLLAPSED_LINE.match(line) for line in lines)
+
+
+def test_predicate_selects_texts_and_old_captures_are_pruned(tmp_path):
+    with contextlib.redirect_stdout(io.StringIO()):
+        system = _system()
+        system.enable_profiling(str(tmp_path), predicate=lambda text: "perfilar" in text, max_captures=2)
+        for text in ("perfilar 1", "outro", "perfilar 2", "outro", "perfilar 3"):
+            system.analyze_text(text)
+            time.sleep(0.01)
+
+    captures = _captures(tmp_path)
+    assert [stem[-4:] for stem in captures] == ["0002", "0003"]
+    assert len(os.listdir(tmp_path)) == 4  # .pstats e .collapsed de cada captura
+
+
+def test_dense_call_graph_is_capped_and_keeps_total_time(monkeypatch):
+    # 2 funções por nível, cada uma chamando as duas do nível seguinte: 2^40 caminhos
+    levels, tt = 40, 0.001
+    entries = {}
+    ct = tt
+    for level in reversed(range(levels)):
+        for name in ("a", "b"):
+            callers = {} if level == 0 else {("m.py", level - 1, side): (1, 1, tt / 2, ct / 2) for side in "ab"}
+            entries[("m.py", level, name)] = (2, 2, tt, ct, callers)
+        ct = tt + ct
+    monkeypatch.setattr(profiling, "MAX_STACK_PATHS", 500)
+
+    stacks = collapse_stacks(SimpleNamespace(stats=entries))
+
+    assert len(stacks) <= 500 * 2
+    assert any(stack.endswith(TRUNCATED_FRAME) for stack in stacks)
+    assert abs(sum(stacks.values()) - 2 * levels * tt * 1e6) < 0.01 * 2 * levels * tt * 1e6
@@ -0,0 +1,50 @@
+import pytest
+
+from knowledge_base import snapshot as kb_snapshot
+from knowledge_base import violence_manager as vm
+from knowledge_base.reloadable import ReloadableKnowledgeBase, build_from_sources
+from knowledge_base.violence_types import VIOLENCE_TYPES
+
+
+@pytest.fixture
+def restore_manager():
+    original = vm.get_violence_manager()
+    yield
+    vm.set_violence_manager(original)
+
+
+def _write_snapshot(path, definition=None):
+    sections = kb_snapshot.collect_sections()
+    if definition is not None:
+        sections["violence_types"]["perseguicao"]["definition"] = definition
+    with open(path, "wb") as output:
+        output.write(kb_snapshot.encode_snapshot(sections, kb_snapshot.compute_source_hash()))
+
+
+def test_reload_swaps_atomically_and_keeps_pinned_version(tmp_path, restore_manager):
+    path = str(tmp_path / "kb.bin")
+    _write_snapshot(path)
+    kb = ReloadableKnowledgeBase(snapshot_path=path)
+    old = kb.current()
+    assert kb.reload() is False  # conteúdo igual: nenhuma troca
+
+    swapped = []
+    kb.subscribe(swapped.append)
+    _write_snapshot(path, definition="definição nova")
+
+    with old.pinned():
+        assert kb.has_changed()
+        assert kb.reload() is True
+        # A análise em andamento continua vendo a versão antiga
+        assert VIOLENCE_TYPES["perseguicao"]["definicao"] != "definição nova"
+
+    assert VIOLENCE_TYPES["perseguicao"]["definicao"] == "definição nova"
+    assert swapped == [kb.current()]
+    assert kb.fingerprint != old.fingerprint
+
+
+def test_sources_and_snapshot_share_fingerprint(tmp_path, restore_manager):
+    path = str(tmp_path / "kb.bin")
+    kb_snapshot.build_snapshot(path)
+    from_snapshot = ReloadableKnowledgeBase(snapshot_path=path).current()
+    assert build_from_sources().fingerprint == from_snapshot.fingerprint
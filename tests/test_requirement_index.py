@@ -0,0 +1,33 @@
+from engine.rules import ViolenceRules
+from engine.rules.requirement_index import RequirementIndex, collect_rule_specs
+from knowledge_base.keywords_dictionary import FIELDS_QUESTIONS
+from knowledge_base.violence_manager import get_violence_manager
+
+
+def _index():
+    return RequirementIndex(collect_rule_specs(ViolenceRules), get_violence_manager().get_severity_score)
+
+
+def test_near_miss_asks_for_the_missing_category():
+    index = _index()
+    misses = index.near_misses({"action_type": ["coercao_sexual"]})
+    assert ("violencia_sexual", "estupro") in {miss.target for miss in misses}
+    assert {miss.missing_category for miss in misses} == {"impact"}
+
+    questions = index.select_questions({"action_type": ["coercao_sexual"]}, FIELDS_QUESTIONS)
+    assert questions == [("impact", FIELDS_QUESTIONS["impact"])]
+
+    # Alvo já classificado não gera pergunta; categoria já presente também não
+    assert index.near_misses({"action_type": ["coercao_sexual"]},
+                             exclude=[("violencia_sexual", "estupro")]) == []
+    assert index.near_misses({"action_type": ["coercao_sexual"], "impact": ["tristeza"]}) == []
+
+
+def test_questions_ordered_by_severity_and_limited():
+    index = _index()
+    ranked = index.rank_missing_categories({"target": ["genero"]})
+    severities = [severity for _, severity, _ in ranked]
+    assert severities == sorted(severities, reverse=True)
+
+    questions = index.select_questions({"target": ["genero"]}, FIELDS_QUESTIONS, limit=1)
+    assert questions == [(ranked[0][0], FIELDS_QUESTIONS[ranked[0][0]])]
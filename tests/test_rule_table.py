@@ -0,0 +1,133 @@
+import contextlib
+import io
+
+from experta.matchers import ReteMatcher
+from experta.matchers.rete.nodes import OrdinaryMatchNode
+
+from engine.facts import (
+    CATEGORY_FACTS, KeywordFact, TextRelato, ViolenceClassification, create_facts_from_groq_response,
+    keyword_facts
+)
+from engine.rules import TriageViolenceRules, ViolenceRules
+from engine.rules.rule_table import collect_evidence
+from engine.rules.sexual_violence_rules import SEXUAL_VIOLENCE_RULES
+
+
+def _quiet(func, *args):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return func(*args)
+
+
+def _classify(engine, keywords):
+    def run():
+        engine.reset()
+        engine.declare(TextRelato(text="relato", processed=True))
+        for fact in create_facts_from_groq_response({"identified_keywords": keywords}):
+            engine.declare(fact)
+        engine.run()
+    _quiet(run)
+    return {(engine.facts[i]["violence_type"], engine.facts[i]["subtype"])
+            for i in engine.get_matching_facts(ViolenceClassification)}
+
+
+def _join_nodes(root):
+    seen, stack, joins = set(), [root], 0
+    while stack:
+        node = stack.pop()
+        if id(node) in seen:
+            continue
+        seen.add(id(node))
+        joins += isinstance(node, OrdinaryMatchNode)
+        stack.extend(child.node for child in node.children)
+    return joins
+
+
+def test_compiled_rules_classify_like_hand_written_rules():
+    engine = _quiet(ViolenceRules)
+    assert _classify(engine, {"action_type": ["interrupcao"], "frequency": ["continuamente"]}) == \
+        {("microagressoes", "interrupcoes_constantes")}
+    assert _classify(engine, {"action_type": ["pressao_tarefas"], "target": ["genero"]}) == set()
+    assert _classify(engine, {"action_type": ["pressao_tarefas"], "target": ["genero"],
+                              "context": ["local_trabalho"]}) == {("assedio_moral_genero", "")}
+    assert _classify(engine, {"action_type": ["insulto_racial"]}) == \
+        {("discriminacao_racial", "ofensa_direta")}
+
+    _classify(engine, {"action_type": ["interrupcao"], "frequency": ["repetidamente"]})
+    assert "- O comportamento ocorre repetidamente" in \
+        engine.get_explanation("microagressoes", "interrupcoes_constantes")
+
+
+def test_evidence_uses_typed_facts_of_each_condition():
+    engine = _quiet(ViolenceRules)
+    _classify(engine, {"action_type": ["contato_fisico_nao_consentido"],
+                       "context": ["sala_aula"], "relationship": ["colega"]})
+    spec = next(s for s in SEXUAL_VIOLENCE_RULES if s.name == "detect_importunacao_sexual")
+    assert collect_evidence(engine, spec) == {
+        "behavior": ["contato_fisico_nao_consentido"],
+        "context": ["sala_aula"],
+        "relationship": ["colega"],
+    }
+
+
+def test_shared_join_matcher_reduces_beta_network():
+    engine = _quiet(ViolenceRules)
+    unshared = ReteMatcher(engine)
+    assert _join_nodes(engine.matcher.root_node) < _join_nodes(unshared.root_node)
+
+
+def test_rules_become_eligible_only_when_the_engine_runs():
+    engine = _quiet(ViolenceRules)
+    facts = create_facts_from_groq_response({"identified_keywords": {
+        "action_type": ["interrupcao"], "frequency": ["continuamente"]}})
+
+    def declare():
+        engine.reset()
+        for fact in facts:
+            engine.declare(fact)
+    _quiet(declare)
+    assert engine.agenda.activations == []  # nada propagado durante a inserção
+
+    _quiet(engine.run)
+    kinds = sorted(type(fact).__name__ for fact in engine.facts.values())
+    assert kinds == sorted(["InitialFact", "AnalysisResult", "ViolenceClassification"]
+                           + [type(fact).__name__ for fact in facts])
+
+
+def test_declare_many_refreshes_the_agenda_once_for_the_batch():
+    keywords = {"action_type": ["interrupcao"], "frequency": ["continuamente"], "context": ["sala_aula"]}
+    facts = create_facts_from_groq_response({"identified_keywords": keywords})
+    assert [type(fact) for fact in facts] == [
+        cls for category in keywords for cls in (KeywordFact, CATEGORY_FACTS[category][0])]
+    assert keyword_facts("categoria_sem_fato", "x") == [KeywordFact(category="categoria_sem_fato", keyword="x")]
+
+    engine = _quiet(ViolenceRules)
+    _quiet(engine.reset)
+    _quiet(engine.declare_many, facts)
+    assert engine.agenda.activations  # lote já propagado
+    _quiet(engine.run)
+    assert {(engine.facts[i]["violence_type"], engine.facts[i]["subtype"])
+            for i in engine.get_matching_facts(ViolenceClassification)} == _classify(engine, keywords)
+
+
+def test_light_reset_matches_full_reset():
+    inputs = [
+        {"action_type": ["interrupcao", "coercao_sexual"], "target": ["genero"], "impact": ["medo_inseguranca"]},
+        {"action_type": ["perseguicao"], "frequency": ["repetidamente"]},
+        {"action_type": ["interrupcao"], "target": ["genero"]},
+    ]
+
+    def analyses(engine, full):
+        states = []
+        for keywords in inputs * 2:
+            engine.reset(full=full)
+            engine.declare_many(create_facts_from_groq_response({"identified_keywords": keywords}))
+            engine.run(max_results=1)  # triagem interrompida deixa a agenda com ativações
+            pending = [(activation.rule, activation.facts) for activation in engine.agenda.activations]
+            states.append((repr(engine.facts), engine.explanations, pending))
+        return states
+
+    full, light = _quiet(TriageViolenceRules), _quiet(TriageViolenceRules)
+    expected = _quiet(analyses, full, True)
+    _quiet(light.reset)
+    light.get_deffacts = None  # o reset leve não procura DefFacts
+    assert _quiet(analyses, light, False) == expected
@@ -0,0 +1,33 @@
+from knowledge_base import snapshot as kb_snapshot
+from knowledge_base.violence_manager import ViolenceTypeManager
+
+
+def test_snapshot_round_trip(tmp_path):
+    path = str(tmp_path / "kb.bin")
+    kb_snapshot.build_snapshot(path)
+
+    ok, reason = kb_snapshot.check_snapshot(path)
+    assert ok, reason
+
+    loaded = kb_snapshot.load_snapshot(path)
+    assert loaded is not None
+    assert ViolenceTypeManager.from_snapshot(loaded).to_dict_format() == \
+        ViolenceTypeManager().to_dict_format()
+    assert loaded.section("keywords_dict")["frequency"] == \
+        ["unica_vez", "algumas_vezes", "repetidamente", "continuamente"]
+
+
+def test_stale_snapshot_is_detected(tmp_path, monkeypatch):
+    path = str(tmp_path / "kb.bin")
+    sections = kb_snapshot.collect_sections()
+    sections["severity_ranking"]["perseguicao"] = 1
+    with open(path, "wb") as output:
+        output.write(kb_snapshot.encode_snapshot(sections, kb_snapshot.compute_source_hash()))
+
+    ok, reason = kb_snapshot.check_snapshot(path)
+    assert not ok and "desatualizado" in reason
+
+    # Fontes alteradas: o snapshot deixa de ser usado na inicialização
+    kb_snapshot.build_snapshot(path)
+    monkeypatch.setattr(kb_snapshot, "compute_source_hash", lambda: "00" * 32)
+    assert kb_snapshot.load_snapshot(path) is None
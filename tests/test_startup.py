@@ -0,0 +1,39 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from utils.startup_benchmark import (
+    IMPORT_BUDGETS_MS, REPO_ROOT, best_of, format_report, measure_import
+)
+
+
+def test_engine_import_does_not_load_streamlit():
+    for target in IMPORT_BUDGETS_MS:
+        report = measure_import(target)
+        assert report.loaded_forbidden == [], target
+
+
+def test_knowledge_base_is_built_on_first_access():
+    code = (
+        "import engine.expert_system\n"
+        "import knowledge_base.violence_manager as vm\n"
+        "assert vm._violence_manager_instance is None\n"
+        "assert 'VIOLENCE_TYPES' not in vars(vm)\n"
+        "from knowledge_base.violence_types import VIOLENCE_TYPES\n"
+        "assert vm._violence_manager_instance is None\n"
+        "assert 'microagressoes' in VIOLENCE_TYPES\n"
+        "assert vm._violence_manager_instance is not None\n"
+    )
+    subprocess.run([sys.executable, "-c", code], cwd=REPO_ROOT, check=True)
+
+
+# Tempo de relógio depende da máquina e da carga: o orçamento só é verificado
+# quando pedido (ou pelo gate `python -m utils.startup_benchmark`)
+@pytest.mark.skipif(not os.environ.get("VIOLENCE_CHECK_IMPORT_BUDGETS"),
+                    reason="defina VIOLENCE_CHECK_IMPORT_BUDGETS=1 para verificar os orçamentos de import")
+def test_import_time_budgets():
+    for target, budget_ms in IMPORT_BUDGETS_MS.items():
+        report = best_of(target)
+        assert report.total_ms <= budget_ms, format_report(report, budget_ms=budget_ms)
@@ -0,0 +1,34 @@
+import contextlib
+import io
+
+from engine.expert_system import ExpertSystem
+from knowledge_base.reloadable import _pinned_version
+
+RESPONSE = {"identified_keywords": {"action_type": ["interrupcao", "questionamento_capacidade"],
+                                    "target": ["genero"], "frequency": ["repetidamente"]}}
+
+
+def _system():
+    system = ExpertSystem(api_key="teste")
+    system.text_processor.extract_keywords = lambda text, timer=None, **kwargs: RESPONSE
+    return system
+
+
+def test_events_stream_keywords_classifications_and_result():
+    with contextlib.redirect_stdout(io.StringIO()):
+        system = _system()
+        events = system.analyze_text_iter("relato")
+        first = next(events)
+        assert _pinned_version.get() is None  # versão fixada só dentro de cada passo
+        rest = list(events)
+        expected = system.analyze_text("relato")
+
+    assert first.kind == "keywords"
+    assert first.data == RESPONSE["identified_keywords"]
+    assert [event.kind for event in rest[:-1]] == ["classification"] * (len(rest) - 1)
+    assert rest[-1].kind == "result"
+
+    result = rest[-1].data
+    assert result == expected
+    streamed = [(event.data["violence_type"], event.data["subtype"]) for event in rest[:-1]]
+    assert sorted(streamed) == sorted((c["violence_type"], c["subtype"]) for c in result["classifications"])
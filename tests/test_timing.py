@@ -0,0 +1,57 @@
+import contextlib
+import io
+import json
+
+from engine.expert_system import ExpertSystem
+from utils import groq_integration
+from utils.timing import LatencyHistogram
+
+STAGES = {"reset", "prompt", "groq_request", "validation", "fact_creation", "declare",
+          "rule_firing", "consolidation", "collect", "total"}
+
+
+class _GroqResponse:
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        keywords = {"identified_keywords": {"action_type": ["interrupcao"], "target": ["genero"]}}
+        return {"choices": [{"message": {"content": json.dumps(keywords)}}]}
+
+
+def test_analyze_text_reports_every_stage_only_when_asked(monkeypatch):
+    monkeypatch.setattr(groq_integration.requests, "post", lambda *args, **kwargs: _GroqResponse())
+    with contextlib.redirect_stdout(io.StringIO()):
+        system = ExpertSystem(api_key="teste")
+        timed = system.analyze_text("Ele sempre me interrompe nas reuniões", include_timings=True)
+        plain = system.analyze_text("Ele sempre me interrompe nas reuniões")
+
+    assert set(timed["timings"]) == STAGES
+    assert all(ms >= 0 for ms in timed["timings"].values())
+    assert timed["timings"]["total"] >= max(ms for stage, ms in timed["timings"].items() if stage != "total")
+    assert "timings" not in plain
+    assert plain["classifications"] == timed["classifications"]
+    assert system.latency.summary()["total"]["count"] == 2
+
+
+def test_percentiles_use_nearest_rank():
+    histogram = LatencyHistogram()
+    for ms in reversed(range(1, 101)):
+        histogram.record({"total": float(ms)})
+    histogram.record({"reset": 7.0})
+
+    assert histogram.percentiles("total") == {"p50": 50.0, "p95": 95.0, "p99": 99.0}
+    assert histogram.percentiles("total", quantiles=(0, 1, 100)) == {"p0": 1.0, "p1": 1.0, "p100": 100.0}
+    assert histogram.percentiles("reset") == {"p50": 7.0, "p95": 7.0, "p99": 7.0}
+    assert histogram.percentiles("collect") is None
+
+
+def test_window_evicts_oldest_samples():
+    histogram = LatencyHistogram(window=10)
+    for ms in range(1, 26):
+        histogram.record({"total": float(ms)})
+
+    # Restam 16..25: as 15 primeiras amostras saíram da janela
+    assert histogram.summary()["total"] == {"p50": 20.0, "p95": 25.0, "p99": 25.0, "count": 10}
+    histogram.clear()
+    assert histogram.summary() == {}
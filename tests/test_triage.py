@@ -0,0 +1,59 @@
+import contextlib
+import io
+
+from engine.expert_system import ExpertSystem
+from knowledge_base import snapshot as kb_snapshot
+from knowledge_base.reloadable import build_from_snapshot
+from knowledge_base.violence_manager import get_severity
+
+RESPONSE = {"identified_keywords": {
+    "action_type": ["interrupcao", "questionamento_capacidade", "coercao_sexual", "perseguicao"],
+    "target": ["genero"], "frequency": ["repetidamente"], "impact": ["medo_inseguranca"],
+}}
+
+
+def _targets(result):
+    return {(c["violence_type"], c["subtype"]) for c in result["classifications"]}
+
+
+def test_triage_keeps_only_the_most_severe_classifications():
+    with contextlib.redirect_stdout(io.StringIO()):
+        system = ExpertSystem(api_key="teste")
+        system.text_processor.extract_keywords = lambda text, timer=None, **kwargs: RESPONSE
+        full = system.analyze_text("relato")
+        top = system.analyze_text("relato", max_results=1)
+        severe = system.analyze_text("relato", stop_after_severity=8)
+        again = system.analyze_text("relato")
+
+    severity = {target: get_severity(*target) for target in _targets(full)}
+    assert len(severity) > 2 and len(set(severity.values())) > 1
+
+    assert len(top["classifications"]) == 1
+    assert severity[top["primary_result"]["violence_type"], top["primary_result"]["subtype"]] == max(severity.values())
+    assert _targets(severe) == {target for target, score in severity.items() if score >= 8}
+
+    # O modo completo continua no motor padrão, sem alteração
+    assert again == full
+
+
+def test_triage_salience_follows_the_knowledge_base_version(tmp_path):
+    # Nova versão da base: perseguição passa a ser a classificação mais grave
+    sections = kb_snapshot.collect_sections()
+    for violence_type in sections["violence_types"].values():
+        for entry in [violence_type, *violence_type["subtypes"]]:
+            entry["severity_score"] = 1
+    sections["violence_types"]["perseguicao"]["severity_score"] = 10
+    path = str(tmp_path / "kb.bin")
+    with open(path, "wb") as output:
+        output.write(kb_snapshot.encode_snapshot(sections, kb_snapshot.compute_source_hash()))
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        system = ExpertSystem(api_key="teste")
+        before = system.analyze_response("relato", RESPONSE, max_results=1)
+        with build_from_snapshot(path).pinned():
+            reloaded = system.analyze_response("relato", RESPONSE, max_results=1)
+        after = system.analyze_response("relato", RESPONSE, max_results=1)
+
+    assert _targets(before) != {("perseguicao", "")}
+    assert _targets(reloaded) == {("perseguicao", "")}
+    assert after == before
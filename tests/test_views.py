@@ -0,0 +1,38 @@
+import dataclasses
+from collections.abc import Mapping
+
+import pytest
+
+from knowledge_base import violence_manager as vm
+from knowledge_base import violence_types
+
+
+def _plain(value):
+    if isinstance(value, Mapping):
+        return {key: _plain(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return list(value)
+    return value
+
+
+def test_views_match_legacy_dicts():
+    manager = vm.get_violence_manager()
+    assert _plain(violence_types.VIOLENCE_TYPES) == _plain(manager.to_dict_format())
+    assert _plain(violence_types.REPORT_CONTACT) == vm._build_report_contact(manager)
+    assert _plain(violence_types.SEVERITY_RANKING) == vm._build_severity_ranking(manager)
+
+
+def test_knowledge_base_is_read_only():
+    manager = vm.get_violence_manager()
+    vtype = manager.get_violence_type("microagressoes")
+
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        vtype.definition = ""
+    with pytest.raises(TypeError):
+        manager.get_all_violence_types()["novo"] = vtype
+    with pytest.raises(TypeError):
+        vtype.subtypes["novo"] = None
+    assert not hasattr(vtype, "__dict__")
+
+    # Sem cópias: a visão devolve as tuplas do próprio modelo
+    assert violence_types.VIOLENCE_TYPES["microagressoes"]["palavras_chave"] is vtype.keywords
@@ -3,6 +3,8 @@ import requests
 from typing import Dict, List, Any, Optional
 import os
 
+from utils.timing import StageTimer
+
 class GroqAPI:
     """
     Classe para comunicação com a API do Groq.
@@ -18,16 +20,66 @@ class GroqAPI:
             "Content-Type": "application/json",
             "Authorization": f"Bearer {self.api_key}"
         }
+        self._prompt_fingerprint: Optional[str] = None
+        self._system_prompt_cache: Dict[tuple, str] = {}
+        # missing_fields vem da resposta do LLM: limita o número de variações em cache
+        self.max_cached_prompts = 64
     
     def build_prompt(self, user_text: str, keywords_dict: Dict, 
                     is_follow_up: bool = False,
-                    missing_fields: List[str] = None) -> Dict[str, str]:
+                    missing_fields: List[str] = None,
+                    fingerprint: Optional[str] = None,
+                    ask_questions: bool = True) -> Dict[str, str]:
         """
         Constrói o prompt para o Groq com instruções claras sobre as palavras-chave.
+        
+        Com `ask_questions=False` o LLM é usado apenas para extração: o prompt
+        não pede perguntas complementares (escolhidas localmente pelo motor).
+        
+        Se `fingerprint` (versão da base de conhecimento) for informado, o prompt
+        de sistema é reaproveitado entre chamadas com a mesma versão; o cache é
+        descartado quando a versão muda ou quando atinge `max_cached_prompts`.
         """
         # Armazenar o dicionário para uso na validação
         self.keyword_dict = keywords_dict
 
+        if fingerprint is None:
+            system_prompt = self._build_system_prompt(keywords_dict, is_follow_up, missing_fields, ask_questions)
+        else:
+            if fingerprint != self._prompt_fingerprint or len(self._system_prompt_cache) >= self.max_cached_prompts:
+                self._system_prompt_cache = {}
+                self._prompt_fingerprint = fingerprint
+            key = (is_follow_up, tuple(missing_fields or ()), ask_questions)
+            system_prompt = self._system_prompt_cache.get(key)
+            if system_prompt is None:
+                system_prompt = self._build_system_prompt(keywords_dict, is_follow_up, missing_fields,
+                                                          ask_questions)
+                self._system_prompt_cache[key] = system_prompt
+        
+        return {
+            "system": system_prompt,
+            "user": f"RELATO: {user_text}"
+        }
+    
+    def _build_system_prompt(self, keywords_dict: Dict, is_follow_up: bool,
+                             missing_fields: Optional[List[str]], ask_questions: bool = True) -> str:
+        """
+        Monta as instruções de sistema a partir do dicionário de palavras-chave.
+        As partes sobre perguntas complementares só entram com `ask_questions`.
+        """
+        # Regras numeradas (a numeração acompanha as regras incluídas)
+        rules = [
+            "Retorne APENAS um objeto JSON válido com as palavras-chave identificadas",
+            "NUNCA invente ou adicione palavras que não estejam na lista fornecida",
+            "Identifique APENAS palavras ou conceitos que estejam explicitamente mencionados no relato",
+        ]
+        if ask_questions:
+            rules += [
+                "Se necessário, sugira perguntas específicas para obter informações faltantes",
+                "NÃO PERGUNTE sobre informações que o usuário já forneceu ou disse explicitamente não saber",
+            ]
+        rules.append("NÃO modifique nem parafraseie as palavras-chave - use-as exatamente como estão na lista")
+
         # Instruções do sistema
         system_prompt = """
         Você é um assistente especializado em identificar indicadores de violência em relatos.
@@ -35,14 +87,9 @@ class GroqAPI:
         no relato do usuário.
         
         IMPORTANTE:
-        1. Retorne APENAS um objeto JSON válido com as palavras-chave identificadas
-        2. NUNCA invente ou adicione palavras que não estejam na lista fornecida
-        3. Identifique APENAS palavras ou conceitos que estejam explicitamente mencionados no relato
-        4. Se necessário, sugira perguntas específicas para obter informações faltantes
-        5. NÃO PERGUNTE sobre informações que o usuário já forneceu ou disse explicitamente não saber
-        6. NÃO modifique nem parafraseie as palavras-chave - use-as exatamente como estão na lista
-        LISTA DE PALAVRAS-CHAVE POR CATEGORIA:
-        """
+"""
+        system_prompt += "".join(f"        {number}. {rule}\n" for number, rule in enumerate(rules, 1))
+        system_prompt += "        LISTA DE PALAVRAS-CHAVE POR CATEGORIA:\n        "
         
         # Adicionar todas as palavras-chave organizadas por categoria
         for category, keywords in keywords_dict.items():
@@ -52,42 +99,47 @@ class GroqAPI:
         # Instruções para follow-up (se aplicável)
         if is_follow_up and missing_fields:
             system_prompt += "\n\nInformações importantes faltando: " + ", ".join(missing_fields)
-            system_prompt += "\nFormule perguntas específicas para obter estas informações."
-            system_prompt += "\nLembre-se: não pergunte sobre informações já fornecidas ou que o usuário já indicou desconhecer."
-            system_prompt += "\nNão pergunte sobre informações que o usuário já disse não saber, como nomes ou detalhes que ele não viu."
+            if ask_questions:
+                system_prompt += "\nFormule perguntas específicas para obter estas informações."
+                system_prompt += "\nLembre-se: não pergunte sobre informações já fornecidas ou que o usuário já indicou desconhecer."
+                system_prompt += "\nNão pergunte sobre informações que o usuário já disse não saber, como nomes ou detalhes que ele não viu."
             system_prompt += "\nNão invente nada, apenas identifique palavras-chave do relato que forem claramente aceitáveis."
 
-        # Formato de resposta obrigatório
-        system_prompt += """
-        
-        FORMATO DE RESPOSTA (JSON):
-        {
-            "identified_keywords": {
+        # Formato de resposta obrigatório (sem perguntas: menos tokens gerados pelo LLM)
+        response_fields = [
+            '''"identified_keywords": {
                 "action_type": ["palavra1", "palavra2"],
                 "frequency": ["palavra3"],
                 "context": ["palavra4"],
                 "target": ["palavra5"],
                 "relationship": ["palavra6"],
                 "impact": ["palavra7"]
-            },
-            "missing_information": ["campo1", "campo2"],
-            "follow_up_questions": ["pergunta específica 1?", "pergunta específica 2?"]
-        }
-        
-        Só inclua categorias que tenham palavras-chave identificadas.
-        Para "relationship", se o relato indicar que o agressor é desconhecido, NÃO solicite mais informações sobre identidade.
-        Certifique-se de que suas perguntas complementares são relevantes e não contradizem o que já foi compartilhado.
-        """
+            }''',
+            '"missing_information": ["campo1", "campo2"]',
+        ]
+        notes = [
+            "Só inclua categorias que tenham palavras-chave identificadas.",
+            'Para "relationship", se o relato indicar que o agressor é desconhecido, NÃO solicite mais informações sobre identidade.',
+        ]
+        if ask_questions:
+            response_fields.append('"follow_up_questions": ["pergunta específica 1?", "pergunta específica 2?"]')
+            notes.append("Certifique-se de que suas perguntas complementares são relevantes e não contradizem o que já foi compartilhado.")
+
+        system_prompt += "\n        \n        FORMATO DE RESPOSTA (JSON):\n        {\n"
+        system_prompt += ",\n".join(f"            {field}" for field in response_fields)
+        system_prompt += "\n        }\n        \n"
+        system_prompt += "".join(f"        {note}\n" for note in notes)
+        system_prompt += "        "
         
-        return {
-            "system": system_prompt,
-            "user": f"RELATO: {user_text}"
-        }
+        return system_prompt
     
-    def send_request(self, prompt: Dict[str, str]) -> Dict[str, Any]:
+    def send_request(self, prompt: Dict[str, str],
+                     timer: Optional[StageTimer] = None) -> Dict[str, Any]:
         """
         Envia requisição para a API do Groq e processa a resposta.
+        Se `timer` for fornecido, registra as etapas "groq_request" e "validation".
         """
+        timer = timer or StageTimer()
         try:
             data = {
                 "model": self.model,
@@ -99,14 +151,16 @@ class GroqAPI:
                 "response_format": {"type": "json_object"}  # forçar resposta em JSON
             }
             
-            response = requests.post(self.endpoint, headers=self.headers, json=data)
-            response.raise_for_status()
-            
-            result = response.json()
-            parsed_content = json.loads(result["choices"][0]["message"]["content"])
+            with timer.span("groq_request"):
+                response = requests.post(self.endpoint, headers=self.headers, json=data)
+                response.raise_for_status()
+                result = response.json()
             
-            # Aplicar validação para garantir que só retorna palavras-chave válidas
-            return self.validate_response(parsed_content)
+            with timer.span("validation"):
+                parsed_content = json.loads(result["choices"][0]["message"]["content"])
+                
+                # Aplicar validação para garantir que só retorna palavras-chave válidas
+                return self.validate_response(parsed_content)
         
         except Exception as e:
             print(f"Erro na comunicação com Groq: {e}")
@@ -0,0 +1,138 @@
+"""
+Benchmark de escalabilidade do ProcessPoolClassifier.
+
+Gera conjuntos de fatos sintéticos (respostas de extração sorteadas do
+vocabulário da base, sem LLM), mede a vazão da classificação no processo
+principal e com 1, 2, 4, ... workers e compara cada medida com a de 1 worker.
+
+Uso:
+    python -m utils.pool_benchmark                       # até o número de núcleos
+    python -m utils.pool_benchmark --rows 5000 --workers 1,2,4,8 --min-efficiency 0.8
+"""
+import argparse
+import contextlib
+import os
+import random
+import sys
+import time
+from typing import Dict, List, Mapping, NamedTuple, Optional, Sequence
+
+# Quantas palavras-chave sortear por categoria (mínimo, máximo)
+SYNTHETIC_SHAPE = {
+    "action_type": (1, 3), "target": (0, 2), "frequency": (0, 1), "context": (0, 1),
+    "relationship": (0, 1), "impact": (0, 2),
+}
+
+
+class ScalingResult(NamedTuple):
+    label: str
+    workers: int          # 0 = processo principal
+    rows: int
+    seconds: float
+
+    @property
+    def throughput(self) -> float:
+        return self.rows / self.seconds if self.seconds > 0 else 0.0
+
+
+def synthetic_rows(keywords_dict: Mapping[str, Sequence[str]], count: int,
+                   seed: int = 0) -> List[tuple]:
+    """Linhas (chave, texto, resposta) com palavras-chave sorteadas do vocabulário."""
+    rng = random.Random(seed)
+    rows = []
+    for index in range(count):
+        identified: Dict[str, List[str]] = {}
+        for category, (low, high) in SYNTHETIC_SHAPE.items():
+            vocabulary = list(keywords_dict.get(category, ()))
+            size = min(rng.randint(low, high), len(vocabulary))
+            if size:
+                identified[category] = rng.sample(vocabulary, size)
+        rows.append((index, f"relato sintético {index}", {"identified_keywords": identified}))
+    return rows
+
+
+def measure_inline(rows: Sequence[tuple]) -> ScalingResult:
+    """Classificação sequencial no processo principal (referência sem pool)."""
+    from engine.expert_system import ExpertSystem
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        system = ExpertSystem(api_key="", render_explanations=False)
+        system.analyze_response(*rows[0][1:])
+        start = time.perf_counter()
+        for _, text, response in rows:
+            system.analyze_response(text, response)
+        elapsed = time.perf_counter() - start
+    return ScalingResult("processo principal", 0, len(rows), elapsed)
+
+
+def measure_pool(rows: Sequence[tuple], workers: int, chunk_size: int = 32) -> ScalingResult:
+    """Vazão com `workers` processos já iniciados (sem o custo de partida)."""
+    from engine.process_pool import ProcessPoolClassifier
+    with ProcessPoolClassifier(workers, chunk_size=chunk_size) as pool:
+        pool.warm_up()
+        start = time.perf_counter()
+        done = sum(1 for _ in pool.map(rows))
+        elapsed = time.perf_counter() - start
+    return ScalingResult(f"{workers} worker(s)", workers, done, elapsed)
+
+
+def format_results(results: Sequence[ScalingResult]) -> str:
+    """Tabela com vazão, aceleração e eficiência em relação a 1 worker."""
+    base = next((r for r in results if r.workers == 1), None)
+    lines = []
+    for result in results:
+        line = f"  {result.label:>20}: {result.throughput:8.1f} relatos/s ({result.seconds:.2f}s)"
+        if base is not None and result.workers > 0:
+            speedup = result.throughput / base.throughput
+            line += f"  aceleração {speedup:4.2f}x  eficiência {speedup / result.workers:4.0%}"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def efficiency(results: Sequence[ScalingResult]) -> Optional[float]:
+    """Eficiência (aceleração / workers) da maior contagem de workers medida."""
+    base = next((r for r in results if r.workers == 1), None)
+    largest = max((r for r in results if r.workers > 1), key=lambda r: r.workers, default=None)
+    if base is None or largest is None:
+        return None
+    return largest.throughput / base.throughput / largest.workers
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    import engine  # noqa: F401  (corrige collections.Mapping antes do Experta)
+    from engine.process_pool import available_cores
+    from knowledge_base.reloadable import get_knowledge_base
+
+    cores = available_cores()
+    default_workers = sorted({1, *(2 ** i for i in range(1, cores.bit_length()) if 2 ** i <= cores), cores})
+    parser = argparse.ArgumentParser(description="Benchmark de escalabilidade do pool de classificação")
+    parser.add_argument("--rows", type=int, default=2000, help="conjuntos de fatos sintéticos")
+    parser.add_argument("--workers", default=",".join(map(str, default_workers)),
+                        help="contagens de workers separadas por vírgula")
+    parser.add_argument("--chunk-size", type=int, default=32)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--min-efficiency", type=float, default=None,
+                        help="falha se a eficiência com mais workers ficar abaixo deste valor (0-1)")
+    args = parser.parse_args(argv)
+
+    worker_counts = [int(value) for value in args.workers.split(",") if value.strip()]
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        keywords_dict = get_knowledge_base().current().keywords_dict
+    rows = synthetic_rows(keywords_dict, args.rows, seed=args.seed)
+
+    print(f"🧪 {len(rows)} conjuntos de fatos sintéticos, {cores} núcleo(s) disponível(is)")
+    results: List[ScalingResult] = [measure_inline(rows)]
+    for workers in worker_counts:
+        results.append(measure_pool(rows, workers, chunk_size=args.chunk_size))
+    print(format_results(results))
+    if max(worker_counts, default=0) > cores:
+        print(f"⚠️ Mais workers que núcleos ({cores}): a eficiência acima disso não é representativa")
+
+    measured = efficiency(results)
+    if args.min_efficiency is not None and measured is not None and measured < args.min_efficiency:
+        print(f"❌ Eficiência {measured:.0%} abaixo do mínimo {args.min_efficiency:.0%}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
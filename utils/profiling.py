@@ -0,0 +1,182 @@
+"""
+Captura sob demanda de perfis cProfile de análises selecionadas.
+
+Cada captura gera dois arquivos no diretório configurado:
+- <nome>.pstats: dump do pstats (ex.: `python -m pstats arquivo.pstats`, snakeviz)
+- <nome>.collapsed: pilhas colapsadas ("a;b;c microssegundos", rótulos sem
+  espaços), aceitas por flamegraph.pl, speedscope e inferno
+"""
+import cProfile
+import itertools
+import os
+import pstats
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+# Limites ao reconstruir pilhas a partir do grafo de chamadas: profundidade e
+# número total de caminhos percorridos (em um grafo denso, os caminhos crescem
+# exponencialmente com a profundidade)
+MAX_STACK_DEPTH = 200
+MAX_STACK_PATHS = 20000
+TRUNCATED_FRAME = "[...]"
+
+
+class ProfileCapture:
+    """
+    Decide quais análises devem ser perfiladas e grava os resultados.
+
+    A captura é habilitada para as próximas N análises (`enable_next`) e/ou
+    para relatos que satisfaçam um predicado (`enable_when`). Somente as
+    `max_captures` capturas mais recentes são mantidas no diretório.
+    """
+
+    def __init__(self, output_dir: str, max_captures: int = 20):
+        self.output_dir = output_dir
+        self.max_captures = max_captures
+        self._remaining = 0
+        self._predicate: Optional[Callable[[str], bool]] = None
+        self._lock = threading.Lock()
+        self._sequence = itertools.count(1)
+        os.makedirs(self.output_dir, exist_ok=True)
+
+    def enable_next(self, count: int) -> None:
+        """Perfila as próximas `count` análises."""
+        with self._lock:
+            self._remaining = max(0, count)
+
+    def enable_when(self, predicate: Optional[Callable[[str], bool]]) -> None:
+        """Perfila toda análise cujo texto satisfaça `predicate` (None desabilita)."""
+        with self._lock:
+            self._predicate = predicate
+
+    def disable(self) -> None:
+        """Desabilita todas as capturas pendentes."""
+        with self._lock:
+            self._remaining = 0
+            self._predicate = None
+
+    def should_capture(self, text: str) -> bool:
+        """
+        Indica se a análise deste texto deve ser perfilada.
+        Consome uma unidade do contador de `enable_next` quando aplicável.
+        """
+        with self._lock:
+            if self._remaining > 0:
+                self._remaining -= 1
+                return True
+            predicate = self._predicate
+        if predicate is None:
+            return False
+        try:
+            return bool(predicate(text))
+        except Exception as e:
+            print(f"⚠️ Erro no predicado de profiling: {e}")
+            return False
+
+    def capture(self, func: Callable, *args, **kwargs):
+        """
+        Executa `func` sob cProfile, grava pstats e pilhas colapsadas
+        e retorna o resultado da função.
+        """
+        profiler = cProfile.Profile()
+        try:
+            return profiler.runcall(func, *args, **kwargs)
+        finally:
+            try:
+                self._write(profiler)
+            except OSError as e:
+                print(f"⚠️ Não foi possível gravar o perfil: {e}")
+
+    def _write(self, profiler: cProfile.Profile) -> str:
+        """Grava os arquivos da captura e aplica a retenção."""
+        name = f"analysis_{time.strftime('%Y%m%d-%H%M%S')}_{next(self._sequence):04d}"
+        base = os.path.join(self.output_dir, name)
+
+        stats = pstats.Stats(profiler)
+        stats.dump_stats(base + ".pstats")
+        write_collapsed_stacks(stats, base + ".collapsed")
+        print(f"🔬 Perfil gravado em {base}.pstats / .collapsed")
+
+        self._prune()
+        return base
+
+    def _prune(self) -> None:
+        """Remove as capturas mais antigas além de `max_captures`."""
+        captures: Dict[str, float] = {}
+        for entry in os.scandir(self.output_dir):
+            stem, ext = os.path.splitext(entry.name)
+            if ext in (".pstats", ".collapsed") and stem.startswith("analysis_"):
+                captures[stem] = max(captures.get(stem, 0.0), entry.stat().st_mtime)
+
+        stale = sorted(captures, key=lambda stem: (captures[stem], stem))
+        for stem in stale[:max(0, len(stale) - self.max_captures)]:
+            for ext in (".pstats", ".collapsed"):
+                path = os.path.join(self.output_dir, stem + ext)
+                if os.path.exists(path):
+                    os.remove(path)
+
+
+def _frame_label(func: Tuple[str, int, str]) -> str:
+    """Rótulo de uma função no formato usado pelas ferramentas de flamegraph."""
+    filename, lineno, name = func
+    label = name if filename == "~" else f"{name}@{os.path.basename(filename)}:{lineno}"
+    return label.replace(";", ",").replace(" ", "_")
+
+
+def collapse_stacks(stats: pstats.Stats) -> Dict[str, int]:
+    """
+    Reconstrói pilhas aproximadas a partir do grafo chamador→chamado do cProfile.
+
+    O cProfile só registra arestas, não pilhas completas: o tempo de cada função
+    é distribuído entre os caminhos proporcionalmente ao tempo acumulado de
+    cada aresta. Retorna {pilha: microssegundos de tempo próprio}.
+
+    Depois de MAX_STACK_PATHS caminhos, as subárvores restantes não são mais
+    expandidos: todo o seu tempo vai para um quadro TRUNCATED_FRAME abaixo do
+    último quadro, preservando o total.
+    """
+    entries = stats.stats  # func -> (cc, nc, tt, ct, callers)
+    callees: Dict[tuple, Dict[tuple, tuple]] = {}
+    for func, (_, _, _, _, callers) in entries.items():
+        for caller, edge in callers.items():
+            callees.setdefault(caller, {})[func] = edge
+
+    roots = [func for func, entry in entries.items() if not entry[4]]
+    stacks: Dict[str, int] = {}
+    visited = 0
+
+    def add(path, seconds):
+        us = int(round(seconds * 1e6))
+        if us > 0:
+            key = ";".join(path)
+            stacks[key] = stacks.get(key, 0) + us
+
+    def walk(func, path, on_stack, scale):
+        nonlocal visited
+        visited += 1
+        _, _, tt, ct, _ = entries[func]
+        path = path + (_frame_label(func),)
+        add(path, tt * scale)
+        if visited >= MAX_STACK_PATHS:
+            add(path + (TRUNCATED_FRAME,), max(0.0, ct - tt) * scale)
+            return
+        if len(path) >= MAX_STACK_DEPTH:
+            return
+        for callee, edge in callees.get(func, {}).items():
+            callee_ct = entries[callee][3]
+            if callee in on_stack or callee_ct <= 0:
+                continue
+            walk(callee, path, on_stack | {callee}, scale * edge[3] / callee_ct)
+
+    for root in roots:
+        walk(root, (), frozenset((root,)), 1.0)
+    return stacks
+
+
+def write_collapsed_stacks(stats: pstats.Stats, path: str) -> None:
+    """Grava as pilhas colapsadas, uma por linha, no formato "a;b;c contagem"."""
+    stacks = collapse_stacks(stats)
+    with open(path, "w", encoding="utf-8") as output:
+        for stack, count in sorted(stacks.items()):
+            output.write(f"{stack} {count}\n")
@@ -0,0 +1,127 @@
+"""
+Benchmark de tempo de import dos módulos do sistema.
+
+Executa `python -X importtime -c "import <módulo>"` em um processo limpo,
+agrega o tempo por módulo e compara o tempo cumulativo com um orçamento.
+
+Uso:
+    python -m utils.startup_benchmark                      # todos os orçamentos
+    python -m utils.startup_benchmark engine.expert_system --top 15
+"""
+import argparse
+import os
+import subprocess
+import sys
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# Orçamento (ms) do import a frio de cada ponto de entrada. Os valores têm
+# folga de ~3x sobre o medido para absorver variação entre máquinas.
+IMPORT_BUDGETS_MS = {
+    "engine.expert_system": 600,
+    "knowledge_base.violence_types": 150,
+    "knowledge_base.keywords_dictionary": 150,
+}
+
+# Módulos que nunca devem ser carregados ao importar o motor
+FORBIDDEN_MODULES = ("streamlit",)
+
+
+class ImportTiming(NamedTuple):
+    module: str
+    self_us: int
+    cumulative_us: int
+
+
+class StartupReport(NamedTuple):
+    target: str
+    total_ms: float
+    timings: List[ImportTiming]
+    loaded_forbidden: List[str]
+
+
+def measure_import(target: str, python: str = sys.executable,
+                   forbidden: Sequence[str] = FORBIDDEN_MODULES) -> StartupReport:
+    """
+    Mede o import de `target` em um subprocesso com `-X importtime`.
+    """
+    code = (
+        f"import sys; import {target}; "
+        f"print(','.join(m for m in {tuple(forbidden)!r} if m in sys.modules))"
+    )
+    env = dict(os.environ, PYTHONPATH=REPO_ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    completed = subprocess.run(
+        [python, "-X", "importtime", "-c", code],
+        cwd=REPO_ROOT, env=env, capture_output=True, text=True, check=True
+    )
+
+    timings = parse_importtime(completed.stderr)
+    # Descarta os imports da inicialização do interpretador (até "site")
+    site_index = next((i for i, t in enumerate(timings) if t.module == "site"), -1)
+    timings = timings[site_index + 1:]
+    total_us = next((t.cumulative_us for t in timings if t.module == target), 0)
+    loaded = [m for m in completed.stdout.strip().split(",") if m]
+    return StartupReport(target, total_us / 1000.0, timings, loaded)
+
+
+def parse_importtime(stderr: str) -> List[ImportTiming]:
+    """Interpreta as linhas "import time: self | cumulative | módulo"."""
+    timings = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue  # cabeçalho
+        timings.append(ImportTiming(parts[2].strip(), int(parts[0]), int(parts[1])))
+    return timings
+
+
+def best_of(target: str, runs: int = 3) -> StartupReport:
+    """Menor tempo entre `runs` execuções, para reduzir o ruído de medição."""
+    return min((measure_import(target) for _ in range(runs)), key=lambda r: r.total_ms)
+
+
+def format_report(report: StartupReport, top: int = 10,
+                  budget_ms: Optional[float] = None) -> str:
+    """Resumo legível com os módulos de maior tempo cumulativo."""
+    budget = f" (orçamento {budget_ms:.0f} ms)" if budget_ms is not None else ""
+    lines = [f"{report.target}: {report.total_ms:.1f} ms{budget}"]
+    slowest = sorted(report.timings, key=lambda t: t.cumulative_us, reverse=True)[:top]
+    for timing in slowest:
+        lines.append(f"  {timing.cumulative_us / 1000.0:8.1f} ms  "
+                     f"(próprio {timing.self_us / 1000.0:6.1f})  {timing.module}")
+    if report.loaded_forbidden:
+        lines.append(f"  ❌ módulos proibidos carregados: {', '.join(report.loaded_forbidden)}")
+    return "\n".join(lines)
+
+
+def check_budgets(budgets: Dict[str, float], runs: int = 3, top: int = 10) -> bool:
+    """Mede cada alvo, imprime o relatório e indica se todos ficaram no orçamento."""
+    ok = True
+    for target, budget_ms in budgets.items():
+        report = best_of(target, runs)
+        print(format_report(report, top=top, budget_ms=budget_ms))
+        if report.total_ms > budget_ms or report.loaded_forbidden:
+            ok = False
+    return ok
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark de tempo de import")
+    parser.add_argument("modules", nargs="*", help="módulos a medir (padrão: todos os orçamentos)")
+    parser.add_argument("--budget-ms", type=float, help="orçamento para os módulos informados")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    if args.modules:
+        budgets = {m: args.budget_ms or IMPORT_BUDGETS_MS.get(m, float("inf")) for m in args.modules}
+    else:
+        budgets = IMPORT_BUDGETS_MS
+    return 0 if check_budgets(budgets, runs=args.runs, top=args.top) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
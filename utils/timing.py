@@ -0,0 +1,101 @@
+"""
+Medição de latência por etapa do pipeline de análise.
+
+As durações são registradas com relógio monotônico (time.perf_counter)
+e expressas em milissegundos.
+"""
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Iterable, Optional
+
+
+class StageTimer:
+    """
+    Registra a duração de cada etapa de uma única análise.
+    """
+
+    def __init__(self):
+        self._start = time.perf_counter()
+        self.spans: Dict[str, float] = {}
+
+    @contextmanager
+    def span(self, stage: str):
+        """
+        Mede o bloco como uma etapa. Etapas repetidas são acumuladas.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000.0
+            self.spans[stage] = self.spans.get(stage, 0.0) + elapsed
+
+    def finish(self) -> Dict[str, float]:
+        """
+        Retorna as etapas medidas acrescidas do tempo total desde a criação.
+        """
+        timings = {stage: round(ms, 3) for stage, ms in self.spans.items()}
+        timings["total"] = round((time.perf_counter() - self._start) * 1000.0, 3)
+        return timings
+
+
+class LatencyHistogram:
+    """
+    Janela deslizante das latências mais recentes por etapa.
+
+    Mantém no máximo `window` amostras por etapa, o que permite calcular
+    p50/p95/p99 sem crescimento de memória ao longo da vida do processo.
+    """
+
+    def __init__(self, window: int = 1000):
+        self.window = window
+        self._samples: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+
+    def record(self, timings: Dict[str, float]) -> None:
+        """Adiciona as durações de uma análise à janela."""
+        with self._lock:
+            for stage, ms in timings.items():
+                samples = self._samples.get(stage)
+                if samples is None:
+                    samples = self._samples[stage] = deque(maxlen=self.window)
+                samples.append(ms)
+
+    def percentiles(self, stage: str,
+                    quantiles: Iterable[int] = (50, 95, 99)) -> Optional[Dict[str, float]]:
+        """
+        Retorna os percentis pedidos para uma etapa, ou None se não houver amostras.
+        """
+        with self._lock:
+            samples = sorted(self._samples.get(stage, ()))
+        if not samples:
+            return None
+        return {f"p{q}": _nearest_rank(samples, q) for q in quantiles}
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """
+        Retorna p50/p95/p99 e a contagem de amostras de todas as etapas.
+        """
+        with self._lock:
+            stages = list(self._samples)
+        result = {}
+        for stage in stages:
+            stats = self.percentiles(stage)
+            if stats is not None:
+                stats["count"] = len(self._samples[stage])
+                result[stage] = stats
+        return result
+
+    def clear(self) -> None:
+        """Descarta todas as amostras."""
+        with self._lock:
+            self._samples.clear()
+
+
+def _nearest_rank(sorted_samples, q: int) -> float:
+    """Percentil pelo método do posto mais próximo."""
+    rank = max(1, math.ceil(q / 100.0 * len(sorted_samples)))
+    return sorted_samples[rank - 1]